@@ -0,0 +1,132 @@
+"""Baseline schema, as created by init_db before migrations existed
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases that were created with init_db() should be stamped at this
+revision (`alembic stamp 0001`) and then upgraded.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("role", sa.Enum("ADMIN", "USER", name="userrole")),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("parent_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=True),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+
+    op.create_table(
+        "products",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("base_price", sa.Float(), nullable=False),
+        sa.Column("status", sa.Enum("ACTIVE", "ARCHIVED", name="productstatus")),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+    )
+    op.create_index("ix_products_id", "products", ["id"])
+    op.create_index("ix_products_name", "products", ["name"])
+
+    op.create_table(
+        "product_variants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("product_id", sa.Integer(), sa.ForeignKey("products.id")),
+        sa.Column("sku", sa.String(), nullable=False),
+        sa.Column("sku_name", sa.String(), nullable=False),
+        sa.Column("price_adjustment", sa.Float()),
+        sa.Column("stock_quantity", sa.Integer()),
+    )
+    op.create_index("ix_product_variants_id", "product_variants", ["id"])
+    op.create_index("ix_product_variants_sku", "product_variants", ["sku"], unique=True)
+
+    op.create_table(
+        "inventory_reservations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("variant_id", sa.Integer(), sa.ForeignKey("product_variants.id")),
+        sa.Column("cart_id", sa.String()),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.Enum("PENDING", "COMPLETED", "RELEASED", name="reservationstatus")),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_inventory_reservations_id", "inventory_reservations", ["id"])
+    op.create_index("ix_inventory_reservations_cart_id", "inventory_reservations", ["cart_id"])
+
+    op.create_table(
+        "pricing_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("type", sa.Enum("BULK", "USER_TIER", "SEASONAL", "BOGO", name="pricingruletype"), nullable=False),
+        sa.Column("priority", sa.Integer()),
+        sa.Column("parameters", sa.JSON(), nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+    )
+    op.create_index("ix_pricing_rules_id", "pricing_rules", ["id"])
+
+    op.create_table(
+        "orders",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cart_id", sa.String(), nullable=False),
+        sa.Column("total_amount", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_orders_id", "orders", ["id"])
+    op.create_index("ix_orders_cart_id", "orders", ["cart_id"])
+
+    op.create_table(
+        "order_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("order_id", sa.Integer(), sa.ForeignKey("orders.id")),
+        sa.Column("variant_id", sa.Integer(), sa.ForeignKey("product_variants.id")),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_order_items_id", "order_items", ["id"])
+
+    op.create_table(
+        "promotions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("start_date", sa.DateTime(), nullable=False),
+        sa.Column("end_date", sa.DateTime(), nullable=False),
+        sa.Column("discount_percentage", sa.Float(), nullable=False),
+        sa.Column("target_category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=True),
+        sa.Column("is_active", sa.Boolean()),
+    )
+    op.create_index("ix_promotions_id", "promotions", ["id"])
+
+
+def downgrade():
+    for table in (
+        "promotions", "order_items", "orders", "pricing_rules", "inventory_reservations",
+        "product_variants", "products", "categories", "users",
+    ):
+        op.drop_table(table)
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for enum in ("pricingruletype", "reservationstatus", "productstatus", "userrole"):
+            sa.Enum(name=enum).drop(bind, checkfirst=True)
@@ -0,0 +1,38 @@
+"""Reserved-quantity counter and Redis hold tokens
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("product_variants") as batch:
+        batch.add_column(sa.Column("reserved_quantity", sa.Integer(), server_default="0", nullable=False))
+    op.execute(
+        """
+        UPDATE product_variants SET reserved_quantity = COALESCE((
+            SELECT SUM(r.quantity) FROM inventory_reservations r
+            WHERE r.variant_id = product_variants.id AND r.status = 'PENDING'
+        ), 0)
+        """
+    )
+
+    with op.batch_alter_table("inventory_reservations") as batch:
+        batch.add_column(sa.Column("hold_token", sa.String(), nullable=True))
+    op.create_index("ix_inventory_reservations_hold_token", "inventory_reservations", ["hold_token"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_inventory_reservations_hold_token", table_name="inventory_reservations")
+    with op.batch_alter_table("inventory_reservations") as batch:
+        batch.drop_column("hold_token")
+    with op.batch_alter_table("product_variants") as batch:
+        batch.drop_column("reserved_quantity")
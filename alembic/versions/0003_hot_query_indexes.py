@@ -0,0 +1,47 @@
+"""Composite and partial indexes for reservation, order and promotion queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+PENDING_ONLY = sa.text("status = 'PENDING'")
+ACTIVE_ONLY = {"postgresql_where": sa.text("is_active = true"), "sqlite_where": sa.text("is_active = 1")}
+
+
+def upgrade():
+    op.create_index(
+        "ix_inventory_reservations_variant_status_expires",
+        "inventory_reservations",
+        ["variant_id", "status", "expires_at"],
+    )
+    op.create_index(
+        "ix_inventory_reservations_pending_expires",
+        "inventory_reservations",
+        ["expires_at"],
+        postgresql_where=PENDING_ONLY,
+        sqlite_where=PENDING_ONLY,
+    )
+    op.create_index("ix_order_items_order_id", "order_items", ["order_id"])
+    op.create_index("ix_order_items_variant_id", "order_items", ["variant_id"])
+    op.create_index(
+        "ix_promotions_active_window",
+        "promotions",
+        ["end_date", "start_date", "target_category_id"],
+        **ACTIVE_ONLY,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_promotions_active_window", table_name="promotions")
+    op.drop_index("ix_order_items_variant_id", table_name="order_items")
+    op.drop_index("ix_order_items_order_id", table_name="order_items")
+    op.drop_index("ix_inventory_reservations_pending_expires", table_name="inventory_reservations")
+    op.drop_index("ix_inventory_reservations_variant_status_expires", table_name="inventory_reservations")
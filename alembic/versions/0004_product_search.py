@@ -0,0 +1,38 @@
+"""Full-text search document on products
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        with op.batch_alter_table("products") as batch:
+            batch.add_column(sa.Column("search_vector", sa.Text(), nullable=True))
+        return
+
+    op.add_column("products", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        """
+        UPDATE products SET search_vector =
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        """
+    )
+    op.create_index("ix_products_search_vector", "products", ["search_vector"], postgresql_using="gin")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_products_search_vector", table_name="products")
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("search_vector")
@@ -0,0 +1,46 @@
+"""Daily sales rollups for the analytics endpoints
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "variant_sales_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("variant_id", sa.Integer(), sa.ForeignKey("product_variants.id"), nullable=False),
+        sa.Column("quantity_sold", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "variant_id"),
+    )
+    op.create_table(
+        "category_sales_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False),
+        sa.Column("quantity_sold", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "category_id"),
+    )
+    op.create_table(
+        "rollup_watermarks",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("last_order_item_id", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    # Existing order history is folded in by `python -m app.db.rebuild_rollups`
+    # or, incrementally, by the first runs of the Celery refresh task.
+
+
+def downgrade():
+    op.drop_table("rollup_watermarks")
+    op.drop_table("category_sales_daily")
+    op.drop_table("variant_sales_daily")
@@ -0,0 +1,25 @@
+"""Expression index on available stock for low-stock queries
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_product_variants_available",
+        "product_variants",
+        [sa.text("(stock_quantity - reserved_quantity)")],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_product_variants_available", table_name="product_variants")
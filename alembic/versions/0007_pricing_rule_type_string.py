@@ -0,0 +1,46 @@
+"""Store pricing rule types as strings so plugins can add new ones
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+BUILTIN_TYPES = ("BULK", "USER_TIER", "SEASONAL", "BOGO")
+
+
+def upgrade():
+    with op.batch_alter_table("pricing_rules") as batch:
+        batch.alter_column(
+            "type",
+            existing_type=sa.Enum(*BUILTIN_TYPES, name="pricingruletype"),
+            type_=sa.String(),
+            existing_nullable=False,
+            postgresql_using="type::text",
+        )
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS pricingruletype")
+
+
+def downgrade():
+    # Rules of types the enum doesn't know about cannot be kept
+    op.execute(
+        sa.text("DELETE FROM pricing_rules WHERE type NOT IN :types")
+        .bindparams(sa.bindparam("types", BUILTIN_TYPES, expanding=True))
+    )
+    rule_type = sa.Enum(*BUILTIN_TYPES, name="pricingruletype")
+    rule_type.create(op.get_bind(), checkfirst=True)
+    with op.batch_alter_table("pricing_rules") as batch:
+        batch.alter_column(
+            "type",
+            existing_type=sa.String(),
+            type_=rule_type,
+            existing_nullable=False,
+            postgresql_using="type::pricingruletype",
+        )
@@ -0,0 +1,58 @@
+"""Store money as NUMERIC instead of FLOAT
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = [
+    ("products", "base_price", sa.Numeric(12, 2)),
+    ("product_variants", "price_adjustment", sa.Numeric(12, 2)),
+    ("orders", "total_amount", sa.Numeric(12, 2)),
+    ("order_items", "unit_price", sa.Numeric(12, 2)),
+    ("variant_sales_daily", "revenue", sa.Numeric(16, 2)),
+    ("category_sales_daily", "revenue", sa.Numeric(16, 2)),
+]
+
+
+def _restore_expression_indexes():
+    # SQLite batch mode rebuilds each table by copying it, and the copy does
+    # not carry expression indexes over
+    if op.get_bind().dialect.name == "sqlite":
+        op.create_index(
+            "ix_product_variants_available",
+            "product_variants",
+            [sa.text("(stock_quantity - reserved_quantity)")],
+        )
+
+
+def upgrade():
+    # Existing float values are rounded half-up to the cent
+    for table, column, money in MONEY_COLUMNS:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column,
+                existing_type=sa.Float(),
+                type_=money,
+                postgresql_using=f"round({column}::numeric, 2)",
+            )
+    _restore_expression_indexes()
+
+
+def downgrade():
+    for table, column, money in MONEY_COLUMNS:
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column(
+                column,
+                existing_type=money,
+                type_=sa.Float(),
+                postgresql_using=f"{column}::double precision",
+            )
+    _restore_expression_indexes()
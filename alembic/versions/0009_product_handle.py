@@ -0,0 +1,27 @@
+"""Stable product handle for catalog import/export
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("products", sa.Column("handle", sa.String(), nullable=True))
+    op.execute("UPDATE products SET handle = 'product-' || id")
+    with op.batch_alter_table("products") as batch:
+        batch.alter_column("handle", existing_type=sa.String(), nullable=False)
+    op.create_index("ix_products_handle", "products", ["handle"], unique=True)
+
+
+def downgrade():
+    op.drop_index("ix_products_handle", table_name="products")
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("handle")
@@ -0,0 +1,62 @@
+"""Stock movement ledger and idempotency records
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "stock_movements",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("variant_id", sa.Integer(), sa.ForeignKey("product_variants.id"), nullable=False),
+        sa.Column("quantity_change", sa.Integer(), nullable=False),
+        sa.Column("stock_after", sa.Integer(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=True),
+        sa.Column("idempotency_key", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_stock_movements_variant_created", "stock_movements", ["variant_id", "created_at"])
+    op.create_table(
+        "idempotency_records",
+        sa.Column("scope", sa.String(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("request_hash", sa.String(), nullable=False),
+        sa.Column("response", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("scope", "key"),
+    )
+    op.create_index("ix_idempotency_records_created_at", "idempotency_records", ["created_at"])
+
+    if op.get_bind().dialect.name == "postgresql":
+        # The ledger is append-only; refuse edits at the database level too
+        op.execute("""
+            CREATE FUNCTION stock_movements_append_only() RETURNS trigger AS $$
+            BEGIN
+                RAISE EXCEPTION 'stock_movements is append-only';
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        op.execute("""
+            CREATE TRIGGER stock_movements_append_only
+            BEFORE UPDATE OR DELETE ON stock_movements
+            FOR EACH ROW EXECUTE FUNCTION stock_movements_append_only()
+        """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TRIGGER stock_movements_append_only ON stock_movements")
+        op.execute("DROP FUNCTION stock_movements_append_only()")
+    op.drop_index("ix_idempotency_records_created_at", table_name="idempotency_records")
+    op.drop_table("idempotency_records")
+    op.drop_index("ix_stock_movements_variant_created", table_name="stock_movements")
+    op.drop_table("stock_movements")
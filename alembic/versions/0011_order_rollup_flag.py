@@ -0,0 +1,41 @@
+"""Track rolled-up orders with a flag instead of an order item watermark
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def _reset_rollups():
+    # Which orders the old watermark covered cannot be told apart exactly, so
+    # the rollups start over; the Celery refresh task folds the history back in
+    op.execute("DELETE FROM variant_sales_daily")
+    op.execute("DELETE FROM category_sales_daily")
+
+
+def upgrade():
+    _reset_rollups()
+    op.add_column("orders", sa.Column("rolled_up", sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_index(
+        "ix_orders_pending_rollup", "orders", ["id"],
+        postgresql_where=sa.text("rolled_up = false"),
+        sqlite_where=sa.text("rolled_up = 0"),
+    )
+    with op.batch_alter_table("rollup_watermarks") as batch:
+        batch.drop_column("last_order_item_id")
+
+
+def downgrade():
+    _reset_rollups()
+    with op.batch_alter_table("rollup_watermarks") as batch:
+        batch.add_column(sa.Column("last_order_item_id", sa.Integer(), nullable=False, server_default="0"))
+    op.drop_index("ix_orders_pending_rollup", table_name="orders")
+    with op.batch_alter_table("orders") as batch:
+        batch.drop_column("rolled_up")
@@ -1,4 +1,4 @@
-from typing import Generator, Optional
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
@@ -6,52 +6,57 @@ from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.database import SessionLocal
-from app.models.models import User, UserRole
+from app.core.security import decode_access_token
+from app.db.database import get_db
+from app.models.models import UserRole
 from app.schemas.user import TokenData
 from app.services.user import UserService
+from app.services.user_cache import AuthUser
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
-
 def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+) -> AuthUser:
+    """
+    Resolves the token's user. The session is only used on a user cache
+    miss, so warm requests make no query.
+    """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
         token_data = TokenData(email=payload.get("sub"))
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
-            status_code=status.HTTP_03_FORBIDDEN,
+            status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = UserService.get_user_by_email(db, email=token_data.email)
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and "uid" in payload and "role" in payload:
+        try:
+            return AuthUser(
+                id=payload["uid"], email=token_data.email, full_name=payload.get("name"),
+                is_active=bool(payload.get("active")), role=UserRole(payload["role"])
+            )
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Could not validate credentials")
+    user = UserService.get_auth_user(db, email=token_data.email)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: AuthUser = Depends(get_current_user),
+) -> AuthUser:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 def get_current_active_admin(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: AuthUser = Depends(get_current_active_user),
+) -> AuthUser:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
-            status_code=status.HTTP_03_FORBIDDEN, detail="The user doesn't have enough privileges"
+            status_code=status.HTTP_403_FORBIDDEN, detail="The user doesn't have enough privileges"
         )
     return current_user
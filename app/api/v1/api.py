@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import products, categories, cart, rules, orders, analytics, promotions, auth
+from app.api.v1.endpoints import products, categories, cart, rules, orders, analytics, inventory, promotions, auth, diagnostics
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -9,4 +9,6 @@ api_router.include_router(cart.router, prefix="/cart", tags=["cart"])
 api_router.include_router(rules.router, prefix="/rules", tags=["rules"])
 api_router.include_router(orders.router, prefix="/orders", tags=["orders"])
 api_router.include_router(analytics.router, prefix="/inventory", tags=["inventory"])
+api_router.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
 api_router.include_router(promotions.router, prefix="/promotions", tags=["promotions"])
+api_router.include_router(diagnostics.router, prefix="/diagnostics", tags=["diagnostics"])
@@ -1,61 +1,80 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.core.config import settings
+from app.db.database import get_async_read_db
 from app.schemas import schemas
-from sqlalchemy import func
-from app.models.models import ProductVariant, OrderItem, Product, Category
+from sqlalchemy import select
+from app.models.models import ProductVariant
+from app.services.analytics import AnalyticsService
+from app.services.stock_alerts import stream_events
+import datetime
+import redis.asyncio
 
 router = APIRouter()
 
 @router.get("/low-stock", response_model=List[schemas.Variant])
-def get_low_stock_items(threshold: int = Query(5, ge=0), db: Session = Depends(get_db)):
+async def get_low_stock_items(threshold: int = Query(settings.LOW_STOCK_THRESHOLD, ge=0), db: AsyncSession = Depends(get_async_read_db)):
     """
-    Returns all product variants where stock_quantity is below the threshold.
+    Returns all product variants whose available quantity (stock minus
+    pending reservations) is below the threshold, scarcest first.
     """
-    low_stock_items = db.query(ProductVariant).filter(ProductVariant.stock_quantity < threshold).all()
-    return low_stock_items
+    available = ProductVariant.stock_quantity - ProductVariant.reserved_quantity
+    result = await db.execute(
+        select(ProductVariant).where(available < threshold).order_by(available, ProductVariant.id)
+    )
+    return result.scalars().all()
+
+@router.get("/low-stock/events")
+async def stream_low_stock_events(request: Request, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-Sent Events feed of low-stock and restock threshold crossings.
+    Reconnecting clients resume from their Last-Event-ID.
+    """
+    if not settings.LOW_STOCK_EVENTS_ENABLED:
+        raise HTTPException(status_code=404, detail="Low-stock events are disabled")
+
+    async def events():
+        client = redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+        try:
+            async for message in stream_events(client, last_event_id or "$", request.is_disconnected):
+                yield message
+        finally:
+            await client.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @router.get("/top-selling")
-def get_top_selling_products(limit: int = Query(10, ge=1), db: Session = Depends(get_db)):
-    """
-    Returns the top selling product variants by quantity sold.
-    """
-    top_selling = (
-        db.query(
-            ProductVariant.sku,
-            ProductVariant.sku_name,
-            func.sum(OrderItem.quantity).label("total_sold")
-        )
-        .join(OrderItem, ProductVariant.id == OrderItem.variant_id)
-        .group_by(ProductVariant.id)
-        .order_by(func.sum(OrderItem.quantity).desc())
-        .limit(limit)
-        .all()
-    )
+async def get_top_selling_products(
+    limit: int = Query(10, ge=1),
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Returns the top selling product variants by quantity sold, optionally
+    within an inclusive date range. Reads the daily rollups, which trail
+    checkouts by up to a minute.
+    """
+    top_selling = await AnalyticsService.top_selling_async(db, limit=limit, start_date=start_date, end_date=end_date)
     return [
         {"sku": item.sku, "name": item.sku_name, "total_sold": item.total_sold}
         for item in top_selling
     ]
 
 @router.get("/revenue-by-category")
-def get_revenue_by_category(db: Session = Depends(get_db)):
-    """
-    Returns total revenue generated per category.
-    """
-    revenue = (
-        db.query(
-            Category.name,
-            func.sum(OrderItem.quantity * OrderItem.unit_price).label("total_revenue")
-        )
-        .join(Product, Category.id == Product.category_id)
-        .join(ProductVariant, Product.id == ProductVariant.product_id)
-        .join(OrderItem, ProductVariant.id == OrderItem.variant_id)
-        .group_by(Category.id)
-        .order_by(func.sum(OrderItem.quantity * OrderItem.unit_price).desc())
-        .all()
-    )
+async def get_revenue_by_category(
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Returns total revenue generated per category, optionally within an
+    inclusive date range. Reads the daily rollups.
+    """
+    revenue = await AnalyticsService.revenue_by_category_async(db, start_date=start_date, end_date=end_date)
     return [
-        {"category": item.name, "total_revenue": round(item.total_revenue, 2)}
+        {"category": item.name, "total_revenue": item.total_revenue}
         for item in revenue
     ]
@@ -2,38 +2,53 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.core import security
 from app.core.config import settings
+from app.core.password_hasher import PasswordHasherBusy
+from app.db.database import get_async_db
 from app.schemas.user import User, UserCreate, Token
 from app.services.user import UserService
 
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many sign-in requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=User)
-def register(
+async def register(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: UserCreate
 ) -> Any:
-    user = UserService.get_user_by_email(db, email=user_in.email)
+    user = await UserService.get_user_by_email_async(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    return UserService.create_user(db, user_in=user_in)
+    try:
+        return await UserService.create_user_async(db, user_in=user_in)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
 @router.post("/login", response_model=Token)
-def login(
-    db: Session = Depends(deps.get_db),
+async def login(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
-    user = UserService.authenticate(
-        db, email=form_data.username, password=form_data.password
-    )
+    try:
+        user = await UserService.authenticate_async(
+            db, email=form_data.username, password=form_data.password
+        )
+    except PasswordHasherBusy:
+        raise _hasher_busy()
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
@@ -42,7 +57,10 @@ def login(
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            user.email, expires_delta=access_token_expires
+            user.email,
+            expires_delta=access_token_expires,
+            # Signed so that deps can authorize without a user lookup
+            claims={"uid": user.id, "role": user.role.value, "active": bool(user.is_active), "name": user.full_name}
         ),
         "token_type": "bearer",
     }
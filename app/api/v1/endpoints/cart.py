@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.db.database import get_db
+from app.services.cart import CartService
 from app.services.inventory import InventoryService
 from app.schemas import schemas
 
@@ -30,26 +31,21 @@ def checkout(request: schemas.CheckoutRequest, db: Session = Depends(get_db)):
 @router.put("/update", response_model=schemas.Variant)
 def update_cart_item(item: schemas.CartItemAdd, db: Session = Depends(get_db)):
     # Simple implementation: release old and create new reservation
-    from app.models.models import InventoryReservation, ReservationStatus
-    db.query(InventoryReservation).filter(
-        InventoryReservation.cart_id == item.cart_id,
-        InventoryReservation.variant_id == item.variant_id,
-        InventoryReservation.status == ReservationStatus.PENDING
-    ).update({"status": ReservationStatus.RELEASED})
-    db.commit()
+    InventoryService.release_reservations(db, cart_id=item.cart_id, variant_id=item.variant_id)
     
     return add_to_cart(item, db)
 
 @router.delete("/remove")
 def remove_from_cart(cart_id: str, variant_id: int, db: Session = Depends(get_db)):
-    from app.models.models import InventoryReservation, ReservationStatus
-    res = db.query(InventoryReservation).filter(
-        InventoryReservation.cart_id == cart_id,
-        InventoryReservation.variant_id == variant_id,
-        InventoryReservation.status == ReservationStatus.PENDING
-    ).first()
-    if not res:
+    released = InventoryService.release_reservations(db, cart_id=cart_id, variant_id=variant_id)
+    if not released:
         raise HTTPException(status_code=404, detail="Item not found in cart")
-    res.status = ReservationStatus.RELEASED
-    db.commit()
     return {"message": "Item removed from cart"}
+
+@router.get("/{cart_id}", response_model=schemas.Cart)
+def read_cart(cart_id: str, db: Session = Depends(get_db)):
+    """
+    The cart's live lines with availability, quotes and totals. Lines whose
+    reservations have expired are left out, as checkout would leave them out.
+    """
+    return CartService.get_cart(db, cart_id)
@@ -1,23 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from app.db.database import get_db
+from app.db.database import get_db, get_async_read_db
 from app.api import deps
 from app.services.products import CategoryService
 from app.schemas import schemas
-from app.models.models import Category, User
+from app.services.user_cache import AuthUser
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Category])
-def read_categories(db: Session = Depends(get_db)):
-    return CategoryService.get_categories(db)
+async def read_categories(db: AsyncSession = Depends(get_async_read_db)):
+    return ORJSONResponse(await CategoryService.get_category_rows_async(db))
+
+@router.get("/tree", response_model=List[schemas.CategoryTreeNode])
+async def read_category_tree(db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Returns the whole category forest as nested nodes, served from the
+    in-memory category tree.
+    """
+    return await db.run_sync(CategoryService.get_category_tree)
 
 @router.post("/", response_model=schemas.Category)
 def create_category(
     category: schemas.CategoryCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_active_admin)
+    current_user: AuthUser = Depends(deps.get_current_active_admin)
 ):
     return CategoryService.create_category(db, category.model_dump())
 
@@ -26,26 +36,19 @@ def update_category(
     category_id: int, 
     category: schemas.CategoryCreate, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_active_admin)
+    current_user: AuthUser = Depends(deps.get_current_active_admin)
 ):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
+    db_category = CategoryService.update_category(db, category_id, category.model_dump())
     if not db_category:
         raise HTTPException(status_code=404, detail="Category not found")
-    for var, value in category.model_dump().items():
-        setattr(db_category, var, value)
-    db.commit()
-    db.refresh(db_category)
     return db_category
 
 @router.delete("/{category_id}")
 def delete_category(
     category_id: int, 
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_active_admin)
+    current_user: AuthUser = Depends(deps.get_current_active_admin)
 ):
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if not db_category:
+    if not CategoryService.delete_category(db, category_id):
         raise HTTPException(status_code=404, detail="Category not found")
-    db.delete(db_category)
-    db.commit()
     return {"message": "Category deleted"}
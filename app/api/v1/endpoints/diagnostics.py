@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+from app.api import deps
+from app.db.database import pool_status
+from app.services.user_cache import AuthUser
+
+router = APIRouter()
+
+@router.get("/pool")
+def get_pool_status(current_user: AuthUser = Depends(deps.get_current_active_admin)):
+    """
+    Returns connection pool usage and checkout wait times for each engine.
+    """
+    return pool_status()
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.api import deps
+from app.core.config import settings
+from app.db.database import get_db
+from app.services.user_cache import AuthUser
+from app.schemas import schemas
+from app.services.idempotency import IdempotencyKeyReused
+from app.services.inventory import InventoryService
+
+router = APIRouter()
+
+@router.post("/adjustments:bulk", response_model=schemas.BulkStockAdjustmentResult)
+def bulk_adjust_stock(
+    request: schemas.BulkStockAdjustmentRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: Session = Depends(get_db),
+    current_user: AuthUser = Depends(deps.get_current_active_admin)
+):
+    """
+    Applies stock deltas or absolute counts by SKU in one transaction, logs
+    them to the stock movement ledger and returns the new available
+    quantities. Retrying with the same `Idempotency-Key` replays the result.
+    """
+    if len(request.adjustments) > settings.STOCK_ADJUSTMENT_MAX_BATCH:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.STOCK_ADJUSTMENT_MAX_BATCH} adjustments per request"
+        )
+    try:
+        return InventoryService.apply_stock_adjustments(
+            db,
+            [(item.sku, item.mode, item.quantity) for item in request.adjustments],
+            reason=request.reason,
+            idempotency_key=idempotency_key
+        )
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,13 +1,43 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from app.db.database import get_async_read_db
 from app.schemas import schemas
 from app.models.models import Order
+from app.services.pagination import MAX_PAGE_SIZE, apply_keyset, next_page_headers, select_fields, split_page
+from app.services.serialization import row_encoder
 
 router = APIRouter()
 
+ORDER_FIELDS = set(schemas.Order.model_fields) - {"items"}
+
 @router.get("/", response_model=List[schemas.Order])
-def read_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = db.query(Order).offset(skip).limit(limit).all()
+async def read_orders(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Lists orders in id order, paged with the `X-Next-Cursor` header.
+    """
+    try:
+        columns = select_fields(Order, fields, ORDER_FIELDS)
+        query = select(*columns) if columns else select(Order).options(selectinload(Order.items))
+        result = await db.execute(apply_keyset(query, Order.id, cursor, limit, skip))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    orders, next_cursor = split_page(result.all() if columns else result.scalars().all(), limit)
+    headers = next_page_headers(request.url, next_cursor)
+    if columns:
+        encoder = row_encoder(schemas.Order, tuple(column.key for column in columns))
+        return ORJSONResponse(encoder.encode_all(orders), headers=headers)
+    response.headers.update(headers)
     return orders
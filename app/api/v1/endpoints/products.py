@@ -1,18 +1,103 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.db.database import get_db
+import io
+import tempfile
+from app.api import deps
+from app.db.database import get_db, get_async_db, get_async_read_db
+from app.services.catalog import CatalogService
 from app.services.products import ProductService
-from app.services.pricing import PricingEngine
-from app.models.models import PricingRule
+from app.services.inventory import InventoryService
+from app.services.pricing import PricingEngine, pricing_plan_cache
+from app.services.money import from_cents, to_cents
+from app.services.pagination import MAX_PAGE_SIZE, next_page_headers, select_fields
+from app.services.response_cache import invalidate_responses
+from app.models.models import Product
+from app.services.user_cache import AuthUser
 from app.schemas import schemas
 
 router = APIRouter()
 
+PRODUCT_FIELDS = set(schemas.Product.model_fields) - {"variants"}
+
 @router.get("/", response_model=List[schemas.Product])
-def read_products(q: Optional[str] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = ProductService.get_products(db, q=q, skip=skip, limit=limit)
-    return products
+async def read_products(
+    request: Request,
+    q: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Lists products in id order. Pass the `X-Next-Cursor` header back as
+    `cursor` for the next page; `fields` limits the response to those columns.
+    Rows are encoded directly rather than through the response model.
+    """
+    try:
+        columns = select_fields(Product, fields, PRODUCT_FIELDS)
+        products, next_cursor = await ProductService.get_product_rows_async(
+            db, q=q, skip=skip, limit=limit, cursor=cursor,
+            fields=tuple(column.key for column in columns) if columns else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ORJSONResponse(products, headers=next_page_headers(request.url, next_cursor))
+
+@router.get("/search", response_model=List[schemas.Product])
+async def search_products(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Ranked full-text search over product names and descriptions. Every word
+    is prefix-matched, so it also serves typeahead.
+    """
+    return await ProductService.search_products_async(db, q, limit=limit)
+
+@router.post("/import", response_model=schemas.CatalogImportResult)
+async def import_catalog(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: AuthUser = Depends(deps.get_current_active_admin)
+):
+    """
+    Upserts products by handle and variants by SKU from an NDJSON or CSV
+    body (format from `format`, else the Content-Type). The body is spooled
+    to disk, so large catalogs are never held in memory; invalid rows are
+    reported by line and skipped.
+    """
+    fmt = format or ("csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson")
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        try:
+            return await run_in_threadpool(CatalogService.import_stream, db, stream, fmt)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Catalog must be UTF-8 encoded")
+
+@router.get("/export")
+def export_catalog(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    db: Session = Depends(get_db),
+    current_user: AuthUser = Depends(deps.get_current_active_admin)
+):
+    """Streams the catalog, one row per variant, in the import format."""
+    return StreamingResponse(
+        CatalogService.export_rows(db, format),
+        media_type="text/csv" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="catalog.{format}"'}
+    )
 
 @router.post("/", response_model=schemas.Product)
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
@@ -20,24 +105,15 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
 
 @router.put("/{product_id}", response_model=schemas.Product)
 def update_product(product_id: int, product: schemas.ProductCreate, db: Session = Depends(get_db)):
-    from app.models.models import Product
-    db_product = db.query(Product).filter(Product.id == product_id).first()
+    db_product = ProductService.update_product(db, product_id, product.model_dump())
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
-    for var, value in product.model_dump().items():
-        setattr(db_product, var, value)
-    db.commit()
-    db.refresh(db_product)
     return db_product
 
 @router.delete("/{product_id}")
 def delete_product(product_id: int, db: Session = Depends(get_db)):
-    from app.models.models import Product
-    db_product = db.query(Product).filter(Product.id == product_id).first()
-    if not db_product:
+    if not ProductService.delete_product(db, product_id):
         raise HTTPException(status_code=404, detail="Product not found")
-    db.delete(db_product)
-    db.commit()
     return {"message": "Product deleted"}
 
 # Variant Endpoints
@@ -47,6 +123,7 @@ def create_variant(product_id: int, variant: schemas.VariantCreate, db: Session
     db_variant = ProductVariant(**variant.model_dump(), product_id=product_id)
     db.add(db_variant)
     db.commit()
+    invalidate_responses("products")
     db.refresh(db_variant)
     return db_variant
 
@@ -59,6 +136,8 @@ def update_variant(variant_id: int, variant: schemas.VariantCreate, db: Session
     for var, value in variant.model_dump().items():
         setattr(db_variant, var, value)
     db.commit()
+    InventoryService.sync_stock(db, [variant_id])
+    invalidate_responses("products")
     db.refresh(db_variant)
     return db_variant
 
@@ -70,23 +149,95 @@ def delete_variant(variant_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Variant not found")
     db.delete(db_variant)
     db.commit()
+    invalidate_responses("products")
     return {"message": "Variant deleted"}
 
+@router.post("/prices:batch", response_model=schemas.BatchPriceResponse)
+async def calculate_prices_batch(request: schemas.BatchPriceRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Quotes many (product/variant, quantity, user_tier) combinations in one call.
+    Breakdowns are only built when `include_breakdown` is set.
+    """
+    from app.models.models import Product, ProductVariant
+    items = request.items
+    if not items:
+        return {"quotes": []}
+
+    product_ids = {item.product_id for item in items}
+    products = {
+        row.id: row for row in await db.execute(
+            select(Product.id, Product.base_price, Product.category_id).where(Product.id.in_(product_ids))
+        )
+    }
+    missing = sorted(product_ids - products.keys())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Products not found: {missing}")
+
+    variant_ids = {item.variant_id for item in items if item.variant_id is not None}
+    variants = {}
+    if variant_ids:
+        variants = {
+            row.id: row for row in await db.execute(
+                select(ProductVariant.id, ProductVariant.product_id, ProductVariant.price_adjustment)
+                .where(ProductVariant.id.in_(variant_ids))
+            )
+        }
+
+    base_cents, category_ids = [], []
+    for item in items:
+        product = products[item.product_id]
+        cents = to_cents(product.base_price)
+        if item.variant_id is not None:
+            variant = variants.get(item.variant_id)
+            if variant is None or variant.product_id != item.product_id:
+                raise HTTPException(status_code=404, detail=f"Variant {item.variant_id} not found for product {item.product_id}")
+            cents += to_cents(variant.price_adjustment or 0)
+        base_cents.append(cents)
+        category_ids.append(product.category_id if product.category_id is not None else -1)
+
+    plan = await db.run_sync(pricing_plan_cache.get)
+    result = PricingEngine().calculate_prices_batch(
+        base_cents,
+        [item.quantity for item in items],
+        plan,
+        category_ids=category_ids,
+        user_tiers=[item.user_tier for item in items],
+        include_breakdown=request.include_breakdown
+    )
+
+    final_cents = result.final_cents.tolist()
+    quotes = []
+    for i, item in enumerate(items):
+        quotes.append({
+            "product_id": item.product_id,
+            "variant_id": item.variant_id,
+            "quantity": item.quantity,
+            "user_tier": item.user_tier,
+            "base_price": from_cents(base_cents[i]),
+            "final_price": from_cents(final_cents[i]),
+            "applied_rules": result.applied_rules[i] if result.applied_rules is not None else None
+        })
+    return {"quotes": quotes}
+
 @router.get("/{product_id}/price", response_model=schemas.PriceCalculationResult)
-def calculate_product_price(
+async def calculate_product_price(
     product_id: int,
     quantity: int = Query(1, ge=1),
     user_tier: Optional[str] = None,
     promo_code: Optional[str] = None,
-    db: Session = Depends(get_db)
+    breakdown: bool = True,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    product = ProductService.get_product(db, product_id)
+    """
+    Quotes a product. With `breakdown=false` only the final price is computed
+    and `applied_rules` comes back empty, which is cheaper for listing pages.
+    """
+    product = await ProductService.get_product_async(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Fetch active rules for this calculation
-    # For now, fetching all active rules and the engine will decide which to apply
-    rules = db.query(PricingRule).order_by(PricingRule.priority.desc()).all()
+    # Active rules and promotions come from the shared compiled plan
+    plan = await db.run_sync(pricing_plan_cache.get)
     
     context = {
         "quantity": quantity,
@@ -95,5 +246,10 @@ def calculate_product_price(
     }
     
     engine = PricingEngine()
-    result = engine.calculate_price(product.base_price, context, rules, product_category_id=product.category_id, db=db)
+    if not breakdown:
+        final_price = engine.calculate_final_price(
+            product.base_price, quantity, plan, product_category_id=product.category_id, user_tier=user_tier
+        )
+        return {"base_price": product.base_price, "final_price": final_price, "applied_rules": []}
+    result = engine.calculate_price(product.base_price, context, plan, product_category_id=product.category_id)
     return result
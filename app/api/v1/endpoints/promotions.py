@@ -1,21 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.database import get_db
+from typing import List, Optional
+from app.db.database import get_db, get_async_read_db
 from app.schemas import schemas
+from app.services.pricing import pricing_plan_cache
+from app.services.response_cache import invalidate_responses
 from app.models.models import Promotion
+from app.services.pagination import MAX_PAGE_SIZE, apply_keyset, next_page_headers, select_fields, split_page
+from app.services.serialization import row_encoder
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Promotion])
-def read_promotions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(Promotion).offset(skip).limit(limit).all()
+async def read_promotions(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Lists promotions in id order, paged with the `X-Next-Cursor` header.
+    """
+    try:
+        columns = select_fields(Promotion, fields, schemas.Promotion.model_fields)
+        encoder = row_encoder(schemas.Promotion, tuple(column.key for column in columns) if columns else None)
+        query = select(*encoder.columns(Promotion))
+        result = await db.execute(apply_keyset(query, Promotion.id, cursor, limit, skip))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    promotions, next_cursor = split_page(result.all(), limit)
+    return ORJSONResponse(encoder.encode_all(promotions), headers=next_page_headers(request.url, next_cursor))
 
 @router.post("/", response_model=schemas.Promotion)
 def create_promotion(promotion: schemas.PromotionCreate, db: Session = Depends(get_db)):
     db_promotion = Promotion(**promotion.model_dump())
     db.add(db_promotion)
     db.commit()
+    pricing_plan_cache.invalidate()
+    invalidate_responses("promotions")
     db.refresh(db_promotion)
     return db_promotion
 
@@ -26,4 +54,6 @@ def delete_promotion(promotion_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Promotion not found")
     db.delete(db_promotion)
     db.commit()
+    pricing_plan_cache.invalidate()
+    invalidate_responses("promotions")
     return {"message": "Promotion deleted"}
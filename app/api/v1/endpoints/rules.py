@@ -1,21 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
 from app.schemas import schemas
+from app.services.pricing import PricingRuleParameterError, compile_rule_params, pricing_plan_cache
+from app.services.response_cache import invalidate_responses
+from app.services.serialization import row_encoder
 from app.models.models import PricingRule
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.PricingRule])
 def read_rules(db: Session = Depends(get_db)):
-    return db.query(PricingRule).all()
+    encoder = row_encoder(schemas.PricingRule)
+    return ORJSONResponse(encoder.encode_all(db.execute(select(*encoder.columns(PricingRule)))))
 
 @router.post("/", response_model=schemas.PricingRule)
 def create_rule(rule: schemas.PricingRuleCreate, db: Session = Depends(get_db)):
+    try:
+        compile_rule_params(rule.type, rule.name, rule.parameters)
+    except PricingRuleParameterError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     db_rule = PricingRule(**rule.model_dump())
     db.add(db_rule)
     db.commit()
+    pricing_plan_cache.invalidate()
+    invalidate_responses("rules")
     db.refresh(db_rule)
     return db_rule
 
@@ -26,4 +38,6 @@ def delete_rule(rule_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Rule not found")
     db.delete(db_rule)
     db.commit()
+    pricing_plan_cache.invalidate()
+    invalidate_responses("rules")
     return {"message": "Pricing rule deleted"}
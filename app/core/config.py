@@ -1,6 +1,16 @@
 from pydantic_settings import BaseSettings
 from typing import Optional
 
+def to_async_url(url: str) -> str:
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "E-commerce Inventory and Dynamic Pricing API"
     VERSION: str = "1.0.0"
@@ -18,12 +28,81 @@ class Settings(BaseSettings):
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
+    @property
+    def async_database_url(self) -> str:
+        return to_async_url(self.sqlalchemy_database_url)
+
+    # Optional read replica for read-only endpoints; falls back to the primary
+    READ_REPLICA_URL: Optional[str] = None
+
+    # Connection pool (ignored for SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0 # 0 disables the timeout
+
     REDIS_URL: str = "redis://redis:6379/0"
+
+    # Inventory
+    RESERVATION_BACKEND: str = "database" # "database" or "redis"
+    RESERVATION_WRITE_BEHIND_BATCH_SIZE: int = 500
+    RESERVATION_FLUSH_WAIT_SECONDS: float = 35 # Longer than the flush lock's expiry, so a crashed flusher is outwaited
+    RESERVATION_CLEANUP_CHUNK_SIZE: int = 1000
+    STOCK_ADJUSTMENT_MAX_BATCH: int = 10000
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    LOW_STOCK_THRESHOLD: int = 5
+    LOW_STOCK_EVENTS_ENABLED: bool = False # Push threshold crossings to a Redis stream
+    LOW_STOCK_STREAM_KEY: str = "inventory:low_stock_events"
+    LOW_STOCK_STREAM_MAXLEN: int = 10000
+    # The in-process cart cache only sees its own worker's writes, so it is
+    # for single-worker deployments; with several workers use the Redis one
+    CART_CACHE_ENABLED: bool = False
+    CART_CACHE_REDIS_ENABLED: bool = False
+    CART_CACHE_TTL_SECONDS: int = 3600 # Idle carts are rebuilt after this
+    CART_CACHE_MAXSIZE: int = 10000
+
+    # Catalog import/export
+    CATALOG_IMPORT_CHUNK_SIZE: int = 5000 # Rows validated and upserted per transaction
+    CATALOG_IMPORT_MAX_ERRORS: int = 1000 # Row errors reported back; all are counted
+    CATALOG_EXPORT_BATCH_SIZE: int = 1000
+
+    # Pricing
+    PRICING_PLAN_TTL_SECONDS: int = 300
+
+    # Categories
+    CATEGORY_TREE_TTL_SECONDS: int = 300 # Bounds how long other workers serve a tree from before a write
+
+    # Response cache for catalog reads
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 30 # Bounds staleness of stock counts and, without Redis, of other workers
+    RESPONSE_CACHE_MAXSIZE: int = 1000 # Cached responses per process
+    RESPONSE_CACHE_REDIS_ENABLED: bool = False # Shares entries and versions across workers
+
+    # Analytics rollups
+    ANALYTICS_ROLLUP_BATCH_SIZE: int = 5000 # Orders folded in per transaction
     
+    # Observability
+    METRICS_ENABLED: bool = True # Serve Prometheus metrics on /metrics
+    DEBUG_PROFILE_ENABLED: bool = False # Honour the X-Debug-Profile request header
+    CELERY_METRICS_PORT: int = 0 # 0 disables the worker's metrics server
+
     # Auth
     SECRET_KEY: str = "supersecretkey" # Change in production
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Trust the role/active claims in the token and skip the user lookup;
+    # role changes and deactivation then only apply once old tokens expire
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 30 # Bounds staleness on other workers
+    USER_CACHE_MAXSIZE: int = 10000
+    USER_CACHE_REDIS_ENABLED: bool = False # Shared second tier across workers
+    USER_CACHE_REDIS_TTL_SECONDS: int = 300
+    BCRYPT_ROUNDS: int = 12 # Changing it rehashes passwords at their next login
+    PASSWORD_HASH_WORKERS: int = 2 # Processes dedicated to bcrypt
+    PASSWORD_HASH_QUEUE_DEPTH: int = 32 # Waiting hashes beyond that; more get a 429
 
     class Config:
         case_sensitive = True
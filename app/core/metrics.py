@@ -0,0 +1,179 @@
+"""
+Prometheus metrics and per-request profiling.
+
+`MetricsMiddleware` gives every request a RequestProfile; SQLAlchemy cursor
+events add each statement's count and time to it, and `timed()` adds the
+hot-path timers. Totals are exported as histograms on /metrics, and a request
+sent with `X-Debug-Profile: 1` gets its own breakdown back in a
+`Server-Timing` header when DEBUG_PROFILE_ENABLED is set.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Dict, Optional
+import os
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route", "status"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["route"], buckets=QUERY_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request", ["route"]
+)
+REQUEST_LOCK_WAIT_SECONDS = Histogram(
+    "http_request_db_lock_wait_seconds", "Time spent in row-locking (FOR UPDATE) statements per request", ["route"]
+)
+OPERATION_SECONDS = Histogram(
+    "hot_path_duration_seconds", "Duration of instrumented hot-path operations", ["operation"],
+    buckets=(.00001, .00005, .0001, .0005, .001, .005, .01, .05, .1, .5, 1, 5, 30, 120)
+)
+RESPONSE_CACHE_REQUESTS = Counter(
+    "response_cache_requests_total", "Cacheable requests by outcome (hit, not_modified, miss, error)",
+    ["namespace", "result"]
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds", "bcrypt time in the password hashing pool", ["operation"],
+    buckets=(.01, .05, .1, .25, .5, 1, 2.5, 5)
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "password_hash_queue_wait_seconds", "Time a password hash waited for a free worker", ["operation"],
+    buckets=(.001, .01, .05, .1, .25, .5, 1, 2.5, 5, 10)
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hash_in_flight", "Password hashes running or queued", multiprocess_mode="livesum"
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Password hashes refused because the pool was saturated", ["operation"]
+)
+
+
+@dataclass
+class RequestProfile:
+    queries: int = 0
+    db_seconds: float = 0.0
+    lock_wait_seconds: float = 0.0
+    timers: Dict[str, float] = field(default_factory=dict)
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Formats the profile as a Server-Timing header value (milliseconds)."""
+        parts = [
+            f'db;dur={self.db_seconds * 1000:.3f};desc="{self.queries} queries"',
+            f"lock-wait;dur={self.lock_wait_seconds * 1000:.3f}",
+        ]
+        parts.extend(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.timers.items())
+        parts.append(f"total;dur={total_seconds * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _profile.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    profile = _profile.get()
+    if profile is None:
+        return
+    profile.queries += 1
+    profile.db_seconds += elapsed
+    # Without server-side wait events, a locking statement's whole duration
+    # is the best available measure of lock wait; under contention it is
+    # almost entirely waiting.
+    if "FOR UPDATE" in statement:
+        profile.lock_wait_seconds += elapsed
+
+
+def timed(operation: str):
+    """Decorator recording a function's duration under `operation`."""
+    histogram = OPERATION_SECONDS.labels(operation)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                histogram.observe(elapsed)
+                profile = _profile.get()
+                if profile is not None:
+                    profile.timers[operation] = profile.timers.get(operation, 0.0) + elapsed
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware, so it adds no extra task per request. Routes are
+    labelled by their path template to keep label cardinality bounded.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _profile.set(profile)
+        started = time.perf_counter()
+        debug = settings.DEBUG_PROFILE_ENABLED and (b"x-debug-profile", b"1") in scope["headers"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if debug:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", profile.server_timing(time.perf_counter() - started).encode()))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _profile.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+            REQUEST_DB_QUERIES.labels(route).observe(profile.queries)
+            REQUEST_DB_SECONDS.labels(route).observe(profile.db_seconds)
+            REQUEST_LOCK_WAIT_SECONDS.labels(route).observe(profile.lock_wait_seconds)
+
+
+def start_metrics_server(port: int):
+    """
+    Serves /metrics from a process without an HTTP app (the Celery worker).
+    With PROMETHEUS_MULTIPROC_DIR set, samples from all prefork children are
+    aggregated.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
@@ -0,0 +1,107 @@
+"""
+bcrypt off the request path. Hashing and verification run in a small
+process pool, so a burst of logins uses at most PASSWORD_HASH_WORKERS cores
+and never holds the event loop or the threadpool that sync endpoints share.
+At most PASSWORD_HASH_QUEUE_DEPTH more may wait for a worker; beyond that
+callers get PasswordHasherBusy straight away and the API answers 429.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import (
+    PASSWORD_HASH_IN_FLIGHT, PASSWORD_HASH_REJECTED, PASSWORD_HASH_SECONDS, PASSWORD_HASH_WAIT_SECONDS
+)
+
+_OPERATIONS = {
+    "hash": security.get_password_hash,
+    "verify": security.verify_and_update_password,
+}
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _run(operation: str, *args):
+    """Runs in a pool process; returns the result and when bcrypt started and finished."""
+    started = time.time()
+    result = _OPERATIONS[operation](*args)
+    return result, started, time.time()
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the server process has threads (and maybe
+                # a running event loop) that a forked child would inherit
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def submit(self, operation: str, *args) -> Future:
+        """Queues `operation`; raises PasswordHasherBusy if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise PasswordHasherBusy(f"Password {operation} queue is full")
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        queued = time.time()
+        try:
+            future = self._pool().submit(_run, operation, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        def done(future: Future):
+            self._release()
+            if not future.cancelled() and future.exception() is None:
+                _, started, finished = future.result()
+                PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(max(started - queued, 0.0))
+                PASSWORD_HASH_SECONDS.labels(operation).observe(finished - started)
+
+        future.add_done_callback(done)
+        return future
+
+    def _release(self):
+        PASSWORD_HASH_IN_FLIGHT.dec()
+        self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        result, _, _ = await asyncio.wrap_future(self.submit("hash", password))
+        return result
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        result, _, _ = await asyncio.wrap_future(self.submit("verify", password, hashed_password))
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_DEPTH)
+    return _password_hasher
+
+
+def shutdown_password_hasher():
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
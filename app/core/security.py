@@ -1,24 +1,64 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
+import threading
+import time
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min and max rounds to the configured cost makes any hash created
+# under another cost "need update", so logins rehash it.
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS, bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+# Verified token payloads keyed by the token string. The same string always
+# carries the same signature, so a hit only needs its expiry re-checked.
+_VERIFIED_TOKENS_MAX = 10000
+_verified_tokens: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
+def create_access_token(
+    subject: Union[str, Any], expires_delta: timedelta = None, claims: Optional[Dict[str, Any]] = None
+) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verifies a token, reusing earlier verifications. Raises jwt.JWTError."""
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(token)
+        if payload is not None:
+            _verified_tokens.move_to_end(token)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    with _verified_tokens_lock:
+        _verified_tokens[token] = payload
+        if len(_verified_tokens) > _VERIFIED_TOKENS_MAX:
+            _verified_tokens.popitem(last=False)
+    return payload
+
+def clear_verified_tokens():
+    with _verified_tokens_lock:
+        _verified_tokens.clear()
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new hash), with a new hash only if the old one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
@@ -0,0 +1,47 @@
+"""
+Bulk catalog import and export from the command line:
+
+    python -m app.db.catalog import catalog.ndjson
+    python -m app.db.catalog import catalog.csv --chunk-size 10000
+    python -m app.db.catalog export --format csv > catalog.csv
+"""
+import argparse
+import sys
+
+from app.db.database import SessionLocal
+from app.services.catalog import FORMATS, CatalogService
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Upsert a catalog feed")
+    importer.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    importer.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    importer.add_argument("--chunk-size", type=int)
+    exporter = commands.add_parser("export", help="Write the catalog to stdout")
+    exporter.add_argument("--format", choices=FORMATS, default="ndjson")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            for chunk in CatalogService.export_rows(db, args.format):
+                sys.stdout.write(chunk)
+            return 0
+
+        fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        stream = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8-sig", newline="")
+        with stream:
+            report = CatalogService.import_stream(db, stream, fmt, args.chunk_size)
+    finally:
+        db.close()
+
+    print(f"{report.rows} rows: {report.created} created, {report.updated} updated, {report.error_count} rejected")
+    for error in report.errors:
+        print(f"  line {error['line']} ({error['sku'] or 'no sku'}): {'; '.join(error['errors'])}", file=sys.stderr)
+    return 1 if report.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,98 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.config import settings
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import create_engine, exc
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.config import settings, to_async_url
 from app.models.models import Base
 
-engine = create_engine(settings.sqlalchemy_database_url)
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": round(self.total_wait_seconds, 6),
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+                "avg_wait_seconds": round(self.total_wait_seconds / self.checkouts, 6) if self.checkouts else 0.0,
+            }
+
+# Keyed by pool logging name, which survives Pool.recreate()
+pool_stats: Dict[str, PoolStats] = {}
+
+class _TimedCheckoutMixin:
+    # Measures how long a checkout takes to obtain a connection: queue wait
+    # when the pool is exhausted, plus connect time for new connections.
+    def _do_get(self):
+        stats = pool_stats.setdefault(self._orig_logging_name, PoolStats())
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            stats.record(time.perf_counter() - started, timed_out)
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _engine_options(url: str, name: str, is_async: bool = False) -> dict:
+    if url.startswith("sqlite"):
+        return {}
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def _make_engines(url: str, name: str):
+    async_url = to_async_url(url)
+    return (
+        create_engine(url, **_engine_options(url, name)),
+        create_async_engine(async_url, **_engine_options(async_url, f"{name}-async", is_async=True)),
+    )
+
+engine, async_engine = _make_engines(settings.sqlalchemy_database_url, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if settings.READ_REPLICA_URL:
+    read_engine, async_read_engine = _make_engines(settings.READ_REPLICA_URL, "replica")
+else:
+    read_engine, async_read_engine = engine, async_engine
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 def get_db():
     db = SessionLocal()
@@ -13,5 +101,39 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """Session for endpoints that only read and can tolerate replica lag."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def pool_status() -> dict:
+    engines = {"primary": engine, "primary-async": async_engine}
+    if read_engine is not engine:
+        engines.update({"replica": read_engine, "replica-async": async_read_engine})
+
+    status = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        entry: Dict[str, Optional[object]] = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        stats = pool_stats.get(name)
+        entry.update(stats.snapshot() if stats else PoolStats().snapshot())
+        status[name] = entry
+    return status
+
+def dialect_insert(db: Session):
+    """The INSERT construct with ON CONFLICT support for the session's database."""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
 def init_db():
     Base.metadata.create_all(bind=engine)
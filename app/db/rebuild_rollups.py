@@ -0,0 +1,13 @@
+from app.db.database import SessionLocal
+from app.services.analytics import AnalyticsService
+
+def rebuild_rollups():
+    db = SessionLocal()
+    try:
+        items = AnalyticsService.rebuild_rollups(db)
+        print(f"Rebuilt sales rollups from {items} order items")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_rollups()
@@ -1,19 +1,44 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.api.v1.api import api_router
-from app.db.database import init_db
+from app.db.database import init_db, SessionLocal
 from app.core.config import settings
 from app.core.exceptions import APIException
+from app.core.metrics import MetricsMiddleware
+from app.core.password_hasher import shutdown_password_hasher
+from app.services.response_cache import ResponseCacheMiddleware
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="A sophisticated backend service for real-time inventory tracking and dynamic pricing.",
     version=settings.VERSION,
+    default_response_class=ORJSONResponse,
 )
+app.add_middleware(ResponseCacheMiddleware, routes={
+    "/api/v1/products/": "products",
+    "/api/v1/categories/": "categories",
+    "/api/v1/promotions/": "promotions",
+    "/api/v1/rules/": "rules",
+})
+# Added last so it is outermost and also times cache hits
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 def startup_event():
     init_db()
+    from app.services.redis_inventory import get_reservation_backend
+    backend = get_reservation_backend()
+    if backend:
+        db = SessionLocal()
+        try:
+            backend.reconcile(db)
+        finally:
+            db.close()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    shutdown_password_hasher()
 
 @app.exception_handler(APIException)
 async def api_exception_handler(request: Request, exc: APIException):
@@ -35,3 +60,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
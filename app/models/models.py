@@ -1,11 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, JSON, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Enum, JSON, Boolean, Index, Numeric, Text, event, false, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship, validates
 from sqlalchemy.ext.declarative import declarative_base
 import datetime
 import enum
+import re
+import uuid
 
 Base = declarative_base()
 
+# Exact money columns; pricing arithmetic itself runs on integer cents
+Money = Numeric(12, 2)
+RevenueTotal = Numeric(16, 2)
+
 class UserRole(str, enum.Enum):
     ADMIN = "ADMIN"
     USER = "USER"
@@ -33,30 +40,62 @@ class Category(Base):
     parent = relationship("Category", remote_side=[id], backref="children")
     products = relationship("Product", back_populates="category")
 
+def new_product_handle(name: str) -> str:
+    """URL-safe handle from the product name plus a random suffix."""
+    slug = re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-")[:60]
+    return f"{slug or 'product'}-{uuid.uuid4().hex[:8]}"
+
+def _default_handle(context):
+    return new_product_handle(context.get_current_parameters().get("name"))
+
 class Product(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, index=True)
+    # Stable external key for catalog import/export
+    handle = Column(String, unique=True, index=True, nullable=False, default=_default_handle)
     name = Column(String, index=True, nullable=False)
     description = Column(String)
-    base_price = Column(Float, nullable=False)
+    base_price = Column(Money, nullable=False)
     status = Column(Enum(ProductStatus), default=ProductStatus.ACTIVE)
     category_id = Column(Integer, ForeignKey("categories.id"))
+    # Full-text document for search; only populated on Postgres
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True))
 
     category = relationship("Category", back_populates="products")
     variants = relationship("ProductVariant", back_populates="product")
 
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+def product_search_document(name, description):
+    return func.setweight(func.to_tsvector("english", func.coalesce(name, "")), "A").op("||")(
+        func.setweight(func.to_tsvector("english", func.coalesce(description, "")), "B")
+    )
+
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _sync_search_vector(mapper, connection, target):
+    if connection.dialect.name == "postgresql":
+        target.search_vector = product_search_document(target.name, target.description)
+
 class ProductVariant(Base):
     __tablename__ = "product_variants"
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     sku = Column(String, unique=True, index=True, nullable=False)
     sku_name = Column(String, nullable=False) # e.g. "Red / XL"
-    price_adjustment = Column(Float, default=0.0)
+    price_adjustment = Column(Money, default=0)
     stock_quantity = Column(Integer, default=0)
+    # Sum of PENDING reservation quantities, maintained by InventoryService
+    reserved_quantity = Column(Integer, default=0, server_default="0", nullable=False)
 
     product = relationship("Product", back_populates="variants")
     reservations = relationship("InventoryReservation", back_populates="variant")
 
+# Low-stock lookups filter and sort on sellable stock, so index the expression
+Index("ix_product_variants_available", ProductVariant.stock_quantity - ProductVariant.reserved_quantity)
+
 class ReservationStatus(str, enum.Enum):
     PENDING = "PENDING"
     COMPLETED = "COMPLETED"
@@ -67,6 +106,7 @@ class InventoryReservation(Base):
     id = Column(Integer, primary_key=True, index=True)
     variant_id = Column(Integer, ForeignKey("product_variants.id"))
     cart_id = Column(String, index=True) # Could be a session ID or user ID
+    hold_token = Column(String, unique=True, index=True, nullable=True) # Redis hold, when reserved through it
     quantity = Column(Integer, nullable=False)
     expires_at = Column(DateTime, nullable=False)
     status = Column(Enum(ReservationStatus), default=ReservationStatus.PENDING)
@@ -74,37 +114,64 @@ class InventoryReservation(Base):
 
     variant = relationship("ProductVariant", back_populates="reservations")
 
+    __table_args__ = (
+        # Availability checks and per-variant expiry
+        Index("ix_inventory_reservations_variant_status_expires", "variant_id", "status", "expires_at"),
+        # Expiry cleanup only ever looks at PENDING rows
+        Index(
+            "ix_inventory_reservations_pending_expires", "expires_at",
+            postgresql_where=text("status = 'PENDING'"),
+            sqlite_where=text("status = 'PENDING'")
+        ),
+    )
+
 class PricingRuleType(str, enum.Enum):
     BULK = "BULK"
     USER_TIER = "USER_TIER"
     SEASONAL = "SEASONAL"
     BOGO = "BOGO"
+    TIERED_BULK = "TIERED_BULK"
+    BUY_X_GET_Y = "BUY_X_GET_Y"
 
 class PricingRule(Base):
     __tablename__ = "pricing_rules"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    type = Column(Enum(PricingRuleType), nullable=False)
+    type = Column(String, nullable=False) # A PricingRuleType or a plugin rule type
     priority = Column(Integer, default=0)
     parameters = Column(JSON, nullable=False) # e.g. {"min_quantity": 10, "discount": 0.1}
     is_active = Column(Boolean, default=True)
 
+    @validates("type")
+    def _store_type_name(self, key, value):
+        return value.value if isinstance(value, PricingRuleType) else value
+
 class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True, index=True)
     cart_id = Column(String, index=True, nullable=False)
-    total_amount = Column(Float, nullable=False)
+    total_amount = Column(Money, nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    rolled_up = Column(Boolean, nullable=False, default=False, server_default=false()) # Counted in the sales rollups
     
     items = relationship("OrderItem", back_populates="order")
 
+    __table_args__ = (
+        # The rollup refresh only ever looks for orders it has not counted
+        Index(
+            "ix_orders_pending_rollup", "id",
+            postgresql_where=text("rolled_up = false"),
+            sqlite_where=text("rolled_up = 0")
+        ),
+    )
+
 class OrderItem(Base):
     __tablename__ = "order_items"
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
-    variant_id = Column(Integer, ForeignKey("product_variants.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), index=True)
     quantity = Column(Integer, nullable=False)
-    unit_price = Column(Float, nullable=False) # Snapshot price at time of purchase
+    unit_price = Column(Money, nullable=False) # Snapshot price at time of purchase
     
     order = relationship("Order", back_populates="items")
     variant = relationship("ProductVariant")
@@ -121,3 +188,56 @@ class Promotion(Base):
     is_active = Column(Boolean, default=True)
 
     category = relationship("Category")
+
+    __table_args__ = (
+        Index(
+            "ix_promotions_active_window", "end_date", "start_date", "target_category_id",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1")
+        ),
+    )
+
+# Sales rollups, folded in from order_items by AnalyticsService.refresh_rollups
+class VariantSalesDaily(Base):
+    __tablename__ = "variant_sales_daily"
+    day = Column(Date, primary_key=True)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), primary_key=True)
+    quantity_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(RevenueTotal, nullable=False, default=0)
+
+class CategorySalesDaily(Base):
+    __tablename__ = "category_sales_daily"
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    quantity_sold = Column(Integer, nullable=False, default=0)
+    revenue = Column(RevenueTotal, nullable=False, default=0)
+
+# One row per rollup; its row lock serializes refreshes and rebuilds
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+    name = Column(String, primary_key=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow) # Last refresh or rebuild
+
+# Append-only ledger of stock adjustments; rows are never updated or deleted
+class StockMovement(Base):
+    __tablename__ = "stock_movements"
+    id = Column(Integer, primary_key=True)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"), nullable=False)
+    quantity_change = Column(Integer, nullable=False)
+    stock_after = Column(Integer, nullable=False)
+    reason = Column(String, nullable=True)
+    idempotency_key = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_stock_movements_variant_created", "variant_id", "created_at"),
+    )
+
+# Responses of idempotent requests, replayed when a key is retried
+class IdempotencyRecord(Base):
+    __tablename__ = "idempotency_records"
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False, index=True)
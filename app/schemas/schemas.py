@@ -1,8 +1,13 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, PlainSerializer
+from typing import List, Literal, Optional
+from typing_extensions import Annotated
+from decimal import Decimal
 import datetime
 from app.models.models import ProductStatus
 
+# Exact to the cent on input; still a JSON number on output
+Money = Annotated[Decimal, Field(max_digits=12, decimal_places=2), PlainSerializer(float, return_type=float, when_used="json")]
+
 class CategoryBase(BaseModel):
     name: str
     parent_id: Optional[int] = None
@@ -15,10 +20,13 @@ class Category(CategoryBase):
     class Config:
         from_attributes = True
 
+class CategoryTreeNode(Category):
+    children: List["CategoryTreeNode"] = []
+
 class VariantBase(BaseModel):
     sku: str
     sku_name: str
-    price_adjustment: float = 0.0
+    price_adjustment: Money = Decimal("0")
     stock_quantity: int = 0
 
 class VariantCreate(VariantBase):
@@ -27,35 +35,108 @@ class VariantCreate(VariantBase):
 class Variant(VariantBase):
     id: int
     product_id: int
+    reserved_quantity: int = 0
     class Config:
         from_attributes = True
 
 class ProductBase(BaseModel):
     name: str
     description: Optional[str] = None
-    base_price: float
+    base_price: Money
     status: ProductStatus = ProductStatus.ACTIVE
     category_id: int
 
 class ProductCreate(ProductBase):
-    pass
+    handle: Optional[str] = None # Generated from the name when omitted
 
 class Product(ProductBase):
     id: int
+    handle: str
     variants: List[Variant] = []
     class Config:
         from_attributes = True
 
+class CatalogRow(BaseModel):
+    """One variant of the catalog feed, with its product's fields."""
+    product_handle: str = Field(min_length=1)
+    name: str = Field(min_length=1)
+    description: Optional[str] = None
+    base_price: Money = Field(ge=0)
+    status: ProductStatus = ProductStatus.ACTIVE
+    category_id: int
+    sku: str = Field(min_length=1)
+    sku_name: str
+    price_adjustment: Money = Decimal("0")
+    stock_quantity: int = Field(0, ge=0)
+
+class CatalogRowError(BaseModel):
+    line: int
+    sku: Optional[str] = None
+    errors: List[str]
+
+class CatalogImportResult(BaseModel):
+    rows: int
+    created: int
+    updated: int
+    error_count: int
+    errors: List[CatalogRowError] # The first CATALOG_IMPORT_MAX_ERRORS
+
+class StockAdjustment(BaseModel):
+    sku: str
+    mode: Literal["delta", "absolute"] = "delta"
+    quantity: int # Change for "delta", new stock level for "absolute"
+
+class BulkStockAdjustmentRequest(BaseModel):
+    adjustments: List[StockAdjustment] = Field(min_length=1)
+    reason: Optional[str] = None
+
+class StockLevel(BaseModel):
+    sku: str
+    variant_id: int
+    stock_quantity: int
+    available_quantity: int
+
+class StockAdjustmentError(BaseModel):
+    sku: str
+    error: str
+
+class BulkStockAdjustmentResult(BaseModel):
+    applied: List[StockLevel]
+    errors: List[StockAdjustmentError]
+    replayed: bool = False # True when served from an earlier request with the same Idempotency-Key
+
 class PriceBreakdown(BaseModel):
     rule_name: str
-    discount_amount: float
+    discount_amount: Money
     description: str
 
 class PriceCalculationResult(BaseModel):
-    base_price: float
-    final_price: float
+    base_price: Money
+    final_price: Money
     applied_rules: List[PriceBreakdown]
 
+class BatchPriceItem(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    quantity: int = Field(1, ge=1)
+    user_tier: Optional[str] = None
+
+class BatchPriceRequest(BaseModel):
+    items: List[BatchPriceItem] = Field(..., max_length=10000)
+    include_breakdown: bool = False
+
+class BatchPriceQuote(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    quantity: int
+    user_tier: Optional[str] = None
+    base_price: Money
+    final_price: Money
+    applied_rules: Optional[List[PriceBreakdown]] = None
+
+class BatchPriceResponse(BaseModel):
+    quotes: List[BatchPriceQuote]
+
 class CartItemAdd(BaseModel):
     variant_id: int
     quantity: int
@@ -66,9 +147,30 @@ class CartItemAdd(BaseModel):
 class CheckoutRequest(BaseModel):
     cart_id: str
 
+class CartLine(BaseModel):
+    variant_id: int
+    product_id: int
+    sku: str
+    sku_name: str
+    product_name: str
+    quantity: int
+    available: int # Further units that can still be reserved
+    unit_price: Money # Before discounts
+    subtotal: Money
+    total: Money # What checkout would charge for the line now
+    expires_at: datetime.datetime # When the line's first hold lapses
+
+class Cart(BaseModel):
+    cart_id: str
+    lines: List[CartLine]
+    item_count: int
+    subtotal: Money
+    discount: Money
+    total: Money
+
 class PricingRuleBase(BaseModel):
     name: str
-    type: str  # BULK, USER_TIER, SEASONAL
+    type: str  # BULK, USER_TIER, SEASONAL, BOGO, TIERED_BULK, BUY_X_GET_Y or a plugin type
     priority: int = 0
     parameters: dict
     is_active: bool = True
@@ -84,14 +186,14 @@ class PricingRule(PricingRuleBase):
 class OrderItem(BaseModel):
     variant_id: int
     quantity: int
-    unit_price: float
+    unit_price: Money
     class Config:
         from_attributes = True
 
 class Order(BaseModel):
     id: int
     cart_id: str
-    total_amount: float
+    total_amount: Money
     created_at: datetime.datetime
     items: List[OrderItem]
     class Config:
@@ -0,0 +1,172 @@
+from sqlalchemy import Date, delete, func, insert, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.db.database import dialect_insert
+from app.models.models import (
+    Category, CategorySalesDaily, Order, OrderItem, Product, ProductVariant, RollupWatermark, VariantSalesDaily
+)
+import datetime
+
+SALES_ROLLUP = "sales"
+
+_DAY = type_coerce(func.date(Order.created_at), Date)
+_TOTALS = (
+    func.sum(OrderItem.quantity).label("quantity"),
+    func.sum(OrderItem.quantity * OrderItem.unit_price).label("revenue"),
+    func.count(OrderItem.id).label("items"),
+)
+
+def _in_range(day_column, start_date: Optional[datetime.date], end_date: Optional[datetime.date]):
+    criteria = []
+    if start_date:
+        criteria.append(day_column >= start_date)
+    if end_date:
+        criteria.append(day_column <= end_date)
+    return criteria
+
+class AnalyticsService:
+    @staticmethod
+    def _lock_watermark(db: Session) -> RollupWatermark:
+        db.execute(
+            dialect_insert(db)(RollupWatermark)
+            .values(name=SALES_ROLLUP)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        # The row lock serializes refreshes and rebuilds across workers
+        return db.query(RollupWatermark).filter(RollupWatermark.name == SALES_ROLLUP).with_for_update().one()
+
+    @staticmethod
+    def _upsert(db: Session, model, key: str, totals: Dict[Tuple[datetime.date, int], tuple]):
+        if not totals:
+            return
+        stmt = dialect_insert(db)(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", key],
+            set_={
+                "quantity_sold": model.quantity_sold + stmt.excluded.quantity_sold,
+                "revenue": model.revenue + stmt.excluded.revenue
+            }
+        )
+        db.execute(stmt, [
+            {"day": day, key: key_id, "quantity_sold": quantity, "revenue": revenue}
+            for (day, key_id), (quantity, revenue, _) in totals.items()
+        ])
+
+    @staticmethod
+    def refresh_rollups(db: Session, batch_size: Optional[int] = None) -> int:
+        """
+        Folds orders not yet counted into the daily rollups, one batch per
+        transaction so the totals and the orders' `rolled_up` flags always move
+        together. An order is picked up by whichever refresh first sees it
+        committed, however late its checkout commits. Returns the number of
+        order items rolled up.
+        """
+        batch_size = batch_size or settings.ANALYTICS_ROLLUP_BATCH_SIZE
+        processed = 0
+        while True:
+            watermark = AnalyticsService._lock_watermark(db)
+            # Read once: a subquery could see orders committed between the
+            # statements below and count or flag them without the other
+            order_ids = list(db.scalars(
+                select(Order.id).where(Order.rolled_up.is_(False)).order_by(Order.id).limit(batch_size)
+            ))
+            if not order_ids:
+                db.commit()
+                return processed
+
+            # Totals are summed in SQL on exact NUMERIC values, so no per-item
+            # Decimal arithmetic happens here
+            in_batch = (OrderItem.order_id.in_(order_ids),)
+            by_variant = {
+                (row.day, row.variant_id): (row.quantity, row.revenue, row.items)
+                for row in db.query(
+                    _DAY.label("day"), OrderItem.variant_id, *_TOTALS
+                ).join(Order, Order.id == OrderItem.order_id)
+                .filter(*in_batch).group_by(_DAY, OrderItem.variant_id)
+            }
+            by_category = {
+                (row.day, row.category_id): (row.quantity, row.revenue, row.items)
+                for row in db.query(
+                    _DAY.label("day"), Product.category_id, *_TOTALS
+                ).join(Order, Order.id == OrderItem.order_id)
+                .join(ProductVariant, ProductVariant.id == OrderItem.variant_id)
+                .join(Product, Product.id == ProductVariant.product_id)
+                .filter(*in_batch, Product.category_id.isnot(None)).group_by(_DAY, Product.category_id)
+            }
+
+            AnalyticsService._upsert(db, VariantSalesDaily, "variant_id", by_variant)
+            AnalyticsService._upsert(db, CategorySalesDaily, "category_id", by_category)
+            db.execute(
+                update(Order).where(Order.id.in_(order_ids)).values(rolled_up=True)
+                .execution_options(synchronize_session=False)
+            )
+            watermark.updated_at = datetime.datetime.utcnow()
+            db.commit()
+            processed += sum(items for _, _, items in by_variant.values())
+
+    @staticmethod
+    def rebuild_rollups(db: Session) -> int:
+        """
+        Recomputes both rollups from the whole order history in one transaction
+        (for backfills or after editing past orders). Returns the number of
+        order items rolled up.
+        """
+        watermark = AnalyticsService._lock_watermark(db)
+        # Flag first, then count the flagged orders: one that commits in
+        # between stays unflagged and is left to the next refresh
+        db.execute(update(Order).where(Order.rolled_up.is_(False)).values(rolled_up=True)
+                   .execution_options(synchronize_session=False))
+        rolled_up = Order.rolled_up.is_(True)
+
+        db.execute(delete(VariantSalesDaily))
+        db.execute(delete(CategorySalesDaily))
+
+        quantity, revenue, _ = _TOTALS
+        db.execute(insert(VariantSalesDaily).from_select(
+            ["day", "variant_id", "quantity_sold", "revenue"],
+            select(_DAY, OrderItem.variant_id, quantity, revenue)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(rolled_up)
+            .group_by(_DAY, OrderItem.variant_id)
+        ))
+        db.execute(insert(CategorySalesDaily).from_select(
+            ["day", "category_id", "quantity_sold", "revenue"],
+            select(_DAY, Product.category_id, quantity, revenue)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(ProductVariant, ProductVariant.id == OrderItem.variant_id)
+            .join(Product, Product.id == ProductVariant.product_id)
+            .where(rolled_up, Product.category_id.isnot(None))
+            .group_by(_DAY, Product.category_id)
+        ))
+
+        items = db.query(func.count(OrderItem.id)).join(Order, Order.id == OrderItem.order_id).filter(rolled_up).scalar()
+        watermark.updated_at = datetime.datetime.utcnow()
+        db.commit()
+        return items
+
+    @staticmethod
+    async def top_selling_async(db: AsyncSession, limit: int = 10, start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None):
+        total_sold = func.sum(VariantSalesDaily.quantity_sold)
+        result = await db.execute(
+            select(ProductVariant.sku, ProductVariant.sku_name, total_sold.label("total_sold"))
+            .join(VariantSalesDaily, VariantSalesDaily.variant_id == ProductVariant.id)
+            .where(*_in_range(VariantSalesDaily.day, start_date, end_date))
+            .group_by(ProductVariant.id)
+            .order_by(total_sold.desc())
+            .limit(limit)
+        )
+        return result.all()
+
+    @staticmethod
+    async def revenue_by_category_async(db: AsyncSession, start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None):
+        total_revenue = func.sum(CategorySalesDaily.revenue)
+        result = await db.execute(
+            select(Category.name, total_revenue.label("total_revenue"))
+            .join(CategorySalesDaily, CategorySalesDaily.category_id == Category.id)
+            .where(*_in_range(CategorySalesDaily.day, start_date, end_date))
+            .group_by(Category.id)
+            .order_by(total_revenue.desc())
+        )
+        return result.all()
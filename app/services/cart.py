@@ -0,0 +1,119 @@
+import datetime
+import time
+from typing import Any, Dict
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import InventoryReservation, Product, ProductVariant, ReservationStatus
+from app.services.cart_cache import CartAggregate, CartHold, get_cart_cache, to_epoch
+from app.services.inventory import InventoryService
+from app.services.money import from_cents, to_cents
+from app.services.pricing import PricingEngine, pricing_plan_cache
+from app.services.redis_inventory import get_reservation_backend
+
+
+class CartService:
+    @staticmethod
+    def _load(db: Session, cart_id: str) -> CartAggregate:
+        """Rebuilds a cart from its live reservations."""
+        backend = get_reservation_backend()
+        if backend:
+            backend.flush_write_behind(db, wait=True)
+
+        aggregate = CartAggregate(cart_id)
+        for row in db.query(
+            InventoryReservation.id, InventoryReservation.hold_token, InventoryReservation.variant_id,
+            InventoryReservation.quantity, InventoryReservation.expires_at
+        ).filter(
+            InventoryReservation.cart_id == cart_id,
+            InventoryReservation.status == ReservationStatus.PENDING,
+            InventoryReservation.expires_at > datetime.datetime.utcnow()
+        ).order_by(InventoryReservation.id):
+            aggregate.add_hold(row.variant_id, CartHold(
+                row.hold_token or f"db:{row.id}", row.quantity, to_epoch(row.expires_at)
+            ))
+        return aggregate
+
+    @staticmethod
+    def get_cart(db: Session, cart_id: str) -> Dict[str, Any]:
+        """
+        The cart's lines with live availability and quotes. Lines are priced
+        per hold, as checkout prices each reservation, and only repriced when
+        their holds, base price or the pricing plan have changed.
+        """
+        cache = get_cart_cache()
+        aggregate, generation = cache.get(cart_id) if cache else (None, 0)
+        dirty = aggregate is None
+        if aggregate is None:
+            aggregate = CartService._load(db, cart_id)
+        dirty |= aggregate.prune(time.time())
+
+        variants = {}
+        if aggregate.lines:
+            variants = {row.id: row for row in db.execute(
+                select(
+                    ProductVariant.id, ProductVariant.sku, ProductVariant.sku_name, ProductVariant.price_adjustment,
+                    ProductVariant.stock_quantity, ProductVariant.reserved_quantity,
+                    Product.id.label("product_id"), Product.name, Product.base_price, Product.category_id
+                ).join(Product, Product.id == ProductVariant.product_id)
+                .where(ProductVariant.id.in_(list(aggregate.lines)))
+            )}
+        available = {vid: row.stock_quantity - row.reserved_quantity for vid, row in variants.items()}
+        if get_reservation_backend() and variants:
+            available = InventoryService.get_available_quantities(db, list(variants))
+
+        plan = pricing_plan_cache.get(db)
+        engine = PricingEngine()
+        lines = []
+        subtotal_cents = total_cents = item_count = 0
+        for variant_id in sorted(aggregate.lines):
+            line = aggregate.lines[variant_id]
+            variant = variants.get(variant_id)
+            if variant is None:
+                # The variant was deleted along with its reservations
+                aggregate.drop_line(variant_id)
+                dirty = True
+                continue
+
+            unit_cents = to_cents(variant.base_price) + to_cents(variant.price_adjustment or 0)
+            quote_key = f"{plan.compiled_at.isoformat()}|{unit_cents}|{variant.category_id}|" + ",".join(
+                str(hold.quantity) for hold in line.holds
+            )
+            if line.quote_key != quote_key:
+                line.total_cents = sum(
+                    engine.calculate_final_cents(unit_cents, hold.quantity, plan, product_category_id=variant.category_id)
+                    * hold.quantity
+                    for hold in line.holds
+                )
+                line.quote_key = quote_key
+                dirty = True
+
+            quantity = line.quantity
+            lines.append({
+                "variant_id": variant_id,
+                "product_id": variant.product_id,
+                "sku": variant.sku,
+                "sku_name": variant.sku_name,
+                "product_name": variant.name,
+                "quantity": quantity,
+                "available": available.get(variant_id, 0),
+                "unit_price": from_cents(unit_cents),
+                "subtotal": from_cents(unit_cents * quantity),
+                "total": from_cents(line.total_cents),
+                "expires_at": datetime.datetime.utcfromtimestamp(min(hold.expires_at for hold in line.holds)),
+            })
+            item_count += quantity
+            subtotal_cents += unit_cents * quantity
+            total_cents += line.total_cents
+
+        if cache and dirty:
+            cache.put(aggregate, generation)
+        return {
+            "cart_id": cart_id,
+            "lines": lines,
+            "item_count": item_count,
+            "subtotal": from_cents(subtotal_cents),
+            "discount": from_cents(subtotal_cents - total_cents),
+            "total": from_cents(total_cents),
+        }
@@ -0,0 +1,215 @@
+"""
+Per-cart aggregate behind GET /cart/{cart_id}: each line's reservation holds
+and its last quote. InventoryService updates a cached aggregate in place on
+reserve, release and checkout, so reading a cart neither scans
+inventory_reservations nor reprices lines whose inputs have not changed.
+Holds carry their expiry and drop out on read once it passes, the same
+holds checkout would ignore, so the expiry cleanup has nothing to update.
+
+Carts that are not cached are rebuilt on their next read. Each cart has a
+generation that every write bumps; a rebuild or read-side refresh is only
+stored if the generation is unchanged, so it cannot overwrite a concurrent
+write. Entries live in Redis when CART_CACHE_REDIS_ENABLED is set. The
+per-process LRU (CART_CACHE_ENABLED) cannot see other workers' writes and
+is only for single-worker deployments; with neither, carts are rebuilt on
+every read.
+"""
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+import datetime
+import json
+import threading
+import time
+
+import redis
+
+from app.core.config import settings
+
+
+def to_epoch(value: datetime.datetime) -> float:
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+@dataclass
+class CartHold:
+    token: str
+    quantity: int
+    expires_at: float # Epoch seconds
+
+
+@dataclass
+class CartLine:
+    variant_id: int
+    holds: List[CartHold] = field(default_factory=list)
+    # Inputs the cached total was priced from; any change reprices the line
+    quote_key: Optional[str] = None
+    total_cents: int = 0
+
+    @property
+    def quantity(self) -> int:
+        return sum(hold.quantity for hold in self.holds)
+
+
+@dataclass
+class CartAggregate:
+    cart_id: str
+    lines: Dict[int, CartLine] = field(default_factory=dict)
+
+    def add_hold(self, variant_id: int, hold: CartHold):
+        """Adds `hold`, replacing any hold with its token, which a rebuild may already have picked up."""
+        line = self.lines.setdefault(variant_id, CartLine(variant_id))
+        line.holds = [existing for existing in line.holds if existing.token != hold.token] + [hold]
+
+    def drop_line(self, variant_id: int):
+        self.lines.pop(variant_id, None)
+
+    def prune(self, now: float) -> bool:
+        """Drops expired holds, and lines left without any. Returns whether anything changed."""
+        changed = False
+        for variant_id, line in list(self.lines.items()):
+            live = [hold for hold in line.holds if hold.expires_at > now]
+            if len(live) != len(line.holds):
+                changed = True
+                line.holds = live
+                if not live:
+                    del self.lines[variant_id]
+        return changed
+
+    def to_dict(self) -> dict:
+        return {"cart_id": self.cart_id, "lines": [asdict(line) for line in self.lines.values()]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CartAggregate":
+        aggregate = cls(data["cart_id"])
+        for line in data["lines"]:
+            holds = [CartHold(**hold) for hold in line["holds"]]
+            aggregate.lines[line["variant_id"]] = CartLine(**dict(line, holds=holds))
+        return aggregate
+
+
+class CartCache:
+    def __init__(self, maxsize: int, ttl_seconds: int, client: Optional[redis.Redis] = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.client = client
+        # cart_id -> [deadline, aggregate dict or None, generation]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(cart_id: str) -> Tuple[str, str]:
+        return f"cart:{cart_id}", f"cart:{cart_id}:generation"
+
+    def get(self, cart_id: str) -> Tuple[Optional[CartAggregate], int]:
+        """The cached aggregate, if any, and the generation to pass back to `put`."""
+        if self.client is not None:
+            raw, generation = self.client.mget(self._keys(cart_id))
+            aggregate = CartAggregate.from_dict(json.loads(raw)) if raw is not None else None
+            return aggregate, int(generation or 0)
+
+        with self._lock:
+            entry = self._entries.get(cart_id)
+            if entry is None:
+                return None, 0
+            self._entries.move_to_end(cart_id)
+            if entry[1] is None or entry[0] <= time.monotonic():
+                return None, entry[2]
+            return CartAggregate.from_dict(entry[1]), entry[2]
+
+    def put(self, aggregate: CartAggregate, generation: int) -> bool:
+        """Stores `aggregate` unless the cart was written since `get` returned `generation`."""
+        if self.client is not None:
+            key, generation_key = self._keys(aggregate.cart_id)
+            payload = json.dumps(aggregate.to_dict())
+
+            def store(pipe):
+                if int(pipe.get(generation_key) or 0) != generation:
+                    return False
+                pipe.multi()
+                pipe.set(key, payload, ex=self.ttl_seconds)
+                return True
+            return self.client.transaction(store, generation_key, value_from_callable=True)
+
+        with self._lock:
+            entry = self._entries.get(aggregate.cart_id)
+            if (entry[2] if entry else 0) != generation:
+                return False
+            self._entries[aggregate.cart_id] = [time.monotonic() + self.ttl_seconds, aggregate.to_dict(), generation]
+            self._entries.move_to_end(aggregate.cart_id)
+            self._evict()
+            return True
+
+    def bump(self, cart_id: str):
+        """
+        Marks a write to the cart as under way. Writers call it before they
+        commit, so a rebuild that read the database before the commit is not
+        stored over the update that follows it.
+        """
+        self.update(cart_id, lambda cart: None)
+
+    def update(self, cart_id: str, change: Callable[[CartAggregate], None]):
+        """Applies `change` to the cached aggregate, if there is one, and bumps the generation."""
+        if self.client is not None:
+            key, generation_key = self._keys(cart_id)
+
+            def apply(pipe):
+                raw = pipe.get(key)
+                pipe.multi()
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, self.ttl_seconds)
+                if raw is not None:
+                    aggregate = CartAggregate.from_dict(json.loads(raw))
+                    change(aggregate)
+                    pipe.set(key, json.dumps(aggregate.to_dict()), keepttl=True)
+            self.client.transaction(apply, key)
+            return
+
+        with self._lock:
+            entry = self._entries.setdefault(cart_id, [0.0, None, 0])
+            entry[2] += 1
+            if entry[1] is not None and entry[0] > time.monotonic():
+                aggregate = CartAggregate.from_dict(entry[1])
+                change(aggregate)
+                entry[1] = aggregate.to_dict()
+            self._entries.move_to_end(cart_id)
+            self._evict()
+
+    def invalidate(self, cart_id: str):
+        if self.client is not None:
+            key, generation_key = self._keys(cart_id)
+            pipe = self.client.pipeline()
+            pipe.delete(key)
+            pipe.incr(generation_key)
+            pipe.expire(generation_key, self.ttl_seconds)
+            pipe.execute()
+            return
+
+        with self._lock:
+            entry = self._entries.setdefault(cart_id, [0.0, None, 0])
+            entry[1] = None
+            entry[2] += 1
+            self._entries.move_to_end(cart_id)
+            self._evict()
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cart_cache: Optional[CartCache] = None
+
+
+def get_cart_cache() -> Optional[CartCache]:
+    """Returns the process-wide cache when either cart cache tier is enabled, else None."""
+    global _cart_cache
+    if not (settings.CART_CACHE_ENABLED or settings.CART_CACHE_REDIS_ENABLED):
+        return None
+    if _cart_cache is None:
+        client = redis.Redis.from_url(settings.REDIS_URL) if settings.CART_CACHE_REDIS_ENABLED else None
+        _cart_cache = CartCache(settings.CART_CACHE_MAXSIZE, settings.CART_CACHE_TTL_SECONDS, client)
+    return _cart_cache
@@ -0,0 +1,291 @@
+"""
+Bulk catalog import and export. A catalog feed has one row per variant,
+carrying its product's fields; products are keyed by `product_handle` and
+variants by `sku`, so re-importing a feed updates rather than duplicates.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+from sqlalchemy import cast, column, insert, select, table
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import dialect_insert
+from app.models.models import Category, Product, ProductVariant, StockMovement, product_search_document
+from app.schemas.schemas import CatalogRow
+from app.services.inventory import InventoryService
+from app.services.redis_inventory import get_reservation_backend
+from app.services.response_cache import invalidate_responses
+from app.services.search import in_memory_search
+
+FORMATS = ("ndjson", "csv")
+COLUMNS = list(CatalogRow.model_fields)
+PRODUCT_COLUMNS = ["handle", "name", "description", "base_price", "status", "category_id"]
+VARIANT_COLUMNS = ["product_handle", "sku", "sku_name", "price_adjustment", "stock_quantity"]
+
+# Session-local staging tables for COPY; rows vanish at each chunk's commit
+_PRODUCTS_STAGE = table("catalog_products_stage", *(column(name) for name in PRODUCT_COLUMNS))
+_VARIANTS_STAGE = table("catalog_variants_stage", *(column(name) for name in VARIANT_COLUMNS))
+_STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS catalog_products_stage (
+    handle text, name text, description text, base_price numeric(12, 2), status text, category_id integer
+) ON COMMIT DELETE ROWS;
+CREATE TEMP TABLE IF NOT EXISTS catalog_variants_stage (
+    product_handle text, sku text, sku_name text, price_adjustment numeric(12, 2), stock_quantity integer
+) ON COMMIT DELETE ROWS;
+"""
+
+RawRow = Tuple[int, Union[dict, str]]
+
+STOCK_MOVEMENT_REASON = "catalog_import"
+
+
+@dataclass
+class CatalogImportReport:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    error_count: int = 0
+    errors: List[dict] = field(default_factory=list)
+
+    def add_error(self, line: int, sku: Optional[str], errors: List[str]):
+        self.error_count += 1
+        if len(self.errors) < settings.CATALOG_IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "sku": sku, "errors": errors})
+
+
+def read_rows(stream: TextIO, fmt: str) -> Iterator[RawRow]:
+    """
+    Yields (line number, raw row) pairs, or (line number, message) for lines
+    that cannot be parsed at all. Empty CSV cells count as missing.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for raw in reader:
+            yield reader.line_num, {key: value for key, value in raw.items() if key and value != ""}
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            raw = json.loads(text)
+        except ValueError as exc:
+            yield line, f"Invalid JSON: {exc}"
+            continue
+        yield line, raw if isinstance(raw, dict) else "Expected a JSON object"
+
+
+def _copy(db: Session, stage, columns: List[str], rows: Iterable[tuple]):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {stage.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+class CatalogService:
+    @staticmethod
+    def _upsert_postgres(db: Session, products: Dict[str, CatalogRow], variants: Dict[str, CatalogRow]):
+        """COPY into the staging tables, then upsert from them set-wise."""
+        db.connection().exec_driver_sql(_STAGE_DDL)
+        _copy(db, _PRODUCTS_STAGE, PRODUCT_COLUMNS, (
+            (handle, row.name, row.description, row.base_price, row.status.value, row.category_id)
+            for handle, row in products.items()
+        ))
+        _copy(db, _VARIANTS_STAGE, VARIANT_COLUMNS, (
+            (row.product_handle, sku, row.sku_name, row.price_adjustment, row.stock_quantity)
+            for sku, row in variants.items()
+        ))
+
+        stage = _PRODUCTS_STAGE.c
+        stmt = postgresql.insert(Product).from_select(
+            PRODUCT_COLUMNS + ["search_vector"],
+            select(
+                stage.handle, stage.name, stage.description, stage.base_price,
+                cast(stage.status, Product.status.type), stage.category_id,
+                product_search_document(stage.name, stage.description)
+            )
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["handle"],
+            set_={name: stmt.excluded[name] for name in PRODUCT_COLUMNS[1:] + ["search_vector"]}
+        ))
+
+        stage = _VARIANTS_STAGE.c
+        stmt = postgresql.insert(ProductVariant).from_select(
+            ["product_id", "sku", "sku_name", "price_adjustment", "stock_quantity"],
+            select(Product.id, stage.sku, stage.sku_name, stage.price_adjustment, stage.stock_quantity)
+            .select_from(_VARIANTS_STAGE).join(Product, Product.handle == stage.product_handle)
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["sku"],
+            set_={name: stmt.excluded[name] for name in ["product_id", "sku_name", "price_adjustment", "stock_quantity"]}
+        ))
+
+    @staticmethod
+    def _upsert_generic(db: Session, products: Dict[str, CatalogRow], variants: Dict[str, CatalogRow]):
+        """Multi-row upserts for databases without COPY (SQLite)."""
+        upsert = dialect_insert(db)
+        stmt = upsert(Product)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["handle"],
+            set_={name: stmt.excluded[name] for name in PRODUCT_COLUMNS[1:]}
+        ), [
+            {"handle": handle, "name": row.name, "description": row.description, "base_price": row.base_price,
+             "status": row.status, "category_id": row.category_id}
+            for handle, row in products.items()
+        ])
+        product_ids = dict(db.execute(
+            select(Product.handle, Product.id).where(Product.handle.in_(list(products)))
+        ).all())
+
+        stmt = upsert(ProductVariant)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["sku"],
+            set_={name: stmt.excluded[name] for name in ["product_id", "sku_name", "price_adjustment", "stock_quantity"]}
+        ), [
+            {"product_id": product_ids[row.product_handle], "sku": sku, "sku_name": row.sku_name,
+             "price_adjustment": row.price_adjustment, "stock_quantity": row.stock_quantity, "reserved_quantity": 0}
+            for sku, row in variants.items()
+        ])
+
+    @staticmethod
+    def _import_chunk(db: Session, chunk: List[Tuple[int, CatalogRow]], report: CatalogImportReport):
+        # Later rows win, within a chunk as across chunks
+        products = {row.product_handle: row for _, row in chunk}
+        variants = {row.sku: row for _, row in chunk}
+        # Locked so the ledger's stock_after matches what the upsert overwrote
+        existing = {
+            row.sku: row.stock_quantity for row in db.execute(
+                select(ProductVariant.sku, ProductVariant.stock_quantity)
+                .where(ProductVariant.sku.in_(list(variants))).order_by(ProductVariant.id).with_for_update()
+            )
+        }
+        changes = {
+            sku: row.stock_quantity - existing.get(sku, 0) for sku, row in variants.items()
+            if row.stock_quantity != existing.get(sku, 0)
+        }
+
+        try:
+            if db.get_bind().dialect.name == "postgresql":
+                CatalogService._upsert_postgres(db, products, variants)
+            else:
+                CatalogService._upsert_generic(db, products, variants)
+            if changes:
+                variant_ids = dict(db.execute(
+                    select(ProductVariant.sku, ProductVariant.id).where(ProductVariant.sku.in_(list(changes)))
+                ).all())
+                db.execute(insert(StockMovement), [
+                    {"variant_id": variant_ids[sku], "quantity_change": change,
+                     "stock_after": variants[sku].stock_quantity, "reason": STOCK_MOVEMENT_REASON}
+                    for sku, change in changes.items()
+                ])
+            db.commit()
+        except (SQLAlchemyError, db.get_bind().dialect.loaded_dbapi.Error) as exc:
+            # COPY runs on the raw DBAPI cursor, so its errors arrive unwrapped
+            db.rollback()
+            for line, row in chunk:
+                report.add_error(line, row.sku, [f"Chunk rejected by the database: {exc.__class__.__name__}"])
+            return
+
+        report.created += len(variants) - len(existing)
+        report.updated += len(existing)
+        if existing and get_reservation_backend():
+            InventoryService.sync_stock(db, list(db.scalars(
+                select(ProductVariant.id).where(ProductVariant.sku.in_(list(existing)))
+            )))
+
+    @staticmethod
+    def import_rows(db: Session, rows: Iterable[RawRow], chunk_size: Optional[int] = None) -> CatalogImportReport:
+        """
+        Validates rows and upserts them one chunk per transaction, so memory
+        stays bounded and a bad chunk does not undo earlier ones. Invalid rows
+        are reported by line number and skipped.
+        """
+        chunk_size = chunk_size or settings.CATALOG_IMPORT_CHUNK_SIZE
+        category_ids = set(db.scalars(select(Category.id)))
+        report = CatalogImportReport()
+        chunk: List[Tuple[int, CatalogRow]] = []
+
+        for line, raw in rows:
+            report.rows += 1
+            if isinstance(raw, str):
+                report.add_error(line, None, [raw])
+                continue
+            try:
+                row = CatalogRow.model_validate(raw)
+            except ValidationError as exc:
+                report.add_error(line, raw.get("sku"), [
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+                ])
+                continue
+            if row.category_id not in category_ids:
+                report.add_error(line, row.sku, [f"category_id: Category {row.category_id} does not exist"])
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= chunk_size:
+                CatalogService._import_chunk(db, chunk, report)
+                chunk = []
+        if chunk:
+            CatalogService._import_chunk(db, chunk, report)
+
+        in_memory_search.invalidate()
+        invalidate_responses("products")
+        return report
+
+    @staticmethod
+    def import_stream(db: Session, stream: TextIO, fmt: str, chunk_size: Optional[int] = None) -> CatalogImportReport:
+        return CatalogService.import_rows(db, read_rows(stream, fmt), chunk_size)
+
+    @staticmethod
+    def export_rows(db: Session, fmt: str, batch_size: Optional[int] = None) -> Iterator[str]:
+        """
+        Streams the catalog in variant id order, reading one keyset page at a
+        time. Products without variants have no rows in the feed.
+        """
+        batch_size = batch_size or settings.CATALOG_EXPORT_BATCH_SIZE
+        query = select(
+            ProductVariant.id,
+            Product.handle.label("product_handle"), Product.name, Product.description, Product.base_price,
+            Product.status, Product.category_id, ProductVariant.sku, ProductVariant.sku_name,
+            ProductVariant.price_adjustment, ProductVariant.stock_quantity
+        ).join(Product, Product.id == ProductVariant.product_id).order_by(ProductVariant.id).limit(batch_size)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(COLUMNS)
+            yield buffer.getvalue()
+
+        last_id = 0
+        while True:
+            rows = db.execute(query.where(ProductVariant.id > last_id)).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            buffer = io.StringIO()
+            if fmt == "csv":
+                writer = csv.writer(buffer, lineterminator="\n")
+                for row in rows:
+                    writer.writerow(_export_values(row))
+            else:
+                for row in rows:
+                    buffer.write(json.dumps(dict(zip(COLUMNS, _export_values(row)))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+
+
+def _export_values(row) -> list:
+    return [
+        row.product_handle, row.name, row.description, float(row.base_price), row.status.value,
+        row.category_id, row.sku, row.sku_name, float(row.price_adjustment or 0), row.stock_quantity
+    ]
@@ -0,0 +1,134 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import threading
+import time
+
+from sqlalchemy import literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import Category
+
+@dataclass
+class CategoryTree:
+    """
+    In-memory copy of the category forest. `parents` gives ancestor walks in
+    O(depth); the nested-set interval (`left`, `right`) of each node gives
+    O(1) subtree membership tests.
+    """
+    names: Dict[int, str]
+    parents: Dict[int, Optional[int]]
+    children: Dict[Optional[int], List[int]]
+    left: Dict[int, int] = field(default_factory=dict)
+    right: Dict[int, int] = field(default_factory=dict)
+    preorder: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: List[Any]) -> "CategoryTree":
+        """Builds the tree from (id, name, parent_id) rows ordered parents first."""
+        tree = cls(names={}, parents={}, children={None: []})
+        for row in rows:
+            tree.names[row.id] = row.name
+            tree.parents[row.id] = row.parent_id
+            tree.children.setdefault(row.id, [])
+            tree.children.setdefault(row.parent_id, []).append(row.id)
+
+        # Number the nodes in depth-first order; a node's subtree is exactly
+        # the ids whose `left` falls inside its [left, right] interval.
+        counter = 0
+        stack = [(root, False) for root in reversed(tree.children[None])]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                tree.right[node] = counter - 1
+                continue
+            tree.left[node] = counter
+            tree.preorder.append(node)
+            counter += 1
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(tree.children[node]))
+        return tree
+
+    def __contains__(self, category_id: Optional[int]) -> bool:
+        return category_id in self.names
+
+    def ancestors(self, category_id: int) -> List[int]:
+        """The category itself followed by its ancestors up to the root."""
+        path = []
+        while category_id is not None and category_id in self.names:
+            path.append(category_id)
+            category_id = self.parents[category_id]
+        return path
+
+    def is_within(self, category_id: int, ancestor_id: int) -> bool:
+        if category_id not in self.left or ancestor_id not in self.left:
+            return False
+        return self.left[ancestor_id] <= self.left[category_id] <= self.right[ancestor_id]
+
+    def descendants(self, category_id: int) -> List[int]:
+        """The category and everything below it."""
+        if category_id not in self.left:
+            return []
+        return self.preorder[self.left[category_id]:self.right[category_id] + 1]
+
+    def as_nested(self, root_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Children of `root_id` (None for the whole forest) as nested dicts."""
+        def node(category_id: int) -> Dict[str, Any]:
+            return {
+                "id": category_id,
+                "name": self.names[category_id],
+                "parent_id": self.parents[category_id],
+                "children": [node(child) for child in self.children[category_id]]
+            }
+        return [node(child) for child in self.children.get(root_id, [])]
+
+def load_category_tree(db: Session) -> CategoryTree:
+    """
+    Reads the whole forest with one recursive CTE. Rows unreachable from a
+    root (dangling parents or cycles) are left out rather than looping.
+    """
+    tree = select(
+        Category.id, Category.name, Category.parent_id, literal(0).label("depth")
+    ).where(Category.parent_id.is_(None)).cte("category_tree", recursive=True)
+    tree = tree.union_all(
+        select(Category.id, Category.name, Category.parent_id, tree.c.depth + 1)
+        .join(tree, Category.parent_id == tree.c.id)
+    )
+    return CategoryTree.from_rows(db.execute(select(tree).order_by(tree.c.depth, tree.c.id)).all())
+
+class CategoryTreeCache:
+    """
+    Process-wide holder for the CategoryTree. The category endpoints call
+    `invalidate()` after writes; readers reload lazily. `invalidate()` only
+    reaches this process, so a tree is also reloaded once it is older than
+    `ttl_seconds`, which bounds how stale other workers can be.
+    """
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = settings.CATEGORY_TREE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._tree: Optional[CategoryTree] = None
+        self._valid_until = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> CategoryTree:
+        tree = self._tree
+        if tree is not None and time.monotonic() < self._valid_until:
+            return tree
+
+        with self._lock:
+            generation = self._generation
+        valid_until = time.monotonic() + self.ttl_seconds
+        tree = load_category_tree(db)
+
+        with self._lock:
+            if generation == self._generation:
+                self._tree = tree
+                self._valid_until = valid_until
+        return tree
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._tree = None
+
+category_tree_cache = CategoryTreeCache()
@@ -0,0 +1,55 @@
+"""
+Idempotency keys for retried writes. The key row is claimed inside the
+caller's transaction and committed together with the stored response, so a
+retry either sees the finished response or waits on the row lock of the
+request that is still running.
+"""
+from typing import Any, Optional
+import datetime
+import hashlib
+import json
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.db.database import dialect_insert
+from app.models.models import IdempotencyRecord
+
+
+class IdempotencyKeyReused(ValueError):
+    pass
+
+
+def request_hash(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def claim(db: Session, scope: str, key: str, payload_hash: str) -> Optional[dict]:
+    """
+    Claims `key` for this request. Returns the stored response if the key was
+    already used for the same payload, or None if the caller should proceed.
+    """
+    db.execute(
+        dialect_insert(db)(IdempotencyRecord)
+        .values(scope=scope, key=key, request_hash=payload_hash)
+        .on_conflict_do_nothing(index_elements=["scope", "key"])
+    )
+    record = db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.scope == scope, IdempotencyRecord.key == key
+    ).with_for_update().one()
+    if record.request_hash != payload_hash:
+        raise IdempotencyKeyReused("Idempotency-Key was already used with a different request body")
+    return record.response
+
+
+def store(db: Session, scope: str, key: str, response: dict):
+    db.query(IdempotencyRecord).filter(
+        IdempotencyRecord.scope == scope, IdempotencyRecord.key == key
+    ).update({"response": response}, synchronize_session=False)
+
+
+def purge(db: Session, older_than: datetime.timedelta) -> int:
+    cutoff = datetime.datetime.utcnow() - older_than
+    deleted = db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.created_at < cutoff)).rowcount
+    db.commit()
+    return deleted
@@ -1,33 +1,199 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.models import ProductVariant, InventoryReservation, ReservationStatus
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import case, func, insert, select, update
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from app.core.config import settings
+from app.core.metrics import timed
+from app.models.models import ProductVariant, InventoryReservation, ReservationStatus, StockMovement
+from app.services import idempotency
+from app.services.cart_cache import CartHold, get_cart_cache, to_epoch
+from app.services.money import from_cents, to_cents
+from app.services.redis_inventory import get_reservation_backend
+from app.services.response_cache import invalidate_responses
+from app.services.stock_alerts import get_stock_alert_publisher
 import datetime
+import time
+
+STOCK_ADJUSTMENT_SCOPE = "stock_adjustments"
+
+@dataclass
+class CleanupResult:
+    released: int = 0
+    batches: int = 0
+    duration_seconds: float = 0.0
+    variant_ids: List[int] = field(default_factory=list)
 
 class InventoryService:
+    @staticmethod
+    def _begin_cart_write(cart_id: str):
+        cache = get_cart_cache()
+        if cache:
+            cache.bump(cart_id)
+
+    @staticmethod
+    def _record_hold(cart_id: str, variant_id: int, token: str, quantity: int, expires_at: datetime.datetime):
+        cache = get_cart_cache()
+        if cache:
+            hold = CartHold(token, quantity, to_epoch(expires_at))
+            cache.update(cart_id, lambda cart: cart.add_hold(variant_id, hold))
+
     @staticmethod
     def get_available_quantity(db: Session, variant_id: int) -> int:
-        variant = db.query(ProductVariant).filter(ProductVariant.id == variant_id).first()
-        if not variant:
+        backend = get_reservation_backend()
+        if backend:
+            available = backend.available(variant_id)
+            if available is not None:
+                return available
+
+        row = db.query(ProductVariant.stock_quantity, ProductVariant.reserved_quantity)\
+            .filter(ProductVariant.id == variant_id).first()
+        if not row:
             return 0
-        
-        reserved_qty = db.query(func.sum(InventoryReservation.quantity))\
-            .filter(
-                InventoryReservation.variant_id == variant_id,
-                InventoryReservation.status == ReservationStatus.PENDING,
-                InventoryReservation.expires_at > datetime.datetime.utcnow()
-            ).scalar() or 0
-        
-        return variant.stock_quantity - reserved_qty
+        return row.stock_quantity - row.reserved_quantity
+
+    @staticmethod
+    def get_available_quantities(db: Session, variant_ids: List[int]) -> Dict[int, int]:
+        backend = get_reservation_backend()
+        available: Dict[int, int] = {}
+        if backend:
+            for variant_id in variant_ids:
+                value = backend.available(variant_id)
+                if value is not None:
+                    available[variant_id] = value
+        missing = [vid for vid in variant_ids if vid not in available]
+        if missing:
+            for row in db.query(ProductVariant.id, ProductVariant.stock_quantity, ProductVariant.reserved_quantity)\
+                    .filter(ProductVariant.id.in_(missing)):
+                available[row.id] = row.stock_quantity - row.reserved_quantity
+        return available
+
+    @staticmethod
+    def _publish_availability(db: Session, deltas: Dict[int, int]):
+        """
+        Emits low-stock threshold crossings for committed changes in available
+        quantity. Costs one extra read, and only when push mode is enabled.
+        """
+        publisher = get_stock_alert_publisher()
+        deltas = {vid: delta for vid, delta in deltas.items() if delta}
+        if not publisher or not deltas:
+            return
+        available = InventoryService.get_available_quantities(db, list(deltas))
+        publisher.publish({vid: (after - deltas[vid], after) for vid, after in available.items()})
+
+    @staticmethod
+    def _adjust_reserved(db: Session, deltas: Dict[int, int]):
+        """One UPDATE for any number of variants."""
+        deltas = {variant_id: delta for variant_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        if len(deltas) > 1:
+            # An UPDATE locks rows in scan order; taking the locks in id order
+            # first keeps concurrent adjusters from deadlocking
+            db.execute(
+                select(ProductVariant.id).where(ProductVariant.id.in_(deltas))
+                .order_by(ProductVariant.id).with_for_update()
+            )
+        db.execute(
+            update(ProductVariant)
+            .where(ProductVariant.id.in_(deltas))
+            .values(reserved_quantity=ProductVariant.reserved_quantity + case(deltas, value=ProductVariant.id, else_=0))
+            .execution_options(synchronize_session=False)
+        )
 
     @staticmethod
+    def _release(db: Session, *criteria) -> Dict[int, List[Tuple[str, int]]]:
+        """
+        Flips matching PENDING reservations to RELEASED and takes their quantity
+        off `reserved_quantity`. Returns the released (hold token, quantity)
+        pairs per variant.
+        """
+        released = db.execute(
+            update(InventoryReservation)
+            .where(InventoryReservation.status == ReservationStatus.PENDING, *criteria)
+            .values(status=ReservationStatus.RELEASED)
+            .returning(
+                InventoryReservation.id,
+                InventoryReservation.variant_id,
+                InventoryReservation.quantity,
+                InventoryReservation.hold_token
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        holds: Dict[int, List[Tuple[str, int]]] = {}
+        for res_id, variant_id, quantity, hold_token in released:
+            holds.setdefault(variant_id, []).append((hold_token or f"db:{res_id}", quantity))
+        InventoryService._adjust_reserved(db, {
+            vid: -sum(qty for _, qty in variant_holds) for vid, variant_holds in holds.items()
+        })
+        return holds
+
+    @staticmethod
+    def _release_holds(holds: Dict[int, List[Tuple[str, int]]], consume_stock: bool = False):
+        backend = get_reservation_backend()
+        if backend:
+            for variant_id, variant_holds in holds.items():
+                backend.release(variant_id, variant_holds, consume_stock=consume_stock)
+
+    @staticmethod
+    def release_reservations(db: Session, cart_id: str, variant_id: int) -> int:
+        backend = get_reservation_backend()
+        if backend:
+            backend.flush_write_behind(db, wait=True)
+
+        released = InventoryService._release(
+            db,
+            InventoryReservation.cart_id == cart_id,
+            InventoryReservation.variant_id == variant_id
+        )
+        InventoryService._begin_cart_write(cart_id)
+        db.commit()
+        InventoryService._release_holds(released)
+        cache = get_cart_cache()
+        if cache:
+            cache.update(cart_id, lambda cart: cart.drop_line(variant_id))
+        quantity = sum(qty for _, qty in released.get(variant_id, []))
+        InventoryService._publish_availability(db, {variant_id: quantity})
+        return quantity
+
+    @staticmethod
+    @timed("reserve_inventory")
     def reserve_inventory(db: Session, variant_id: int, cart_id: str, quantity: int, duration_minutes: int = 15):
+        backend = get_reservation_backend()
+        if backend:
+            InventoryService._begin_cart_write(cart_id)
+            hold = backend.reserve(db, variant_id, cart_id, quantity, duration_minutes)
+            InventoryService._record_hold(cart_id, variant_id, hold.hold_token, quantity, hold.expires_at)
+            InventoryService._publish_availability(db, {variant_id: -quantity})
+            return hold
+
         variant = db.query(ProductVariant).filter(ProductVariant.id == variant_id).with_for_update().first()
         
         if not variant:
             raise Exception("Variant not found")
             
-        available_qty = InventoryService.get_available_quantity(db, variant_id)
+        available_qty = variant.stock_quantity - variant.reserved_quantity
+        lazily_released = 0
         
+        if available_qty < quantity:
+            # Expired holds stay counted until the cleanup job runs; release
+            # this variant's now rather than refusing stock that is sellable.
+            # Cleanup and release lock reservation rows before the variant,
+            # so holds they have locked are skipped rather than waited on
+            # while this transaction holds the variant.
+            expired_ids = (
+                select(InventoryReservation.id)
+                .where(
+                    InventoryReservation.variant_id == variant_id,
+                    InventoryReservation.status == ReservationStatus.PENDING,
+                    InventoryReservation.expires_at <= datetime.datetime.utcnow()
+                )
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            released = InventoryService._release(db, InventoryReservation.id.in_(expired_ids))
+            lazily_released = sum(qty for _, qty in released.get(variant_id, []))
+            available_qty += lazily_released
+
         if available_qty < quantity:
             raise Exception("Not enough available inventory")
             
@@ -42,75 +208,278 @@ class InventoryService:
         )
         
         db.add(reservation)
+        InventoryService._adjust_reserved(db, {variant_id: quantity})
+        InventoryService._begin_cart_write(cart_id)
         db.commit()
         db.refresh(reservation)
+        InventoryService._record_hold(cart_id, variant_id, f"db:{reservation.id}", quantity, expires_at)
+        InventoryService._publish_availability(db, {variant_id: lazily_released - quantity})
         return reservation
 
     @staticmethod
+    @timed("complete_checkout")
     def complete_checkout(db: Session, cart_id: str):
-        from app.models.models import Order, OrderItem, PricingRule
-        from app.services.pricing import PricingEngine
+        from app.models.models import Order, OrderItem
+        from app.services.pricing import PricingEngine, pricing_plan_cache
         
+        backend = get_reservation_backend()
+        if backend:
+            backend.flush_write_behind(db, wait=True)
+
+        # Round trips stay constant in the cart size: one locked read each for
+        # reservations and variants, then set-based writes.
         reservations = db.query(InventoryReservation).filter(
             InventoryReservation.cart_id == cart_id,
             InventoryReservation.status == ReservationStatus.PENDING,
             InventoryReservation.expires_at > datetime.datetime.utcnow()
-        ).all()
+        ).order_by(InventoryReservation.id).with_for_update().all()
         
         if not reservations:
             raise Exception("No active reservations found for this cart")
+
+        # Locking variants in id order keeps concurrent checkouts from deadlocking
+        variant_ids = sorted({res.variant_id for res in reservations})
+        variants = {
+            variant.id: variant for variant in db.query(ProductVariant)
+            .options(joinedload(ProductVariant.product, innerjoin=True))
+            .filter(ProductVariant.id.in_(variant_ids))
+            .order_by(ProductVariant.id)
+            .with_for_update(of=ProductVariant)
+        }
             
-        total_amount = 0.0
-        order = Order(cart_id=cart_id, total_amount=0.0)
-        db.add(order)
-        db.flush() 
-        
         engine = PricingEngine()
-        rules = db.query(PricingRule).filter(PricingRule.is_active == True).order_by(PricingRule.priority.desc()).all()
+        plan = pricing_plan_cache.get(db)
 
+        total_cents = 0
+        lines = []
+        completed_ids = []
+        consumed_qty: Dict[int, int] = {}
+        consumed: Dict[int, List[Tuple[str, int]]] = {}
         for res in reservations:
-            variant = db.query(ProductVariant).filter(ProductVariant.id == res.variant_id).with_for_update().first()
+            variant = variants.get(res.variant_id)
             if not variant:
                 continue
             
-            # Calculate final price using dynamic pricing engine
+            # Calculate final price using dynamic pricing engine; only the
+            # price is stored, so skip building the breakdown
             product = variant.product
-            context = {"quantity": res.quantity} 
-            price_result = engine.calculate_price(
-                product.base_price + variant.price_adjustment, 
-                context, 
-                rules, 
-                product_category_id=product.category_id, 
-                db=db
+            unit_cents = engine.calculate_final_cents(
+                to_cents(product.base_price) + to_cents(variant.price_adjustment or 0),
+                res.quantity,
+                plan,
+                product_category_id=product.category_id
             )
-            unit_price = price_result.final_price
-            
-            order_item = OrderItem(
-                order_id=order.id,
-                variant_id=res.variant_id,
-                quantity=res.quantity,
-                unit_price=unit_price
+            lines.append({"variant_id": res.variant_id, "quantity": res.quantity, "unit_price": from_cents(unit_cents)})
+            total_cents += unit_cents * res.quantity
+
+            completed_ids.append(res.id)
+            consumed_qty[res.variant_id] = consumed_qty.get(res.variant_id, 0) + res.quantity
+            consumed.setdefault(res.variant_id, []).append(
+                (res.hold_token or f"db:{res.id}", res.quantity)
+            )
+
+        order = Order(cart_id=cart_id, total_amount=from_cents(total_cents))
+        db.add(order)
+        db.flush()
+
+        if lines:
+            db.execute(insert(OrderItem), [dict(line, order_id=order.id) for line in lines])
+            db.execute(
+                update(InventoryReservation)
+                .where(InventoryReservation.id.in_(completed_ids))
+                .values(status=ReservationStatus.COMPLETED)
+                .execution_options(synchronize_session=False)
+            )
+            consumed_by_variant = case(consumed_qty, value=ProductVariant.id, else_=0)
+            db.execute(
+                update(ProductVariant)
+                .where(ProductVariant.id.in_(consumed_qty))
+                .values(
+                    stock_quantity=ProductVariant.stock_quantity - consumed_by_variant,
+                    reserved_quantity=ProductVariant.reserved_quantity - consumed_by_variant
+                )
+                .execution_options(synchronize_session=False)
             )
-            db.add(order_item)
-            
-            total_amount += unit_price * res.quantity
-            
-            variant.stock_quantity -= res.quantity
-            res.status = ReservationStatus.COMPLETED
             
-        order.total_amount = total_amount
+        # Redis stock is decremented while the variant rows are still locked,
+        # so reconciliation can never publish the pre-checkout stock level.
+        # Checkout takes the same quantity off stock and reserved, so available
+        # quantity is unchanged and no low-stock event is due here.
+        InventoryService._release_holds(consumed, consume_stock=True)
         db.commit()
+        cache = get_cart_cache()
+        if cache:
+            cache.invalidate(cart_id)
         return order
 
     @staticmethod
-    def cleanup_expired_reservations(db: Session):
-        expired = db.query(InventoryReservation).filter(
-            InventoryReservation.status == ReservationStatus.PENDING,
-            InventoryReservation.expires_at <= datetime.datetime.utcnow()
-        ).all()
-        
-        for res in expired:
-            res.status = ReservationStatus.RELEASED
-            
+    def cleanup_expired_reservations(db: Session, chunk_size: Optional[int] = None) -> CleanupResult:
+        """
+        Releases expired PENDING reservations in set-based chunks, committing
+        after each one. Rows locked by another worker are skipped, so several
+        workers can drain the same backlog.
+        """
+        chunk_size = chunk_size or settings.RESERVATION_CLEANUP_CHUNK_SIZE
+        started = time.perf_counter()
+        now = datetime.datetime.utcnow()
+        result = CleanupResult()
+        variant_ids = set()
+
+        while True:
+            expired_ids = (
+                select(InventoryReservation.id)
+                .where(
+                    InventoryReservation.status == ReservationStatus.PENDING,
+                    InventoryReservation.expires_at <= now
+                )
+                .limit(chunk_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            released = InventoryService._release(db, InventoryReservation.id.in_(expired_ids))
+            db.commit()
+            InventoryService._release_holds(released)
+            InventoryService._publish_availability(db, {
+                vid: sum(qty for _, qty in holds) for vid, holds in released.items()
+            })
+
+            count = sum(len(holds) for holds in released.values())
+            if not count:
+                break
+            result.released += count
+            result.batches += 1
+            variant_ids.update(released)
+            if count < chunk_size:
+                break
+
+        result.variant_ids = sorted(variant_ids)
+        result.duration_seconds = time.perf_counter() - started
+        return result
+
+    @staticmethod
+    def apply_stock_adjustments(
+        db: Session,
+        adjustments: List[Tuple[str, str, int]],
+        reason: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> dict:
+        """
+        Applies (sku, "delta" | "absolute", quantity) adjustments in one
+        transaction: one locked read, one set-based UPDATE and one ledger
+        insert regardless of batch size. Several adjustments to a SKU fold
+        into one in request order. Adjustments for unknown SKUs, or that would
+        take stock below zero, are reported and skipped.
+        """
+        backend = get_reservation_backend()
+        if backend:
+            # Brings reserved_quantity up to date for the available figures
+            backend.flush_write_behind(db, wait=True)
+
+        if idempotency_key:
+            try:
+                stored = idempotency.claim(
+                    db, STOCK_ADJUSTMENT_SCOPE, idempotency_key, idempotency.request_hash([adjustments, reason])
+                )
+            except idempotency.IdempotencyKeyReused:
+                db.rollback()
+                raise
+            if stored is not None:
+                db.rollback()
+                return dict(stored, replayed=True)
+
+        folded: Dict[str, Tuple[Optional[int], int]] = {}
+        for sku, mode, quantity in adjustments:
+            absolute, delta = folded.get(sku, (None, 0))
+            folded[sku] = (quantity, 0) if mode == "absolute" else (absolute, delta + quantity)
+
+        variants = {
+            row.sku: row for row in db.query(
+                ProductVariant.id, ProductVariant.sku, ProductVariant.stock_quantity, ProductVariant.reserved_quantity
+            ).filter(ProductVariant.sku.in_(list(folded))).order_by(ProductVariant.id).with_for_update()
+        }
+
+        applied, errors, new_stock, changes = [], [], {}, {}
+        for sku, (absolute, delta) in folded.items():
+            variant = variants.get(sku)
+            if variant is None:
+                errors.append({"sku": sku, "error": "Unknown SKU"})
+                continue
+            stock = (variant.stock_quantity if absolute is None else absolute) + delta
+            if stock < 0:
+                errors.append({"sku": sku, "error": f"Stock would go negative (currently {variant.stock_quantity})"})
+                continue
+            applied.append({
+                "sku": sku,
+                "variant_id": variant.id,
+                "stock_quantity": stock,
+                "available_quantity": stock - variant.reserved_quantity
+            })
+            if stock != variant.stock_quantity:
+                new_stock[variant.id] = stock
+                changes[variant.id] = stock - variant.stock_quantity
+
+        if new_stock:
+            db.execute(
+                update(ProductVariant)
+                .where(ProductVariant.id.in_(new_stock))
+                .values(stock_quantity=case(new_stock, value=ProductVariant.id))
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(insert(StockMovement), [
+                {"variant_id": variant_id, "quantity_change": changes[variant_id], "stock_after": stock,
+                 "reason": reason, "idempotency_key": idempotency_key}
+                for variant_id, stock in new_stock.items()
+            ])
+
+        result = {"applied": applied, "errors": errors}
+        if idempotency_key:
+            idempotency.store(db, STOCK_ADJUSTMENT_SCOPE, idempotency_key, result)
         db.commit()
-        return len(expired)
+
+        InventoryService.sync_stock(db, list(new_stock))
+        InventoryService._publish_availability(db, changes)
+        if new_stock:
+            invalidate_responses("products")
+        return dict(result, replayed=False)
+
+    @staticmethod
+    def sync_stock(db: Session, variant_ids: List[int]):
+        """Pushes stock changes made outside checkout to the reservation backend."""
+        backend = get_reservation_backend()
+        if backend:
+            for variant_id in variant_ids:
+                backend.reconcile_variant(db, variant_id)
+
+    @staticmethod
+    def reconcile_reserved_quantities(db: Session) -> List[dict]:
+        """
+        Compares each variant's `reserved_quantity` with the PENDING reservation
+        rows and repairs any drift. Returns the variants that were corrected.
+        """
+        pending = db.query(
+            InventoryReservation.variant_id,
+            func.sum(InventoryReservation.quantity).label("quantity")
+        ).filter(
+            InventoryReservation.status == ReservationStatus.PENDING
+        ).group_by(InventoryReservation.variant_id).subquery()
+
+        suspects = [
+            row.id for row in db.query(ProductVariant.id)
+            .outerjoin(pending, pending.c.variant_id == ProductVariant.id)
+            .filter(ProductVariant.reserved_quantity != func.coalesce(pending.c.quantity, 0))
+        ]
+
+        corrected = []
+        for variant_id in suspects:
+            # Re-check under the row lock so in-flight reservations aren't
+            # mistaken for drift.
+            variant = db.query(ProductVariant).filter(ProductVariant.id == variant_id).with_for_update().first()
+            actual = db.query(func.coalesce(func.sum(InventoryReservation.quantity), 0)).filter(
+                InventoryReservation.variant_id == variant_id,
+                InventoryReservation.status == ReservationStatus.PENDING
+            ).scalar()
+            if variant.reserved_quantity != actual:
+                corrected.append({"variant_id": variant_id, "recorded": variant.reserved_quantity, "actual": actual})
+                variant.reserved_quantity = actual
+            db.commit()
+        return corrected
@@ -1,122 +1,628 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, ClassVar, Optional, Tuple, Type
+from dataclasses import dataclass, field
+from decimal import Decimal
+from importlib.metadata import entry_points
+import datetime
+import inspect
+import logging
+import threading
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import timed
+from app.models.models import PricingRule, Promotion
+from app.services.categories import CategoryTree, category_tree_cache
+from app.services.money import (
+    MoneyLike, apply_rate, apply_rate_array, divide, from_cents, to_basis_points, to_cents
+)
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class PriceBreakdownItem:
     rule_name: str
-    discount_amount: float
+    discount_amount: Decimal
     description: str
 
 @dataclass
 class PricingResult:
-    base_price: float
-    final_price: float
+    base_price: Decimal
+    final_price: Decimal
     applied_rules: List[PriceBreakdownItem]
 
-class PricingRuleEvaluator(ABC):
+@dataclass
+class BatchPricingResult:
+    base_cents: np.ndarray
+    final_cents: np.ndarray
+    applied_rules: Optional[List[List[PriceBreakdownItem]]] = None
+
+class PricingRuleParameterError(ValueError):
+    pass
+
+def _percentage(params: Dict[str, Any], key: str = "discount_percentage") -> float:
+    value = params.get(key, 0.0)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1:
+        raise PricingRuleParameterError(f"'{key}' must be a number between 0 and 1")
+    return float(value)
+
+def _count(params: Dict[str, Any], key: str, default: Optional[int] = None, minimum: int = 0) -> int:
+    value = params.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise PricingRuleParameterError(f"'{key}' must be an integer >= {minimum}")
+    return value
+
+def _timestamp(params: Dict[str, Any], key: str) -> Optional[datetime.datetime]:
+    value = params.get(key)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise PricingRuleParameterError(f"'{key}' must be an ISO 8601 date or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
+class CompiledRule(ABC):
+    """
+    A pricing rule with validated parameters and precomputed labels. Prices are
+    integer cents. Subclasses implement `discount`, which returns None when the
+    rule does not apply, and may override `apply_batch` with array operations.
+    """
+    __slots__ = ("name", "rule_name", "description")
+    type_name: ClassVar[str]
+
+    def __init__(self, name: str, rule_name: str, description: str):
+        self.name = name
+        self.rule_name = rule_name
+        self.description = description
+
+    @classmethod
     @abstractmethod
-    def evaluate(self, current_price: float, context: Dict[str, Any], rule_params: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "CompiledRule":
         pass
 
-class BulkDiscountEvaluator(PricingRuleEvaluator):
-    def evaluate(self, current_price: float, context: Dict[str, Any], rule_params: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
-        min_quantity = rule_params.get("min_quantity", 0)
-        discount_percentage = rule_params.get("discount_percentage", 0.0)
-        
-        if context.get("quantity", 0) >= min_quantity:
-            discount = current_price * discount_percentage
-            return PriceBreakdownItem(
-                rule_name="Bulk Discount",
-                discount_amount=discount,
-                description=f"Applied {discount_percentage*100}% discount for {min_quantity}+ units"
-            )
-        return None
+    def window(self) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+        """Inclusive (start, end) dates outside which the rule is left out of the plan."""
+        return None, None
 
-class UserTierDiscountEvaluator(PricingRuleEvaluator):
-    def evaluate(self, current_price: float, context: Dict[str, Any], rule_params: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
-        target_tier = rule_params.get("user_tier")
-        discount_percentage = rule_params.get("discount_percentage", 0.0)
-        
-        if context.get("user_tier") == target_tier:
-            discount = current_price * discount_percentage
-            return PriceBreakdownItem(
-                rule_name=f"{target_tier} Tier Discount",
-                discount_amount=discount,
-                description=f"Applied {discount_percentage*100}% special discount for {target_tier} members"
-            )
+    @abstractmethod
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        pass
+
+    def apply(self, current_cents: int, context: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
+        discount = self.discount(current_cents, context.get("quantity", 0), context.get("user_tier"))
+        if discount is None:
+            return None
+        return PriceBreakdownItem(rule_name=self.rule_name, discount_amount=from_cents(discount), description=self.description)
+
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (applied_mask, discounts in cents) for a whole batch. The default
+        calls `discount` row by row; built-in rules override it with array ops.
+        """
+        applied = np.zeros(len(current_cents), dtype=bool)
+        discounts = np.zeros(len(current_cents), dtype=np.int64)
+        for i in range(len(current_cents)):
+            discount = self.discount(int(current_cents[i]), int(quantities[i]), user_tiers[i])
+            if discount is not None:
+                applied[i] = True
+                discounts[i] = discount
+        return applied, discounts
+
+RULE_TYPES: Dict[str, Type[CompiledRule]] = {}
+RULE_PLUGIN_GROUP = "ecommerce_pricing.rules"
+_plugins_loaded = False
+
+def register_rule_type(rule_type: Type[CompiledRule]) -> Type[CompiledRule]:
+    if inspect.isabstract(rule_type):
+        raise TypeError(f"Pricing rule type {rule_type.__name__} does not implement {sorted(rule_type.__abstractmethods__)}")
+    RULE_TYPES[rule_type.type_name] = rule_type
+    return rule_type
+
+def load_rule_plugins():
+    """
+    Registers rule types published by installed packages under the
+    `ecommerce_pricing.rules` entry point group. A plugin that fails to load
+    is logged and skipped.
+    """
+    global _plugins_loaded
+    _plugins_loaded = True
+    for entry_point in entry_points(group=RULE_PLUGIN_GROUP):
+        try:
+            register_rule_type(entry_point.load())
+        except Exception:
+            logger.exception("Failed to load pricing rule plugin %s", entry_point.name)
+
+def compile_rule_params(type_name: str, name: str, params: Optional[Dict[str, Any]]) -> CompiledRule:
+    if not _plugins_loaded:
+        load_rule_plugins()
+    rule_type = RULE_TYPES.get(type_name)
+    if rule_type is None:
+        raise PricingRuleParameterError(f"Unknown pricing rule type '{type_name}'")
+    if params is not None and not isinstance(params, dict):
+        raise PricingRuleParameterError("Rule parameters must be an object")
+    return rule_type.from_params(name, params or {})
+
+@register_rule_type
+class BulkDiscountRule(CompiledRule):
+    __slots__ = ("min_quantity", "basis_points")
+    type_name = "BULK"
+
+    def __init__(self, name: str, min_quantity: int, discount_percentage: float):
+        super().__init__(name, "Bulk Discount", f"Applied {discount_percentage*100}% discount for {min_quantity}+ units")
+        self.min_quantity = min_quantity
+        self.basis_points = to_basis_points(discount_percentage)
+
+    @classmethod
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "BulkDiscountRule":
+        return cls(name, _count(params, "min_quantity", default=0), _percentage(params))
+
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        if quantity >= self.min_quantity:
+            return apply_rate(current_cents, self.basis_points)
         return None
 
-class SeasonalDiscountEvaluator(PricingRuleEvaluator):
-    def evaluate(self, current_price: float, context: Dict[str, Any], rule_params: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
-        # Simple seasonal check for now, can be expanded with dates
-        discount_percentage = rule_params.get("discount_percentage", 0.0)
-        discount = current_price * discount_percentage
-        return PriceBreakdownItem(
-            rule_name="Seasonal Sale",
-            discount_amount=discount,
-            description=f"Applied {discount_percentage*100}% seasonal discount"
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        applied = quantities >= self.min_quantity
+        return applied, np.where(applied, apply_rate_array(current_cents, self.basis_points), 0)
+
+@register_rule_type
+class UserTierDiscountRule(CompiledRule):
+    __slots__ = ("user_tier", "basis_points")
+    type_name = "USER_TIER"
+
+    def __init__(self, name: str, user_tier: str, discount_percentage: float):
+        super().__init__(
+            name,
+            f"{user_tier} Tier Discount",
+            f"Applied {discount_percentage*100}% special discount for {user_tier} members"
         )
+        self.user_tier = user_tier
+        self.basis_points = to_basis_points(discount_percentage)
+
+    @classmethod
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "UserTierDiscountRule":
+        user_tier = params.get("user_tier")
+        if not isinstance(user_tier, str) or not user_tier:
+            raise PricingRuleParameterError("'user_tier' must be a non-empty string")
+        return cls(name, user_tier, _percentage(params))
+
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        if user_tier == self.user_tier:
+            return apply_rate(current_cents, self.basis_points)
+        return None
+
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        applied = np.asarray(user_tiers == self.user_tier, dtype=bool)
+        return applied, np.where(applied, apply_rate_array(current_cents, self.basis_points), 0)
+
+@register_rule_type
+class SeasonalDiscountRule(CompiledRule):
+    __slots__ = ("basis_points", "start_date", "end_date")
+    type_name = "SEASONAL"
+
+    def __init__(self, name: str, discount_percentage: float, start_date: Optional[datetime.datetime] = None, end_date: Optional[datetime.datetime] = None):
+        super().__init__(name, "Seasonal Sale", f"Applied {discount_percentage*100}% seasonal discount")
+        self.basis_points = to_basis_points(discount_percentage)
+        self.start_date = start_date
+        self.end_date = end_date
+
+    @classmethod
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "SeasonalDiscountRule":
+        start_date, end_date = _timestamp(params, "start_date"), _timestamp(params, "end_date")
+        if start_date and end_date and end_date < start_date:
+            raise PricingRuleParameterError("'end_date' must not be before 'start_date'")
+        return cls(name, _percentage(params), start_date, end_date)
 
-class BOGODiscountEvaluator(PricingRuleEvaluator):
-    def evaluate(self, current_price: float, context: Dict[str, Any], rule_params: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
-        quantity = context.get("quantity", 0)
+    def window(self) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+        return self.start_date, self.end_date
+
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        # The plan only contains the rule while its window is open
+        return apply_rate(current_cents, self.basis_points)
+
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return np.ones(len(current_cents), dtype=bool), apply_rate_array(current_cents, self.basis_points)
+
+@register_rule_type
+class BOGODiscountRule(CompiledRule):
+    __slots__ = ()
+    type_name = "BOGO"
+
+    def __init__(self, name: str):
+        super().__init__(name, "BOGO", "Buy One Get One Free applied")
+
+    @classmethod
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "BOGODiscountRule":
+        return cls(name)
+
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        # Simplified to a flat half-price per unit once two are bought
         if quantity >= 2:
-            # Buy X Get Y Free logic (simplified to BOGO 1+1)
-            # Discount is the price of one item divided by the total quantity to get average discount per unit
-            discount_per_unit = current_price / 2
-            return PriceBreakdownItem(
-                rule_name="BOGO",
-                discount_amount=discount_per_unit,
-                description="Buy One Get One Free applied"
-            )
+            return divide(current_cents, 1, 2)
         return None
 
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        applied = quantities >= 2
+        return applied, np.where(applied, (current_cents + 1) // 2, 0)
+
+@register_rule_type
+class TieredBulkDiscountRule(CompiledRule):
+    """Applies the deepest of several quantity tiers the order qualifies for."""
+    __slots__ = ("min_quantities", "basis_points", "descriptions")
+    type_name = "TIERED_BULK"
+
+    def __init__(self, name: str, tiers: List[Tuple[int, float]]):
+        super().__init__(name, "Tiered Bulk Discount", "")
+        self.min_quantities = np.array([min_quantity for min_quantity, _ in tiers], dtype=np.int64)
+        self.basis_points = np.array([to_basis_points(pct) for _, pct in tiers], dtype=np.int64)
+        self.descriptions = [f"Applied {pct*100}% discount for {min_quantity}+ units" for min_quantity, pct in tiers]
+
+    @classmethod
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "TieredBulkDiscountRule":
+        tiers = params.get("tiers")
+        if not isinstance(tiers, list) or not tiers or not all(isinstance(tier, dict) for tier in tiers):
+            raise PricingRuleParameterError("'tiers' must be a non-empty list of objects")
+        parsed = sorted((_count(tier, "min_quantity", minimum=1), _percentage(tier)) for tier in tiers)
+        if len({min_quantity for min_quantity, _ in parsed}) != len(parsed):
+            raise PricingRuleParameterError("Tier 'min_quantity' values must be unique")
+        return cls(name, parsed)
+
+    def _tier(self, quantity: int) -> int:
+        return int(np.searchsorted(self.min_quantities, quantity, side="right")) - 1
+
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        tier = self._tier(quantity)
+        if tier < 0:
+            return None
+        return apply_rate(current_cents, int(self.basis_points[tier]))
+
+    def apply(self, current_cents: int, context: Dict[str, Any]) -> Optional[PriceBreakdownItem]:
+        tier = self._tier(context.get("quantity", 0))
+        if tier < 0:
+            return None
+        return PriceBreakdownItem(
+            rule_name=self.rule_name,
+            discount_amount=from_cents(apply_rate(current_cents, int(self.basis_points[tier]))),
+            description=self.descriptions[tier]
+        )
+
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        tiers = np.searchsorted(self.min_quantities, quantities, side="right") - 1
+        applied = tiers >= 0
+        basis_points = self.basis_points[np.maximum(tiers, 0)]
+        return applied, np.where(applied, apply_rate_array(current_cents, basis_points), 0)
+
+@register_rule_type
+class BuyXGetYRule(CompiledRule):
+    """Every `buy + get` units, `get` are free; the saving is spread per unit."""
+    __slots__ = ("buy", "get")
+    type_name = "BUY_X_GET_Y"
+
+    def __init__(self, name: str, buy: int, get: int):
+        super().__init__(name, f"Buy {buy} Get {get}", f"Buy {buy} get {get} free applied")
+        self.buy = buy
+        self.get = get
+
+    @classmethod
+    def from_params(cls, name: str, params: Dict[str, Any]) -> "BuyXGetYRule":
+        return cls(name, _count(params, "buy", minimum=1), _count(params, "get", minimum=1))
+
+    def discount(self, current_cents: int, quantity: int, user_tier: Optional[str]) -> Optional[int]:
+        free = quantity // (self.buy + self.get) * self.get
+        if not free:
+            return None
+        return divide(current_cents, free, quantity)
+
+    def apply_batch(self, current_cents: np.ndarray, quantities: np.ndarray, user_tiers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        free = quantities // (self.buy + self.get) * self.get
+        applied = free > 0
+        denominator = 2 * np.maximum(quantities, 1)
+        return applied, np.where(applied, (2 * current_cents * free + denominator // 2) // denominator, 0)
+
+@dataclass
+class CompiledPromotion:
+    id: int
+    name: str
+    basis_points: int
+    target_category_id: Optional[int]
+    rule_name: str
+    description: str
+
+    def discount(self, current_cents: int) -> int:
+        return apply_rate(current_cents, self.basis_points)
+
+    def apply(self, current_cents: int) -> PriceBreakdownItem:
+        return PriceBreakdownItem(
+            rule_name=self.rule_name,
+            discount_amount=from_cents(self.discount(current_cents)),
+            description=self.description
+        )
+
+@dataclass
+class PricingPlan:
+    """
+    Immutable snapshot of the active rules and promotions, compiled once and
+    shared between requests until it is invalidated or `valid_until` passes.
+    """
+    rules: List[CompiledRule]
+    promotions_by_category: Dict[Optional[int], List[CompiledPromotion]]
+    compiled_at: datetime.datetime
+    valid_until: datetime.datetime
+    category_tree: Optional[CategoryTree] = None
+    _promotions_cache: Dict[Optional[int], List[CompiledPromotion]] = field(default_factory=dict, repr=False)
+
+    def promotions_for(self, category_id: Optional[int]) -> List[CompiledPromotion]:
+        """
+        Site-wide promotions plus those targeting the category or any of its
+        ancestors, found by walking up the tree (O(depth)) once per category.
+        """
+        promotions = self._promotions_cache.get(category_id)
+        if promotions is None:
+            if self.category_tree is not None and category_id in self.category_tree:
+                targets = self.category_tree.ancestors(category_id)
+            else:
+                targets = [category_id]
+            promotions = list(self.promotions_by_category.get(None, []))
+            for target in targets:
+                promotions.extend(self.promotions_by_category.get(target, []))
+            promotions.sort(key=lambda p: p.id)
+            self._promotions_cache[category_id] = promotions
+        return promotions
+
+    def is_fresh(self, now: datetime.datetime) -> bool:
+        return now < self.valid_until
+
 class PricingEngine:
-    def __init__(self):
-        self.evaluators = {
-            "BULK": BulkDiscountEvaluator(),
-            "USER_TIER": UserTierDiscountEvaluator(),
-            "SEASONAL": SeasonalDiscountEvaluator(),
-            "BOGO": BOGODiscountEvaluator()
-        }
-
-    def calculate_price(self, base_price: float, context: Dict[str, Any], rules: List[Any], product_category_id: Optional[int] = None, db: Optional[Any] = None) -> PricingResult:
-        current_price = base_price
+    def compile_rule(self, rule: Any) -> Optional[CompiledRule]:
+        """Compiles a rule row, skipping (and logging) unknown types or bad parameters."""
+        try:
+            return compile_rule_params(rule.type, rule.name, rule.parameters)
+        except PricingRuleParameterError as exc:
+            logger.warning("Skipping pricing rule %r: %s", rule.name, exc)
+            return None
+
+    def compile_plan(
+        self,
+        rules: List[Any],
+        promotions: List[Any],
+        now: Optional[datetime.datetime] = None,
+        ttl_seconds: Optional[int] = None,
+        category_tree: Optional[CategoryTree] = None
+    ) -> PricingPlan:
+        """
+        Builds a PricingPlan from rule and promotion rows. `rules` must already be
+        sorted by priority; promotions outside their date window are left out, but
+        their start/end dates bound `valid_until` so the plan refreshes in time.
+        Date-bounded rules are treated the same way. With a `category_tree`,
+        category promotions also cover subcategories.
+        """
+        now = now or datetime.datetime.utcnow()
+        ttl = settings.PRICING_PLAN_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        valid_until = now + datetime.timedelta(seconds=ttl)
+
+        compiled_rules = []
+        for rule in rules:
+            compiled = self.compile_rule(rule)
+            if compiled is None:
+                continue
+            start_date, end_date = compiled.window()
+            if start_date is not None and start_date > now:
+                valid_until = min(valid_until, start_date)
+                continue
+            if end_date is not None:
+                if end_date < now:
+                    continue
+                valid_until = min(valid_until, end_date + datetime.timedelta(microseconds=1))
+            compiled_rules.append(compiled)
+
+        promotions_by_category: Dict[Optional[int], List[CompiledPromotion]] = {}
+        for promo in promotions:
+            if promo.start_date > now:
+                valid_until = min(valid_until, promo.start_date)
+                continue
+            if promo.end_date < now:
+                continue
+            valid_until = min(valid_until, promo.end_date + datetime.timedelta(microseconds=1))
+            promotions_by_category.setdefault(promo.target_category_id, []).append(CompiledPromotion(
+                id=promo.id,
+                name=promo.name,
+                basis_points=to_basis_points(promo.discount_percentage),
+                target_category_id=promo.target_category_id,
+                rule_name=f"Promotion: {promo.name}",
+                description=f"Applied {promo.discount_percentage*100}% campaign discount"
+            ))
+
+        return PricingPlan(
+            rules=compiled_rules,
+            promotions_by_category=promotions_by_category,
+            compiled_at=now,
+            valid_until=valid_until,
+            category_tree=category_tree
+        )
+
+    def load_plan(self, db: Session, now: Optional[datetime.datetime] = None) -> PricingPlan:
+        now = now or datetime.datetime.utcnow()
+        rules = db.query(PricingRule).filter(
+            PricingRule.is_active == True
+        ).order_by(PricingRule.priority.desc(), PricingRule.id).all()
+        promotions = db.query(Promotion).filter(
+            Promotion.is_active == True,
+            Promotion.end_date >= now
+        ).all()
+        return self.compile_plan(rules, promotions, now=now, category_tree=category_tree_cache.get(db))
+
+    @timed("calculate_price")
+    def calculate_price(self, base_price: MoneyLike, context: Dict[str, Any], plan: PricingPlan, product_category_id: Optional[int] = None) -> PricingResult:
+        base_cents = to_cents(base_price)
+        current_cents = base_cents
         applied_rules = []
         
         # 1. Apply active promotions (Category-wide or Site-wide)
-        if db and product_category_id is not None:
-            from app.models.models import Promotion
-            import datetime
-            now = datetime.datetime.utcnow()
-            promotions = db.query(Promotion).filter(
-                Promotion.is_active == True,
-                Promotion.start_date <= now,
-                Promotion.end_date >= now,
-                (Promotion.target_category_id == product_category_id) | (Promotion.target_category_id == None)
-            ).all()
-            
-            for promo in promotions:
-                discount = current_price * promo.discount_percentage
+        if product_category_id is not None:
+            for promo in plan.promotions_for(product_category_id):
+                discount = promo.discount(current_cents)
                 applied_rules.append(PriceBreakdownItem(
-                    rule_name=f"Promotion: {promo.name}",
-                    discount_amount=discount,
-                    description=f"Applied {promo.discount_percentage*100}% campaign discount"
+                    rule_name=promo.rule_name, discount_amount=from_cents(discount), description=promo.description
                 ))
-                current_price -= discount
+                current_cents -= discount
 
         # 2. Apply existing priority-based rules
-        for rule in rules:
-            evaluator = self.evaluators.get(rule.type)
-            if evaluator:
-                breakdown = evaluator.evaluate(current_price, context, rule.parameters)
-                if breakdown:
-                    applied_rules.append(breakdown)
-                    current_price -= breakdown.discount_amount
+        quantity, user_tier = context.get("quantity", 0), context.get("user_tier")
+        for rule in plan.rules:
+            discount = rule.discount(current_cents, quantity, user_tier)
+            if discount is not None:
+                applied_rules.append(rule.apply(current_cents, context))
+                current_cents -= discount
         
         return PricingResult(
-            base_price=base_price,
-            final_price=max(0.0, current_price),
+            base_price=from_cents(base_cents),
+            final_price=from_cents(max(0, current_cents)),
+            applied_rules=applied_rules
+        )
+
+    def calculate_final_cents(
+        self,
+        base_cents: int,
+        quantity: int,
+        plan: PricingPlan,
+        product_category_id: Optional[int] = None,
+        user_tier: Optional[str] = None
+    ) -> int:
+        """
+        Fast mode of `calculate_price` for listings and checkout: the same
+        steps in the same order on integer cents, but no breakdown is built.
+        """
+        current_cents = base_cents
+        if product_category_id is not None:
+            for promo in plan.promotions_for(product_category_id):
+                current_cents -= promo.discount(current_cents)
+        for rule in plan.rules:
+            discount = rule.discount(current_cents, quantity, user_tier)
+            if discount is not None:
+                current_cents -= discount
+        return max(0, current_cents)
+
+    def calculate_final_price(
+        self,
+        base_price: MoneyLike,
+        quantity: int,
+        plan: PricingPlan,
+        product_category_id: Optional[int] = None,
+        user_tier: Optional[str] = None
+    ) -> Decimal:
+        return from_cents(self.calculate_final_cents(to_cents(base_price), quantity, plan, product_category_id, user_tier))
+
+    def calculate_prices_batch(
+        self,
+        base_cents: Any,
+        quantities: Any,
+        plan: PricingPlan,
+        category_ids: Optional[Any] = None,
+        user_tiers: Optional[Any] = None,
+        include_breakdown: bool = False
+    ) -> BatchPricingResult:
+        """
+        Prices a whole batch of integer-cent base prices with int64 array
+        operations. Rows are independent, and each row sees the same promotions
+        and rules, in the same order and with the same rounding, as
+        `calculate_price` would give it. A category id of -1 means uncategorised.
+        """
+        base = np.asarray(base_cents, dtype=np.int64)
+        n = len(base)
+        qty = np.asarray(quantities, dtype=np.int64)
+        categories = np.full(n, -1, dtype=np.int64) if category_ids is None else np.asarray(category_ids, dtype=np.int64)
+        tiers = np.full(n, None, dtype=object) if user_tiers is None else np.asarray(user_tiers, dtype=object)
+
+        current = base.copy()
+        # (kind, source, applied mask, price before the step)
+        steps = []
+
+        # 1. Promotions, applied in id order to every row they target
+        promotions = sorted(
+            (p for promos in plan.promotions_by_category.values() for p in promos),
+            key=lambda p: p.id
+        )
+        has_category = categories >= 0
+        tree = plan.category_tree
+        for promo in promotions:
+            if promo.target_category_id is None:
+                applied = has_category
+            elif tree is not None and promo.target_category_id in tree:
+                applied = np.isin(categories, tree.descendants(promo.target_category_id))
+            else:
+                applied = categories == promo.target_category_id
+            if not applied.any():
+                continue
+            if include_breakdown:
+                steps.append(("promotion", promo, applied, current.copy()))
+            current = current - np.where(applied, apply_rate_array(current, promo.basis_points), 0)
+
+        # 2. Priority-ordered rules
+        for rule in plan.rules:
+            applied, discounts = rule.apply_batch(current, qty, tiers)
+            if include_breakdown:
+                steps.append(("rule", rule, applied, current.copy()))
+            current = current - discounts
+
+        applied_rules = None
+        if include_breakdown:
+            applied_rules = [[] for _ in range(n)]
+            for kind, source, applied, before in steps:
+                for i in np.flatnonzero(applied):
+                    if kind == "promotion":
+                        applied_rules[i].append(source.apply(int(before[i])))
+                    else:
+                        context = {"quantity": int(qty[i]), "user_tier": tiers[i]}
+                        breakdown = source.apply(int(before[i]), context)
+                        if breakdown:
+                            applied_rules[i].append(breakdown)
+
+        return BatchPricingResult(
+            base_cents=base,
+            final_cents=np.maximum(current, 0),
             applied_rules=applied_rules
         )
+
+class PricingPlanCache:
+    """
+    Process-wide holder for the current PricingPlan. Writers to rules or
+    promotions call `invalidate()`; readers recompile lazily on the next quote.
+    """
+    def __init__(self, engine: Optional[PricingEngine] = None):
+        self.engine = engine or PricingEngine()
+        self._plan: Optional[PricingPlan] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> PricingPlan:
+        now = datetime.datetime.utcnow()
+        plan = self._plan
+        if plan is not None and plan.is_fresh(now):
+            return plan
+
+        with self._lock:
+            plan = self._plan
+            if plan is not None and plan.is_fresh(now):
+                return plan
+            generation = self._generation
+
+        plan = self.engine.load_plan(db, now=now)
+
+        with self._lock:
+            # Don't publish a plan that was compiled from rows an
+            # invalidate() call has since superseded.
+            if generation == self._generation:
+                self._plan = plan
+        return plan
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._plan = None
+
+pricing_plan_cache = PricingPlanCache()
@@ -1,6 +1,15 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from app.models.models import Category, Product, ProductVariant
-from typing import List, Optional
+from app.schemas import schemas
+from app.services.categories import category_tree_cache
+from app.services.pagination import apply_keyset, split_page
+from app.services.pricing import pricing_plan_cache
+from app.services.response_cache import invalidate_responses
+from app.services.search import get_product_search, in_memory_search
+from app.services.serialization import row_encoder
+from typing import Any, Dict, List, Optional, Tuple
 
 class ProductService:
     @staticmethod
@@ -8,39 +17,147 @@ class ProductService:
         return db.query(Product).filter(Product.id == product_id).first()
 
     @staticmethod
-    def get_products(db: Session, q: str = None, skip: int = 0, limit: int = 100):
-        from app.models.models import Product
-        query = db.query(Product)
+    async def get_product_async(db: AsyncSession, product_id: int):
+        return await db.get(Product, product_id)
+
+    @staticmethod
+    async def get_product_rows_async(
+        db: AsyncSession, q: str = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        A page of products as schema-shaped dicts, read as plain rows. Without
+        `fields` each product carries its variants, fetched in one query.
+        """
+        encoder = row_encoder(schemas.Product, fields)
+        query = select(*encoder.columns(Product))
         if q:
-            query = query.filter(
-                (Product.name.ilike(f"%{q}%")) | 
-                (Product.description.ilike(f"%{q}%"))
-            )
-        return query.offset(skip).limit(limit).all()
+            match = await get_product_search(db.get_bind().dialect.name).match_clause(db, q)
+            if match is not None:
+                query = query.where(match)
+        rows, next_cursor = split_page((await db.execute(apply_keyset(query, Product.id, cursor, limit, skip))).all(), limit)
+        products = encoder.encode_all(rows)
+        if fields is None and products:
+            variant_encoder = row_encoder(schemas.Variant)
+            variants: Dict[int, List[Dict[str, Any]]] = {product["id"]: [] for product in products}
+            for row in await db.execute(
+                select(*variant_encoder.columns(ProductVariant))
+                .where(ProductVariant.product_id.in_(list(variants))).order_by(ProductVariant.id)
+            ):
+                variant = variant_encoder.encode(row)
+                variants[variant["product_id"]].append(variant)
+            for product in products:
+                product["variants"] = variants[product["id"]]
+        return products, next_cursor
+
+    @staticmethod
+    async def search_products_async(db: AsyncSession, q: str, limit: int = 20):
+        ids = await get_product_search(db.get_bind().dialect.name).search_ids(db, q, limit)
+        if not ids:
+            return []
+        result = await db.execute(
+            select(Product).options(selectinload(Product.variants)).where(Product.id.in_(ids))
+        )
+        by_id = {product.id: product for product in result.scalars()}
+        return [by_id[product_id] for product_id in ids if product_id in by_id]
 
     @staticmethod
     def create_product(db: Session, product_data: dict):
+        if product_data.get("handle") is None:
+            product_data.pop("handle", None)
         db_product = Product(**product_data)
         db.add(db_product)
         db.commit()
         db.refresh(db_product)
+        in_memory_search.index_product(db_product)
+        invalidate_responses("products")
         return db_product
 
+    @staticmethod
+    def update_product(db: Session, product_id: int, product_data: dict):
+        db_product = db.query(Product).filter(Product.id == product_id).first()
+        if not db_product:
+            return None
+        if product_data.get("handle") is None:
+            product_data.pop("handle", None)
+        for var, value in product_data.items():
+            setattr(db_product, var, value)
+        db.commit()
+        db.refresh(db_product)
+        in_memory_search.index_product(db_product)
+        invalidate_responses("products")
+        return db_product
+
+    @staticmethod
+    def delete_product(db: Session, product_id: int) -> bool:
+        db_product = db.query(Product).filter(Product.id == product_id).first()
+        if not db_product:
+            return False
+        db.delete(db_product)
+        db.commit()
+        in_memory_search.remove_product(product_id)
+        invalidate_responses("products")
+        return True
+
 class CategoryService:
     @staticmethod
     def get_categories(db: Session):
         return db.query(Category).all()
 
+    @staticmethod
+    async def get_category_rows_async(db: AsyncSession) -> List[Dict[str, Any]]:
+        encoder = row_encoder(schemas.Category)
+        return encoder.encode_all(await db.execute(select(*encoder.columns(Category))))
+
+    @staticmethod
+    def _invalidate_tree():
+        # Compiled pricing plans embed the tree for subtree promotion matching
+        category_tree_cache.invalidate()
+        pricing_plan_cache.invalidate()
+        invalidate_responses("categories")
+
     @staticmethod
     def create_category(db: Session, category_data: dict):
         db_category = Category(**category_data)
         db.add(db_category)
         db.commit()
         db.refresh(db_category)
+        CategoryService._invalidate_tree()
         return db_category
 
+    @staticmethod
+    def update_category(db: Session, category_id: int, category_data: dict):
+        db_category = db.query(Category).filter(Category.id == category_id).first()
+        if not db_category:
+            return None
+        for var, value in category_data.items():
+            setattr(db_category, var, value)
+        db.commit()
+        db.refresh(db_category)
+        CategoryService._invalidate_tree()
+        return db_category
+
+    @staticmethod
+    def delete_category(db: Session, category_id: int) -> bool:
+        db_category = db.query(Category).filter(Category.id == category_id).first()
+        if not db_category:
+            return False
+        db.delete(db_category)
+        db.commit()
+        CategoryService._invalidate_tree()
+        return True
+
+    @staticmethod
+    def get_category_tree(db: Session, root_id: Optional[int] = None):
+        return category_tree_cache.get(db).as_nested(root_id)
+
     @staticmethod
     def get_category_hierarchy(db: Session, category_id: int):
-        # Implementation for hierarchical categories can be complex,
-        # starting with a simple parent fetch.
-        return db.query(Category).filter(Category.id == category_id).first()
+        """The category's ancestor chain, root first, or None if it is not in the tree."""
+        tree = category_tree_cache.get(db)
+        if category_id not in tree:
+            return None
+        return [
+            {"id": cid, "name": tree.names[cid], "parent_id": tree.parents[cid]}
+            for cid in reversed(tree.ancestors(category_id))
+        ]
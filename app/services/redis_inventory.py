@@ -0,0 +1,315 @@
+import calendar
+import datetime
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import ProductVariant, InventoryReservation, ReservationStatus
+
+# Holds live in a per-variant sorted set scored by expiry, with quantities in a
+# hash, so every script can lazily drop expired holds before it decides.
+_PURGE_EXPIRED = """
+local function purge(reserved_key, holds_key, qty_key, now)
+    local expired = redis.call('ZRANGEBYSCORE', holds_key, '-inf', now)
+    for _, token in ipairs(expired) do
+        local qty = redis.call('HGET', qty_key, token)
+        if qty then
+            redis.call('DECRBY', reserved_key, qty)
+            redis.call('HDEL', qty_key, token)
+        end
+        redis.call('ZREM', holds_key, token)
+    end
+end
+"""
+
+# KEYS: stock, reserved, holds, hold_qty, write_behind, unflushed
+# ARGV: now, quantity, token, expires_at, payload
+RESERVE_SCRIPT = _PURGE_EXPIRED + """
+local stock = redis.call('GET', KEYS[1])
+if not stock then
+    return {-2, 0}
+end
+purge(KEYS[2], KEYS[3], KEYS[4], ARGV[1])
+local available = tonumber(stock) - tonumber(redis.call('GET', KEYS[2]) or '0')
+local quantity = tonumber(ARGV[2])
+if available < quantity then
+    return {-1, available}
+end
+redis.call('INCRBY', KEYS[2], quantity)
+redis.call('ZADD', KEYS[3], ARGV[4], ARGV[3])
+redis.call('HSET', KEYS[4], ARGV[3], quantity)
+redis.call('RPUSH', KEYS[5], ARGV[5])
+redis.call('SADD', KEYS[6], ARGV[3])
+return {0, available - quantity}
+"""
+
+# KEYS: stock, reserved, holds, hold_qty
+# ARGV: consume_stock (0/1), then (token, quantity) pairs
+RELEASE_SCRIPT = """
+local released = 0
+for i = 2, #ARGV, 2 do
+    local token = ARGV[i]
+    local qty = redis.call('HGET', KEYS[4], token)
+    if qty then
+        redis.call('DECRBY', KEYS[2], qty)
+        redis.call('HDEL', KEYS[4], token)
+        redis.call('ZREM', KEYS[3], token)
+        released = released + tonumber(qty)
+    end
+    -- Checkout consumes stock even if the hold already expired in Redis,
+    -- because Postgres has sold it either way.
+    if ARGV[1] == '1' then
+        redis.call('DECRBY', KEYS[1], ARGV[i + 1])
+    end
+end
+return released
+"""
+
+# KEYS: stock, reserved, holds, hold_qty, unflushed
+# ARGV: stock_quantity, now, then (token, expires_at, quantity) triples for
+# every PENDING reservation Postgres knows about
+RECONCILE_SCRIPT = _PURGE_EXPIRED + """
+redis.call('SET', KEYS[1], ARGV[1])
+local known = {}
+for i = 3, #ARGV, 3 do
+    known[ARGV[i]] = true
+    if redis.call('HEXISTS', KEYS[4], ARGV[i]) == 0 then
+        redis.call('ZADD', KEYS[3], ARGV[i + 1], ARGV[i])
+        redis.call('HSET', KEYS[4], ARGV[i], ARGV[i + 2])
+    end
+end
+for _, token in ipairs(redis.call('ZRANGE', KEYS[3], 0, -1)) do
+    if not known[token] and redis.call('SISMEMBER', KEYS[5], token) == 0 then
+        redis.call('ZREM', KEYS[3], token)
+        redis.call('HDEL', KEYS[4], token)
+    end
+end
+local reserved = 0
+for _, qty in ipairs(redis.call('HVALS', KEYS[4])) do
+    reserved = reserved + tonumber(qty)
+end
+redis.call('SET', KEYS[2], reserved)
+purge(KEYS[2], KEYS[3], KEYS[4], ARGV[2])
+return tonumber(ARGV[1]) - tonumber(redis.call('GET', KEYS[2]))
+"""
+
+# KEYS: lock; ARGV: token, then the new TTL in ms to extend instead of release
+LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+# The reserve and reconcile scripts touch these shared keys alongside a
+# variant's own `inventory:{id}:*` keys, which hash to other slots, so the
+# backend needs a single Redis node (or a primary with replicas). Redis
+# Cluster would reject the scripts with CROSSSLOT and is not supported.
+WRITE_BEHIND_KEY = "inventory:write_behind"
+UNFLUSHED_KEY = "inventory:unflushed"
+FLUSH_LOCK_KEY = "inventory:write_behind:lock"
+FLUSH_LOCK_TTL_SECONDS = 30
+FLUSH_LOCK_POLL_SECONDS = 0.02
+
+
+def _epoch(value: datetime.datetime) -> float:
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
+@dataclass
+class ReservationHold:
+    hold_token: str
+    variant_id: int
+    cart_id: str
+    quantity: int
+    expires_at: datetime.datetime
+    variant: Optional[ProductVariant] = None
+    status: ReservationStatus = ReservationStatus.PENDING
+
+
+class RedisReservationBackend:
+    """
+    Admits reservations with an atomic check-and-decrement in Redis and
+    persists the InventoryReservation rows to Postgres in batches.
+    """
+    def __init__(self, client: redis.Redis):
+        self.client = client
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+        self._release = client.register_script(RELEASE_SCRIPT)
+        self._reconcile = client.register_script(RECONCILE_SCRIPT)
+        self._lock = client.register_script(LOCK_SCRIPT)
+
+    @staticmethod
+    def _keys(variant_id: int) -> List[str]:
+        prefix = f"inventory:{{{variant_id}}}"
+        return [f"{prefix}:stock", f"{prefix}:reserved", f"{prefix}:holds", f"{prefix}:hold_qty"]
+
+    @staticmethod
+    def hold_token_for(reservation: InventoryReservation) -> str:
+        return reservation.hold_token or f"db:{reservation.id}"
+
+    def reserve(self, db: Session, variant_id: int, cart_id: str, quantity: int, duration_minutes: int = 15) -> ReservationHold:
+        now = datetime.datetime.utcnow()
+        expires_at = now + datetime.timedelta(minutes=duration_minutes)
+        token = uuid.uuid4().hex
+        payload = json.dumps({
+            "hold_token": token,
+            "variant_id": variant_id,
+            "cart_id": cart_id,
+            "quantity": quantity,
+            "expires_at": expires_at.isoformat(),
+            "created_at": now.isoformat()
+        })
+        keys = self._keys(variant_id) + [WRITE_BEHIND_KEY, UNFLUSHED_KEY]
+        args = [_epoch(now), quantity, token, _epoch(expires_at), payload]
+
+        status, _ = self._reserve(keys=keys, args=args)
+        if status == -2:
+            # First reservation for this variant since Redis was (re)started
+            if not self.reconcile_variant(db, variant_id):
+                raise Exception("Variant not found")
+            status, _ = self._reserve(keys=keys, args=args)
+        if status == -1:
+            raise Exception("Not enough available inventory")
+
+        return ReservationHold(
+            hold_token=token,
+            variant_id=variant_id,
+            cart_id=cart_id,
+            quantity=quantity,
+            expires_at=expires_at,
+            variant=db.query(ProductVariant).filter(ProductVariant.id == variant_id).first()
+        )
+
+    def release(self, variant_id: int, holds: Iterable[Tuple[str, int]], consume_stock: bool = False) -> int:
+        args: List[Any] = [1 if consume_stock else 0]
+        for token, quantity in holds:
+            args.extend([token, quantity])
+        if len(args) == 1:
+            return 0
+        return self._release(keys=self._keys(variant_id), args=args)
+
+    def available(self, variant_id: int) -> Optional[int]:
+        stock, reserved = self.client.mget(self._keys(variant_id)[:2])
+        if stock is None:
+            return None
+        return int(stock) - int(reserved or 0)
+
+    def _acquire_flush_lock(self, token: str, wait: bool) -> bool:
+        deadline = time.monotonic() + settings.RESERVATION_FLUSH_WAIT_SECONDS
+        while not self.client.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_TTL_SECONDS):
+            if not wait:
+                return False
+            if time.monotonic() >= deadline:
+                raise Exception("Reservation write-behind queue is busy, try again")
+            time.sleep(FLUSH_LOCK_POLL_SECONDS)
+        return True
+
+    def flush_write_behind(self, db: Session, batch_size: Optional[int] = None, wait: bool = False) -> int:
+        """
+        Moves queued reservations into Postgres. Entries are only removed from
+        the queue after the insert commits, and tokens already present are
+        skipped, so a crashed flush is simply retried. The lock is renewed
+        before each batch; a flusher that finds it taken over stops, and only
+        ever deletes its own lock.
+
+        Without `wait` a flush already in progress elsewhere is left to it.
+        Callers about to read reservations pass `wait=True`: they block until
+        they hold the lock and have drained the queue themselves, so no hold
+        admitted before the call is missing from Postgres.
+        """
+        batch_size = batch_size or settings.RESERVATION_WRITE_BEHIND_BATCH_SIZE
+        lock_token = uuid.uuid4().hex
+        if not self._acquire_flush_lock(lock_token, wait):
+            return 0
+        flushed = 0
+        try:
+            while self._lock(keys=[FLUSH_LOCK_KEY], args=[lock_token, FLUSH_LOCK_TTL_SECONDS * 1000]):
+                raw = self.client.lrange(WRITE_BEHIND_KEY, 0, batch_size - 1)
+                if not raw:
+                    break
+                entries = [json.loads(item) for item in raw]
+                tokens = [entry["hold_token"] for entry in entries]
+                existing = {
+                    row.hold_token for row in db.query(InventoryReservation.hold_token)
+                    .filter(InventoryReservation.hold_token.in_(tokens))
+                }
+
+                reserved: Dict[int, int] = {}
+                rows = []
+                for entry in entries:
+                    if entry["hold_token"] in existing:
+                        continue
+                    rows.append(InventoryReservation(
+                        hold_token=entry["hold_token"],
+                        variant_id=entry["variant_id"],
+                        cart_id=entry["cart_id"],
+                        quantity=entry["quantity"],
+                        expires_at=datetime.datetime.fromisoformat(entry["expires_at"]),
+                        created_at=datetime.datetime.fromisoformat(entry["created_at"]),
+                        status=ReservationStatus.PENDING
+                    ))
+                    reserved[entry["variant_id"]] = reserved.get(entry["variant_id"], 0) + entry["quantity"]
+
+                from app.services.inventory import InventoryService
+                db.add_all(rows)
+                InventoryService._adjust_reserved(db, reserved)
+                db.commit()
+
+                pipe = self.client.pipeline()
+                pipe.ltrim(WRITE_BEHIND_KEY, len(raw), -1)
+                pipe.srem(UNFLUSHED_KEY, *tokens)
+                pipe.execute()
+                flushed += len(rows)
+        finally:
+            self._lock(keys=[FLUSH_LOCK_KEY], args=[lock_token])
+        return flushed
+
+    def reconcile_variant(self, db: Session, variant_id: int) -> bool:
+        # Holding the row lock keeps checkouts from moving stock between the
+        # read below and the script that publishes it.
+        variant = db.query(ProductVariant).filter(ProductVariant.id == variant_id).with_for_update().first()
+        if not variant:
+            db.rollback()
+            return False
+        now = datetime.datetime.utcnow()
+        pending = db.query(InventoryReservation).filter(
+            InventoryReservation.variant_id == variant_id,
+            InventoryReservation.status == ReservationStatus.PENDING,
+            InventoryReservation.expires_at > now
+        ).all()
+        args: List[Any] = [variant.stock_quantity or 0, _epoch(now)]
+        for reservation in pending:
+            args.extend([self.hold_token_for(reservation), _epoch(reservation.expires_at), reservation.quantity])
+        self._reconcile(keys=self._keys(variant_id) + [UNFLUSHED_KEY], args=args)
+        db.commit()
+        return True
+
+    def reconcile(self, db: Session) -> int:
+        self.flush_write_behind(db, wait=True)
+        variant_ids = [row.id for row in db.query(ProductVariant.id).order_by(ProductVariant.id)]
+        for variant_id in variant_ids:
+            self.reconcile_variant(db, variant_id)
+        return len(variant_ids)
+
+
+_backend: Optional[RedisReservationBackend] = None
+
+
+def get_reservation_backend() -> Optional[RedisReservationBackend]:
+    """Returns the Redis backend when RESERVATION_BACKEND is "redis", else None."""
+    global _backend
+    if settings.RESERVATION_BACKEND != "redis":
+        return None
+    if _backend is None:
+        _backend = RedisReservationBackend(redis.Redis.from_url(settings.REDIS_URL))
+    return _backend
@@ -0,0 +1,241 @@
+"""
+Whole-response cache for the catalog list endpoints. Cached bodies are keyed
+on path, query string and the version of the route's namespace; writes bump
+the version with `invalidate_responses()`, which orphans every older entry at
+once. Entries live in a per-process LRU, optionally backed by Redis, which
+then also holds the versions so a bump reaches every worker. Without Redis,
+other workers catch up within RESPONSE_CACHE_TTL_SECONDS.
+
+Each cached body carries an ETag, so revalidating clients get a 304.
+Stock and reservation counts in product listings change without a bump
+(checkouts, carts) and may lag by up to the TTL.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import redis
+import redis.asyncio
+
+from app.core.config import settings
+from app.core.metrics import RESPONSE_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    headers: Headers
+    body: bytes
+
+    def dumps(self) -> bytes:
+        meta = {"etag": self.etag, "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in self.headers]}
+        return json.dumps(meta).encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        meta, body = raw.split(b"\n", 1)
+        meta = json.loads(meta)
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in meta["headers"]]
+        return cls(meta["etag"], headers, body)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ResponseCache:
+    def __init__(
+        self, maxsize: int, ttl_seconds: float,
+        client: Optional[redis.Redis] = None, async_client: Optional[redis.asyncio.Redis] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        # Writers bump through the sync client; the middleware reads through
+        # the async one so the event loop never waits on Redis
+        self.client = client
+        self.async_client = async_client
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(namespace: str) -> str:
+        return f"respcache:version:{namespace}"
+
+    async def version(self, namespace: str) -> int:
+        if self.async_client is None:
+            return self._versions.get(namespace, 0)
+        return int(await self.async_client.get(self._version_key(namespace)) or 0)
+
+    def bump(self, namespace: str):
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        if self.client is not None:
+            try:
+                self.client.incr(self._version_key(namespace))
+            except redis.RedisError:
+                # Other workers serve their entries until the TTL lapses
+                logger.warning("Failed to bump response cache version for %s", namespace, exc_info=True)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+        if self.async_client is None:
+            return None
+        raw = await self.async_client.get(f"respcache:{key}")
+        if raw is None:
+            return None
+        response = CachedResponse.loads(raw)
+        self._put_local(key, response)
+        return response
+
+    def _put_local(self, key: str, response: CachedResponse):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def put(self, key: str, response: CachedResponse):
+        self._put_local(key, response)
+        if self.async_client is not None:
+            await self.async_client.set(f"respcache:{key}", response.dumps(), ex=int(self.ttl_seconds))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Returns the process-wide cache when RESPONSE_CACHE_ENABLED is set, else None."""
+    global _response_cache
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    if _response_cache is None:
+        client = async_client = None
+        if settings.RESPONSE_CACHE_REDIS_ENABLED:
+            client = redis.Redis.from_url(settings.REDIS_URL)
+            async_client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+        _response_cache = ResponseCache(
+            settings.RESPONSE_CACHE_MAXSIZE, settings.RESPONSE_CACHE_TTL_SECONDS, client, async_client
+        )
+    return _response_cache
+
+
+def invalidate_responses(*namespaces: str):
+    """Call after committing a write that changes what these namespaces serve."""
+    cache = get_response_cache()
+    if cache:
+        for namespace in namespaces:
+            cache.bump(namespace)
+
+
+class ResponseCacheMiddleware:
+    """
+    Pure ASGI middleware serving GETs on `routes` (exact path -> namespace)
+    from the cache, ahead of routing, so a hit opens no database session.
+    Only 200 responses are stored.
+    """
+    def __init__(self, app, routes: Dict[str, str]):
+        self.app = app
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        namespace = self.routes.get(scope["path"]) if scope["type"] == "http" else None
+        cache = get_response_cache() if namespace and scope["method"] == "GET" else None
+        if cache is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        try:
+            version = await cache.version(namespace)
+            key = f"{namespace}:{version}:{scope['path']}?{_normalized_query(scope['query_string'])}"
+            cached = await cache.get(key)
+        except redis.RedisError:
+            logger.warning("Response cache Redis tier unavailable", exc_info=True)
+            RESPONSE_CACHE_REQUESTS.labels(namespace, "error").inc()
+            await self.app(scope, receive, send)
+            return
+
+        if cached is not None:
+            # Hits never reach the router; give MetricsMiddleware the route label
+            scope["route"] = SimpleNamespace(path=scope["path"])
+            not_modified = etag_matches(if_none_match, cached.etag)
+            RESPONSE_CACHE_REQUESTS.labels(namespace, "not_modified" if not_modified else "hit").inc()
+            await _send(send, cached, not_modified)
+            return
+
+        RESPONSE_CACHE_REQUESTS.labels(namespace, "miss").inc()
+        start, chunks = None, []
+
+        async def buffer(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            else:
+                await send(message)
+
+        await self.app(scope, receive, buffer)
+        body = b"".join(chunks)
+        if start["status"] != 200:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(name, value) for name, value in start.get("headers", []) if name != b"content-length"]
+        response = CachedResponse(make_etag(body), headers, body)
+        try:
+            await cache.put(key, response)
+        except redis.RedisError:
+            logger.warning("Response cache Redis tier unavailable", exc_info=True)
+        await _send(send, response, etag_matches(if_none_match, response.etag))
+
+
+def _normalized_query(query_string: bytes) -> str:
+    return "&".join(sorted(query_string.decode("latin-1").split("&"))) if query_string else ""
+
+
+async def _send(send, response: CachedResponse, not_modified: bool):
+    validators = [(b"etag", response.etag.encode()), (b"cache-control", b"no-cache")]
+    if not_modified:
+        await send({"type": "http.response.start", "status": 304, "headers": validators})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    headers = response.headers + validators + [(b"content-length", str(len(response.body)).encode())]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
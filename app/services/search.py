@@ -0,0 +1,163 @@
+import bisect
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import Product
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class PostgresProductSearch:
+    """
+    Matches against the weighted `products.search_vector` tsvector (GIN
+    indexed). Every term is prefix-matched so partially typed words work for
+    typeahead.
+    """
+    def _query(self, q: str):
+        terms = tokenize(q)
+        if not terms:
+            return None
+        return func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+
+    async def match_clause(self, db: AsyncSession, q: str):
+        tsquery = self._query(q)
+        if tsquery is None:
+            return None
+        return Product.search_vector.op("@@")(tsquery)
+
+    async def search_ids(self, db: AsyncSession, q: str, limit: int) -> List[int]:
+        tsquery = self._query(q)
+        if tsquery is None:
+            return []
+        rank = func.ts_rank_cd(Product.search_vector, tsquery)
+        result = await db.execute(
+            select(Product.id)
+            .where(Product.search_vector.op("@@")(tsquery))
+            .order_by(rank.desc(), Product.id)
+            .limit(limit)
+        )
+        return list(result.scalars())
+
+
+class InMemoryProductSearch:
+    """
+    Inverted index fallback for databases without full-text search (SQLite
+    test runs). Built from the products table on first use and kept current
+    by ProductService; it is per process, so it is not meant for production.
+    """
+    NAME_WEIGHT = 2
+    DESCRIPTION_WEIGHT = 1
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._tokens: List[str] = []
+        self._documents: Dict[int, Set[str]] = {}
+
+    def _add(self, product_id: int, name: Optional[str], description: Optional[str]):
+        weights: Dict[str, int] = {}
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0) + self.NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0) + self.DESCRIPTION_WEIGHT
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+            postings[product_id] = weight
+        self._documents[product_id] = set(weights)
+
+    def _remove(self, product_id: int):
+        for token in self._documents.pop(product_id, ()):
+            postings = self._postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                self._tokens.pop(bisect.bisect_left(self._tokens, token))
+
+    def build(self, db: Session):
+        with self._lock:
+            self._postings, self._tokens, self._documents = {}, [], {}
+            for row in db.query(Product.id, Product.name, Product.description):
+                self._add(row.id, row.name, row.description)
+            self._built = True
+
+    def invalidate(self):
+        """Drops the index so the next search rebuilds it from the database."""
+        with self._lock:
+            self._built = False
+
+    def index_product(self, product: Product):
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(product.id)
+            self._add(product.id, product.name, product.description)
+
+    def remove_product(self, product_id: int):
+        with self._lock:
+            if self._built:
+                self._remove(product_id)
+
+    def _prefix_postings(self, term: str) -> Dict[int, int]:
+        merged: Dict[int, int] = {}
+        start = bisect.bisect_left(self._tokens, term)
+        for token in self._tokens[start:]:
+            if not token.startswith(term):
+                break
+            for product_id, weight in self._postings[token].items():
+                merged[product_id] = max(merged.get(product_id, 0), weight)
+        return merged
+
+    def _scores(self, terms: Iterable[str]) -> Dict[int, int]:
+        scores: Optional[Dict[int, int]] = None
+        for term in terms:
+            postings = self._prefix_postings(term)
+            if scores is None:
+                scores = postings
+            else:
+                scores = {pid: score + postings[pid] for pid, score in scores.items() if pid in postings}
+            if not scores:
+                return {}
+        return scores or {}
+
+    async def _ensure_built(self, db: AsyncSession):
+        if not self._built:
+            await db.run_sync(self.build)
+
+    async def match_clause(self, db: AsyncSession, q: str):
+        terms = tokenize(q)
+        if not terms:
+            return None
+        await self._ensure_built(db)
+        with self._lock:
+            ids = list(self._scores(terms))
+        return Product.id.in_(ids)
+
+    async def search_ids(self, db: AsyncSession, q: str, limit: int) -> List[int]:
+        terms = tokenize(q)
+        if not terms:
+            return []
+        await self._ensure_built(db)
+        with self._lock:
+            scores = self._scores(terms)
+        return sorted(scores, key=lambda pid: (-scores[pid], pid))[:limit]
+
+
+postgres_search = PostgresProductSearch()
+in_memory_search = InMemoryProductSearch()
+
+
+def get_product_search(dialect_name: str):
+    return postgres_search if dialect_name == "postgresql" else in_memory_search
@@ -0,0 +1,60 @@
+"""
+JSON for list endpoints without a Pydantic model per row. With a
+`response_model`, FastAPI validates every ORM object (and every nested
+variant) into a model and dumps it again; for rows already selected in the
+schema's shape that is pure overhead. A RowEncoder is compiled once per
+schema and field list and turns SQLAlchemy `Row` tuples into plain dicts
+that orjson serializes as the schema would have.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, get_origin
+
+from pydantic import BaseModel, PlainSerializer
+from pydantic.fields import FieldInfo
+
+
+def _converter(field: FieldInfo) -> Optional[Callable[[Any], Any]]:
+    """float for fields the schema emits as JSON floats; Money columns arrive as Decimal."""
+    if field.annotation is float:
+        return float
+    for meta in field.metadata:
+        if isinstance(meta, PlainSerializer) and meta.return_type is float:
+            return float
+    # Enums, datetimes and the rest serialize natively in orjson
+    return None
+
+
+class RowEncoder:
+    def __init__(self, schema: Type[BaseModel], fields: Sequence[str]):
+        self.fields = tuple(fields)
+        self._converters = tuple(
+            (index, convert) for index, name in enumerate(self.fields)
+            if (convert := _converter(schema.model_fields[name])) is not None
+        )
+
+    def columns(self, model: Any) -> List[Any]:
+        """The model's columns for these fields, in order, for a select()."""
+        return [getattr(model, name) for name in self.fields]
+
+    def encode(self, row: Sequence[Any]) -> Dict[str, Any]:
+        if not self._converters:
+            return dict(zip(self.fields, row))
+        values = list(row)
+        for index, convert in self._converters:
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        return dict(zip(self.fields, values))
+
+    def encode_all(self, rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+        return [self.encode(row) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def row_encoder(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> RowEncoder:
+    """
+    The encoder for `fields` of `schema`, by default all of its fields
+    except nested lists, which the caller fills in.
+    """
+    if fields is None:
+        fields = tuple(name for name, field in schema.model_fields.items() if get_origin(field.annotation) is not list)
+    return RowEncoder(schema, fields)
@@ -0,0 +1,102 @@
+import datetime
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+import redis
+import redis.asyncio
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LOW_STOCK = "low_stock"
+RESTOCKED = "restocked"
+
+
+def crossing(before: int, after: int, threshold: int) -> Optional[str]:
+    """Names the threshold crossing between two available quantities, if any."""
+    if before >= threshold > after:
+        return LOW_STOCK
+    if before < threshold <= after:
+        return RESTOCKED
+    return None
+
+
+class StockAlertPublisher:
+    """
+    Appends an event to a capped Redis stream whenever a variant's available
+    quantity crosses the low-stock threshold, so dashboards can follow the
+    stream (or the SSE endpoint) instead of polling.
+    """
+    def __init__(self, client: redis.Redis, stream_key: str, threshold: int, maxlen: int):
+        self.client = client
+        self.stream_key = stream_key
+        self.threshold = threshold
+        self.maxlen = maxlen
+
+    def publish(self, changes: Dict[int, Tuple[int, int]]) -> int:
+        """Takes {variant_id: (available_before, available_after)}; returns events sent."""
+        now = datetime.datetime.utcnow().isoformat()
+        pipe = self.client.pipeline(transaction=False)
+        sent = 0
+        for variant_id, (before, after) in sorted(changes.items()):
+            event = crossing(before, after, self.threshold)
+            if event:
+                pipe.xadd(self.stream_key, {"data": json.dumps({
+                    "event": event,
+                    "variant_id": variant_id,
+                    "available_quantity": after,
+                    "threshold": self.threshold,
+                    "at": now
+                })}, maxlen=self.maxlen, approximate=True)
+                sent += 1
+        if sent:
+            try:
+                pipe.execute()
+            except redis.RedisError:
+                # Alerts are best effort; the committed inventory change stands
+                logger.exception("Failed to publish %d low-stock events", sent)
+                return 0
+        return sent
+
+
+_publisher: Optional[StockAlertPublisher] = None
+
+
+def get_stock_alert_publisher() -> Optional[StockAlertPublisher]:
+    """Returns the publisher when LOW_STOCK_EVENTS_ENABLED is set, else None."""
+    global _publisher
+    if not settings.LOW_STOCK_EVENTS_ENABLED:
+        return None
+    if _publisher is None:
+        _publisher = StockAlertPublisher(
+            redis.Redis.from_url(settings.REDIS_URL),
+            settings.LOW_STOCK_STREAM_KEY,
+            settings.LOW_STOCK_THRESHOLD,
+            settings.LOW_STOCK_STREAM_MAXLEN
+        )
+    return _publisher
+
+
+async def stream_events(
+    client: "redis.asyncio.Redis",
+    last_event_id: str,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    block_ms: Optional[int] = 15000
+) -> AsyncIterator[str]:
+    """
+    Follows the low-stock stream as Server-Sent Events, resuming after
+    `last_event_id` ("$" for new events only). Sends a comment line whenever
+    the stream is idle so proxies keep the connection open.
+    """
+    while not await is_disconnected():
+        batches = await client.xread({settings.LOW_STOCK_STREAM_KEY: last_event_id}, count=100, block=block_ms)
+        if not batches:
+            yield ": keep-alive\n\n"
+            continue
+        for _, entries in batches:
+            for entry_id, fields in entries:
+                last_event_id = entry_id
+                data = fields["data"]
+                yield f"id: {entry_id}\nevent: {json.loads(data)['event']}\ndata: {data}\n\n"
@@ -1,7 +1,11 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.models import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate
+from app.core.password_hasher import get_password_hasher
 from app.core.security import get_password_hash, verify_password
+from app.services.user_cache import AuthUser, get_user_cache
 from typing import Optional
 
 class UserService:
@@ -9,6 +13,26 @@ class UserService:
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
+    @staticmethod
+    async def get_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+        return (await db.execute(select(User).where(User.email == email))).scalars().first()
+
+    @staticmethod
+    def get_auth_user(db: Session, email: str) -> Optional[AuthUser]:
+        """The user record for authentication, served from the user cache when warm."""
+        cache = get_user_cache()
+        if cache:
+            user = cache.get(email)
+            if user is not None:
+                return user
+        db_user = UserService.get_user_by_email(db, email)
+        if not db_user:
+            return None
+        user = AuthUser.from_user(db_user)
+        if cache:
+            cache.put(user)
+        return user
+
     @staticmethod
     def create_user(db: Session, user_in: UserCreate) -> User:
         db_user = User(
@@ -22,6 +46,20 @@ class UserService:
         db.refresh(db_user)
         return db_user
 
+    @staticmethod
+    async def create_user_async(db: AsyncSession, user_in: UserCreate) -> User:
+        """create_user for request handlers; bcrypt runs in the password hashing pool."""
+        db_user = User(
+            email=user_in.email,
+            hashed_password=await get_password_hasher().hash(user_in.password),
+            full_name=user_in.full_name,
+            role=user_in.role
+        )
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+
     @staticmethod
     def authenticate(db: Session, email: str, password: str) -> Optional[User]:
         user = UserService.get_user_by_email(db, email)
@@ -30,3 +68,21 @@ class UserService:
         if not verify_password(password, user.hashed_password):
             return None
         return user
+
+    @staticmethod
+    async def authenticate_async(db: AsyncSession, email: str, password: str) -> Optional[User]:
+        """
+        authenticate for request handlers, verifying in the password hashing
+        pool. A hash made with outdated bcrypt parameters is replaced by one
+        made with the current ones.
+        """
+        user = await UserService.get_user_by_email_async(db, email)
+        if not user:
+            return None
+        valid, new_hash = await get_password_hasher().verify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+        return user
@@ -0,0 +1,153 @@
+"""
+Cache of the user records that authentication needs, keyed by token subject
+(the email). Entries live for USER_CACHE_TTL_SECONDS in a per-process LRU,
+optionally backed by Redis so workers share warm entries. Committed changes
+to a User row invalidate its entry here and in Redis; other processes'
+LRUs catch up within the TTL.
+"""
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional, Set
+import json
+import logging
+import threading
+import time
+
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """Detached snapshot of a User, safe to share across requests."""
+    id: int
+    email: str
+    full_name: Optional[str]
+    is_active: bool
+    role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthUser":
+        return cls(id=user.id, email=user.email, full_name=user.full_name,
+                   is_active=bool(user.is_active), role=UserRole(user.role))
+
+
+class UserCache:
+    def __init__(self, maxsize: int, ttl_seconds: float, client: Optional[redis.Redis] = None, redis_ttl_seconds: int = 300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.client = client
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _redis_key(subject: str) -> str:
+        return f"auth:user:{subject}"
+
+    def get(self, subject: str) -> Optional[AuthUser]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(subject)
+                    return entry[1]
+                del self._entries[subject]
+
+        if self.client is None:
+            return None
+        try:
+            raw = self.client.get(self._redis_key(subject))
+        except redis.RedisError:
+            logger.warning("User cache Redis tier unavailable", exc_info=True)
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        user = AuthUser(**dict(data, role=UserRole(data["role"])))
+        self._put_local(user)
+        return user
+
+    def _put_local(self, user: AuthUser):
+        with self._lock:
+            self._entries[user.email] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(user.email)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def put(self, user: AuthUser):
+        self._put_local(user)
+        if self.client is not None:
+            try:
+                self.client.set(
+                    self._redis_key(user.email),
+                    json.dumps(dict(asdict(user), role=user.role.value)),
+                    ex=self.redis_ttl_seconds
+                )
+            except redis.RedisError:
+                logger.warning("User cache Redis tier unavailable", exc_info=True)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+        if self.client is not None:
+            try:
+                self.client.delete(self._redis_key(subject))
+            except redis.RedisError:
+                # The entry then lapses with its Redis TTL
+                logger.warning("Failed to invalidate user %s in Redis", subject, exc_info=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache: Optional[UserCache] = None
+
+
+def get_user_cache() -> Optional[UserCache]:
+    """Returns the process-wide cache when USER_CACHE_ENABLED is set, else None."""
+    global _user_cache
+    if not settings.USER_CACHE_ENABLED:
+        return None
+    if _user_cache is None:
+        client = redis.Redis.from_url(settings.REDIS_URL) if settings.USER_CACHE_REDIS_ENABLED else None
+        _user_cache = UserCache(
+            settings.USER_CACHE_MAXSIZE, settings.USER_CACHE_TTL_SECONDS, client, settings.USER_CACHE_REDIS_TTL_SECONDS
+        )
+    return _user_cache
+
+
+# Invalidation runs after commit, so a concurrent request cannot re-cache
+# the row as it was before the change.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _remember_changed_user(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is None:
+        return
+    changed: Set[str] = session.info.setdefault("changed_user_emails", set())
+    changed.add(target.email)
+    previous = inspect(target).attrs.email.history.deleted
+    changed.update(email for email in previous if email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    changed = session.info.pop("changed_user_emails", None)
+    cache = get_user_cache()
+    if changed and cache:
+        for email in changed:
+            cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("changed_user_emails", None)
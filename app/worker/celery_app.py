@@ -1,15 +1,75 @@
+import datetime
+from celery import Celery
+from celery.signals import worker_init
 from app.core.config import settings
+from app.core.metrics import start_metrics_server, timed
 from app.db.database import SessionLocal
+from app.services import idempotency
+from app.services.analytics import AnalyticsService
 from app.services.inventory import InventoryService
+from app.services.redis_inventory import get_reservation_backend
 
 celery_app = Celery("worker", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
 
+@worker_init.connect
+def _start_metrics_server(**kwargs):
+    if settings.CELERY_METRICS_PORT:
+        start_metrics_server(settings.CELERY_METRICS_PORT)
+
 @celery_app.task
+@timed("cleanup_expired_reservations_task")
 def cleanup_expired_reservations_task():
     db = SessionLocal()
     try:
-        count = InventoryService.cleanup_expired_reservations(db)
-        return f"Cleaned up {count} expired reservations"
+        result = InventoryService.cleanup_expired_reservations(db)
+        return {
+            "released": result.released,
+            "batches": result.batches,
+            "duration_seconds": round(result.duration_seconds, 3),
+            "variant_ids": result.variant_ids
+        }
+    finally:
+        db.close()
+
+@celery_app.task
+def reconcile_reserved_quantities_task():
+    db = SessionLocal()
+    try:
+        corrected = InventoryService.reconcile_reserved_quantities(db)
+        backend = get_reservation_backend()
+        if backend:
+            backend.reconcile(db)
+        return f"Reconciled reserved quantity for {len(corrected)} variants"
+    finally:
+        db.close()
+
+@celery_app.task
+def flush_reservation_write_behind_task():
+    backend = get_reservation_backend()
+    if not backend:
+        return "Redis reservation backend disabled"
+    db = SessionLocal()
+    try:
+        count = backend.flush_write_behind(db)
+        return f"Persisted {count} reservations"
+    finally:
+        db.close()
+
+@celery_app.task
+def refresh_analytics_rollups_task():
+    db = SessionLocal()
+    try:
+        count = AnalyticsService.refresh_rollups(db)
+        return f"Rolled up {count} order items"
+    finally:
+        db.close()
+
+@celery_app.task
+def purge_idempotency_records_task():
+    db = SessionLocal()
+    try:
+        count = idempotency.purge(db, datetime.timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS))
+        return f"Purged {count} idempotency records"
     finally:
         db.close()
 
@@ -19,4 +79,20 @@ celery_app.conf.beat_schedule = {
         "task": "app.worker.celery_app.cleanup_expired_reservations_task",
         "schedule": 60.0,
     },
+    "reconcile-reserved-every-ten-minutes": {
+        "task": "app.worker.celery_app.reconcile_reserved_quantities_task",
+        "schedule": 600.0,
+    },
+    "flush-reservations-every-five-seconds": {
+        "task": "app.worker.celery_app.flush_reservation_write_behind_task",
+        "schedule": 5.0,
+    },
+    "refresh-analytics-rollups-every-minute": {
+        "task": "app.worker.celery_app.refresh_analytics_rollups_task",
+        "schedule": 60.0,
+    },
+    "purge-idempotency-records-hourly": {
+        "task": "app.worker.celery_app.purge_idempotency_records_task",
+        "schedule": 3600.0,
+    },
 }
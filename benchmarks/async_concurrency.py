@@ -0,0 +1,108 @@
+"""
+Sync vs async request handling under rising concurrency.
+
+Mounts two equivalent product-listing endpoints, one `def` handler on the sync
+SessionLocal and one `async def` handler on AsyncSessionLocal, and drives both
+in-process through httpx at several concurrency levels.
+
+    python -m benchmarks.async_concurrency --database-url postgresql://... --db-latency-ms 5
+
+--db-latency-ms adds a pg_sleep() per request (Postgres only) to model time
+spent waiting on a busy database, which is where the threadpool saturates.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+
+from app.core.config import settings
+from app.models.models import Base, Category, Product, ProductVariant
+
+
+def build_app(database_url: str, async_database_url: str, latency_ms: float) -> FastAPI:
+    pool = {} if database_url.startswith("sqlite") else {"pool_size": 20, "max_overflow": 20}
+    engine = create_engine(database_url, **pool)
+    async_engine = create_async_engine(async_database_url, **pool)
+    SessionLocal = sessionmaker(bind=engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+    sleep = text("SELECT pg_sleep(:s)") if latency_ms else None
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if not db.query(Product).first():
+            category = Category(name="Bench")
+            db.add(category)
+            db.flush()
+            for i in range(200):
+                product = Product(name=f"Product {i}", base_price=10.0 + i, category_id=category.id)
+                db.add(product)
+                db.flush()
+                db.add(ProductVariant(product_id=product.id, sku=f"BENCH-{i}", sku_name="Default", stock_quantity=10))
+            db.commit()
+
+    def get_db():
+        with SessionLocal() as db:
+            yield db
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_products(db: Session = Depends(get_db)):
+        if sleep is not None:
+            db.execute(sleep, {"s": latency_ms / 1000})
+        products = db.query(Product).options(selectinload(Product.variants)).limit(50).all()
+        return len(products)
+
+    @app.get("/async")
+    async def async_products(db: AsyncSession = Depends(get_async_db)):
+        if sleep is not None:
+            await db.execute(sleep, {"s": latency_ms / 1000})
+        result = await db.execute(select(Product).options(selectinload(Product.variants)).limit(50))
+        return len(result.scalars().all())
+
+    return app
+
+
+async def drive(client: httpx.AsyncClient, path: str, requests: int, concurrency: int) -> float:
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            response = await client.get(path)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.sqlalchemy_database_url)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    settings.DATABASE_URL = args.database_url
+    app = build_app(args.database_url, settings.async_database_url, args.db_latency_ms)
+
+    print(f"{'concurrency':>11} {'sync req/s':>11} {'async req/s':>12} {'gain':>6}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for concurrency in args.concurrency:
+            sync_rps = await drive(client, "/sync", args.requests, concurrency)
+            async_rps = await drive(client, "/async", args.requests, concurrency)
+            print(f"{concurrency:>11} {sync_rps:>11.0f} {async_rps:>12.0f} {async_rps / sync_rps:>5.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
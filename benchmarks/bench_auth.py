@@ -0,0 +1,41 @@
+"""Per-request cost of authenticating a bearer token."""
+import pytest
+from jose import jwt
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.security import clear_verified_tokens, create_access_token, decode_access_token
+from app.models.models import User, UserRole
+from app.services.user_cache import get_user_cache
+
+
+@pytest.fixture
+def token(db):
+    user = User(email="admin@example.com", hashed_password="x", role=UserRole.ADMIN)
+    db.add(user)
+    db.commit()
+    clear_verified_tokens()
+    get_user_cache().clear()
+    return create_access_token(user.email, claims={"uid": user.id, "role": "ADMIN", "active": True})
+
+
+def test_jose_decode(benchmark, token):
+    benchmark(jwt.decode, token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+
+def test_cached_decode(benchmark, token):
+    benchmark(decode_access_token, token)
+
+
+def test_current_user_uncached(benchmark, db, token, monkeypatch):
+    monkeypatch.setattr(settings, "USER_CACHE_ENABLED", False)
+    benchmark(get_current_user, db, token)
+
+
+def test_current_user_cached(benchmark, db, token):
+    benchmark(get_current_user, db, token)
+
+
+def test_current_user_trusted_claims(benchmark, db, token, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    benchmark(get_current_user, db, token)
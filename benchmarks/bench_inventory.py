@@ -0,0 +1,59 @@
+"""Inventory hot paths against growing reservation tables and cart sizes."""
+import datetime
+import itertools
+
+import pytest
+
+from app.models.models import InventoryReservation, ReservationStatus
+from app.services.inventory import InventoryService
+
+from benchmarks.conftest import seed_catalog, seed_reservations
+
+RESERVATION_COUNTS = [0, 1000, 10000, 100000]
+CART_SIZES = [1, 10, 50]
+BACKLOG_SIZES = [100, 1000, 10000]
+
+
+@pytest.mark.parametrize("reservations", RESERVATION_COUNTS)
+def test_get_available_quantity(benchmark, db, rng, reservations):
+    variant_ids = seed_catalog(db, rng, variants=100)
+    seed_reservations(db, rng, variant_ids, reservations)
+    available = benchmark(InventoryService.get_available_quantity, db, variant_ids[0])
+    assert available >= 0
+
+
+@pytest.mark.parametrize("cart_size", CART_SIZES)
+def test_complete_checkout(benchmark, db, rng, cart_size):
+    variant_ids = seed_catalog(db, rng, variants=max(CART_SIZES))
+    # A background of other carts' holds, as in a busy store
+    seed_reservations(db, rng, variant_ids, 10000, cart_prefix="other")
+    carts = itertools.count()
+
+    def fill_cart():
+        cart_id = f"bench-{next(carts)}"
+        for variant_id in variant_ids[:cart_size]:
+            InventoryService.reserve_inventory(db, variant_id, cart_id, 1)
+        return (db, cart_id), {}
+
+    order = benchmark.pedantic(InventoryService.complete_checkout, setup=fill_cart, rounds=20)
+    assert order.total_amount > 0
+
+
+@pytest.mark.parametrize("backlog", BACKLOG_SIZES)
+def test_cleanup_expired_reservations(benchmark, db, rng, backlog):
+    variant_ids = seed_catalog(db, rng, variants=100)
+    # Live holds that cleanup has to step around
+    seed_reservations(db, rng, variant_ids, 10000, cart_prefix="live")
+    batches = itertools.count()
+
+    def expire_backlog():
+        seed_reservations(db, rng, variant_ids, backlog, cart_prefix=f"expired-{next(batches)}",
+                          expires_in=datetime.timedelta(minutes=-1))
+        return (db,), {}
+
+    result = benchmark.pedantic(InventoryService.cleanup_expired_reservations, setup=expire_backlog, rounds=5)
+    assert result.released == backlog
+    assert db.query(InventoryReservation).filter(
+        InventoryReservation.status == ReservationStatus.PENDING,
+        InventoryReservation.expires_at <= datetime.datetime.utcnow()
+    ).count() == 0
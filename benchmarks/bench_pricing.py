@@ -0,0 +1,47 @@
+"""PricingEngine cost as the number of active rules grows."""
+import pytest
+
+from app.models.models import PricingRule, PricingRuleType
+from app.services.pricing import PricingEngine
+
+RULE_COUNTS = [1, 10, 100, 1000]
+
+
+def make_rules(rng, count: int):
+    """A deterministic mix of rule types, highest priority first."""
+    rules = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            rule = PricingRule(name=f"Bulk {i}", type=PricingRuleType.BULK, parameters={
+                "min_quantity": rng.randint(2, 20), "discount_percentage": rng.randint(1, 10) / 100
+            })
+        elif kind == 1:
+            rule = PricingRule(name=f"Tier {i}", type=PricingRuleType.USER_TIER, parameters={
+                "user_tier": rng.choice(["gold", "silver"]), "discount_percentage": rng.randint(1, 10) / 100
+            })
+        else:
+            rule = PricingRule(name=f"Tiered {i}", type=PricingRuleType.TIERED_BULK, parameters={
+                "tiers": [{"min_quantity": 5, "discount_percentage": 0.02}, {"min_quantity": 50, "discount_percentage": 0.05}]
+            })
+        rule.priority = count - i
+        rules.append(rule)
+    return rules
+
+
+@pytest.fixture(params=RULE_COUNTS, ids=lambda n: f"{n}-rules")
+def plan(request, rng):
+    return PricingEngine().compile_plan(make_rules(rng, request.param), [])
+
+
+def test_calculate_price(benchmark, plan):
+    engine = PricingEngine()
+    context = {"quantity": 10, "user_tier": "gold"}
+    result = benchmark(engine.calculate_price, "249.99", context, plan)
+    assert result.final_price <= result.base_price
+
+
+def test_calculate_final_cents(benchmark, plan):
+    engine = PricingEngine()
+    cents = benchmark(engine.calculate_final_cents, 24999, 10, plan, user_tier="gold")
+    assert cents <= 24999
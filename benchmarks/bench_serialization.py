@@ -0,0 +1,101 @@
+"""
+A 1000-product page (3 variants each), serialized the way FastAPI does for
+`response_model=List[schemas.Product]` versus raw rows through RowEncoder
+and orjson. The `serialize_*` benchmarks take the already-fetched page; the
+`page_*` ones include the queries.
+"""
+from typing import List
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+
+from app.models.models import Category, Product, ProductVariant
+from app.schemas import schemas
+from app.services.money import from_cents
+from app.services.serialization import row_encoder
+
+PAGE = 1000
+VARIANTS = 3
+
+PRODUCTS = TypeAdapter(List[schemas.Product])
+PRODUCT_ENCODER = row_encoder(schemas.Product)
+VARIANT_ENCODER = row_encoder(schemas.Variant)
+
+
+@pytest.fixture
+def catalog(db, rng):
+    category = Category(name="Bench")
+    db.add(category)
+    db.flush()
+    db.execute(insert(Product), [
+        {"name": f"Product {i}", "description": "A product used for serialization benchmarks",
+         "base_price": from_cents(rng.randint(100, 50000)), "category_id": category.id, "handle": f"product-{i}"}
+        for i in range(PAGE)
+    ])
+    db.execute(insert(ProductVariant), [
+        {"product_id": pid, "sku": f"BENCH-{pid}-{n}", "sku_name": f"Option {n}",
+         "price_adjustment": from_cents(rng.randint(0, 5000)), "stock_quantity": rng.randint(0, 500), "reserved_quantity": 0}
+        for (pid,) in db.execute(select(Product.id)) for n in range(VARIANTS)
+    ])
+    db.commit()
+    return db
+
+
+def fetch_models(db):
+    return db.scalars(select(Product).options(selectinload(Product.variants)).order_by(Product.id).limit(PAGE)).all()
+
+
+def fetch_rows(db):
+    product_rows = db.execute(select(*PRODUCT_ENCODER.columns(Product)).order_by(Product.id).limit(PAGE)).all()
+    variant_rows = db.execute(
+        select(*VARIANT_ENCODER.columns(ProductVariant))
+        .where(ProductVariant.product_id.in_([row.id for row in product_rows])).order_by(ProductVariant.id)
+    ).all()
+    return product_rows, variant_rows
+
+
+def encode_rows(product_rows, variant_rows):
+    products = PRODUCT_ENCODER.encode_all(product_rows)
+    variants = {product["id"]: [] for product in products}
+    for row in variant_rows:
+        variant = VARIANT_ENCODER.encode(row)
+        variants[variant["product_id"]].append(variant)
+    for product in products:
+        product["variants"] = variants[product["id"]]
+    return products
+
+
+def render_response_model(models) -> bytes:
+    # FastAPI's serialize_response: validate into models, dump to JSON-able
+    # data, then JSONResponse renders it
+    return JSONResponse(PRODUCTS.dump_python(PRODUCTS.validate_python(models, from_attributes=True), mode="json")).body
+
+
+def render_rows(product_rows, variant_rows) -> bytes:
+    return ORJSONResponse(encode_rows(product_rows, variant_rows)).body
+
+
+def test_serialize_response_model(benchmark, catalog):
+    benchmark(render_response_model, fetch_models(catalog))
+
+
+def test_serialize_raw_rows(benchmark, catalog):
+    rows = fetch_rows(catalog)
+    assert render_rows(*rows) == ORJSONResponse(
+        PRODUCTS.dump_python(PRODUCTS.validate_python(fetch_models(catalog), from_attributes=True), mode="json")
+    ).body
+    benchmark(render_rows, *rows)
+
+
+def test_page_response_model(benchmark, catalog):
+    def page():
+        catalog.expunge_all()
+        return render_response_model(fetch_models(catalog))
+    benchmark(page)
+
+
+def test_page_raw_rows(benchmark, catalog):
+    benchmark(lambda: render_rows(*fetch_rows(catalog)))
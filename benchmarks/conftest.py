@@ -0,0 +1,109 @@
+"""
+Fixtures for the pytest-benchmark suite. Each benchmark gets a freshly
+created, deterministically seeded database: in-memory SQLite by default, or
+whatever BENCH_DATABASE_URL points at (e.g. a local Postgres).
+"""
+import datetime
+import os
+import random
+
+import pytest
+from sqlalchemy import create_engine, insert, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.models import (
+    Base, Category, InventoryReservation, Product, ProductVariant, ReservationStatus
+)
+from app.services.money import from_cents
+
+BENCH_DATABASE_URL = os.environ.get("BENCH_DATABASE_URL", "sqlite://")
+SEED = 20240101
+
+
+@pytest.fixture
+def engine():
+    if BENCH_DATABASE_URL.startswith("sqlite"):
+        engine = create_engine(BENCH_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(BENCH_DATABASE_URL)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    from app.services.categories import category_tree_cache
+    from app.services.pricing import pricing_plan_cache
+    from app.services.search import in_memory_search
+    from app.services.response_cache import get_response_cache
+    from app.services.cart_cache import get_cart_cache
+    category_tree_cache.invalidate()
+    pricing_plan_cache.invalidate()
+    in_memory_search.invalidate()
+    if get_response_cache():
+        get_response_cache().clear()
+    if get_cart_cache():
+        get_cart_cache().clear()
+    yield
+
+
+@pytest.fixture
+def rng():
+    return random.Random(SEED)
+
+
+def seed_catalog(db, rng, variants: int = 100, stock: int = 1_000_000):
+    """One category with `variants` single-variant products. Returns variant ids."""
+    category = Category(name="Bench")
+    db.add(category)
+    db.flush()
+    db.execute(insert(Product), [
+        {"name": f"Product {i}", "base_price": from_cents(rng.randint(100, 50000)), "category_id": category.id}
+        for i in range(variants)
+    ])
+    product_ids = [p.id for p in db.query(Product.id).order_by(Product.id)]
+    db.execute(insert(ProductVariant), [
+        {"product_id": pid, "sku": f"BENCH-{pid}", "sku_name": "Default",
+         "price_adjustment": 0, "stock_quantity": stock, "reserved_quantity": 0}
+        for pid in product_ids
+    ])
+    db.commit()
+    return [v.id for v in db.query(ProductVariant.id).order_by(ProductVariant.id)]
+
+
+def seed_reservations(db, rng, variant_ids, count: int, cart_prefix: str = "cart", expires_in: datetime.timedelta = datetime.timedelta(minutes=15)):
+    """
+    Inserts `count` PENDING reservations spread over `variant_ids` and raises
+    each variant's reserved_quantity to match, as reserve_inventory would.
+    """
+    if not count:
+        return
+    expires_at = datetime.datetime.utcnow() + expires_in
+    rows = [
+        {"variant_id": rng.choice(variant_ids), "cart_id": f"{cart_prefix}-{i}", "quantity": 1,
+         "expires_at": expires_at, "status": ReservationStatus.PENDING}
+        for i in range(count)
+    ]
+    db.execute(insert(InventoryReservation), rows)
+    reserved = {}
+    for row in rows:
+        reserved[row["variant_id"]] = reserved.get(row["variant_id"], 0) + 1
+    for variant_id, quantity in reserved.items():
+        db.execute(
+            update(ProductVariant).where(ProductVariant.id == variant_id)
+            .values(reserved_quantity=ProductVariant.reserved_quantity + quantity)
+        )
+    db.commit()
@@ -0,0 +1,51 @@
+"""
+Cart contention load profile. Shoppers repeatedly hold and release a unit of
+a small set of hot variants, so reservations race on the same rows; a few
+also check out. Run against a seeded server:
+
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 \
+        --headless -u 200 -r 20 -t 2m --json > cart_contention.json
+
+BENCH_HOT_VARIANTS (default "1") lists the contended variant ids.
+"""
+import os
+import random
+import uuid
+
+from locust import HttpUser, between, task
+
+HOT_VARIANTS = [int(v) for v in os.environ.get("BENCH_HOT_VARIANTS", "1").split(",")]
+
+
+class Shopper(HttpUser):
+    wait_time = between(0.05, 0.5)
+
+    def on_start(self):
+        self.cart_id = f"load-{uuid.uuid4().hex}"
+
+    def _add(self, variant_id: int):
+        # 400 means out of stock, which is an expected outcome under contention
+        with self.client.post("/api/v1/cart/add", json={
+            "variant_id": variant_id, "quantity": 1, "cart_id": self.cart_id
+        }, name="/cart/add", catch_response=True) as response:
+            if response.status_code in (200, 400):
+                response.success()
+            return response.status_code == 200
+
+    @task(10)
+    def add_and_remove(self):
+        variant_id = random.choice(HOT_VARIANTS)
+        if self._add(variant_id):
+            self.client.delete("/api/v1/cart/remove", params={
+                "cart_id": self.cart_id, "variant_id": variant_id
+            }, name="/cart/remove")
+
+    @task(1)
+    def add_and_checkout(self):
+        if self._add(random.choice(HOT_VARIANTS)):
+            self.client.post("/api/v1/cart/checkout", json={"cart_id": self.cart_id}, name="/cart/checkout")
+        self.cart_id = f"load-{uuid.uuid4().hex}"
+
+    @task(3)
+    def price(self):
+        self.client.get("/api/v1/products/1/price", params={"quantity": random.randint(1, 10)}, name="/products/[id]/price")
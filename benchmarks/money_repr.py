@@ -0,0 +1,94 @@
+"""
+Cost of the money representation in pricing and revenue arithmetic.
+
+Prices a set of random amounts through a chain of percentage discounts and
+sums quantity * unit price, once each with floats, decimal.Decimal, integer
+cents in a Python loop, and integer cents as numpy int64 arrays. Also counts
+how many float results disagree with the exact answer at cent precision.
+
+    python -m benchmarks.money_repr --items 200000
+"""
+import argparse
+import random
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+
+from app.services.money import apply_rate, apply_rate_array, from_cents, to_basis_points
+
+CENTS = Decimal("0.01")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.15, 0.075, 0.1])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cents = [rng.randint(1, 500000) for _ in range(args.items)]
+    quantities = [rng.randint(1, 5) for _ in range(args.items)]
+    floats = [c / 100 for c in cents]
+    decimals = [from_cents(c) for c in cents]
+    basis_points = [to_basis_points(r) for r in args.rates]
+    rate_decimals = [Decimal(str(r)) for r in args.rates]
+
+    def price_float():
+        out = []
+        for price in floats:
+            for rate in args.rates:
+                price = round(price - round(price * rate, 2), 2)
+            out.append(price)
+        return out
+
+    def price_decimal():
+        out = []
+        for price in decimals:
+            for rate in rate_decimals:
+                price -= (price * rate).quantize(CENTS, rounding=ROUND_HALF_UP)
+            out.append(price)
+        return out
+
+    def price_cents():
+        out = []
+        for price in cents:
+            for bp in basis_points:
+                price -= apply_rate(price, bp)
+            out.append(price)
+        return out
+
+    def price_numpy():
+        prices = np.asarray(cents, dtype=np.int64)
+        for bp in basis_points:
+            prices = prices - apply_rate_array(prices, bp)
+        return prices
+
+    print(f"{'representation':>16} {'discount chain':>15} {'revenue sum':>12}")
+    exact, _ = timed(price_cents)
+    for label, price, total in [
+        ("float", price_float, lambda: sum(q * p for q, p in zip(quantities, floats))),
+        ("Decimal", price_decimal, lambda: sum(q * p for q, p in zip(quantities, decimals))),
+        ("int cents", price_cents, lambda: sum(q * c for q, c in zip(quantities, cents))),
+        ("numpy int64", price_numpy, lambda: int(np.dot(np.asarray(quantities, dtype=np.int64), np.asarray(cents, dtype=np.int64)))),
+    ]:
+        _, price_seconds = timed(price)
+        _, total_seconds = timed(total)
+        print(f"{label:>16} {price_seconds * 1000:>12.1f} ms {total_seconds * 1000:>9.1f} ms")
+
+    floats_off = sum(1 for f, c in zip(price_float(), exact) if round(f * 100) != c)
+    float_total = sum(q * p for q, p in zip(quantities, floats))
+    exact_total = sum(q * c for q, c in zip(quantities, cents))
+    print(f"\nfloat discount chains off by a cent: {floats_off} of {args.items}")
+    print(f"float revenue sum: {float_total!r} (exact {from_cents(exact_total)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models.models import Base
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    from app.services.categories import category_tree_cache
+    from app.services.pricing import pricing_plan_cache
+    from app.services.search import in_memory_search
+    from app.services.response_cache import get_response_cache
+    from app.services.cart_cache import get_cart_cache
+    from app.services.user_cache import get_user_cache
+    category_tree_cache.invalidate()
+    pricing_plan_cache.invalidate()
+    in_memory_search.invalidate()
+    if get_response_cache():
+        get_response_cache().clear()
+    if get_cart_cache():
+        get_cart_cache().clear()
+    if get_user_cache():
+        get_user_cache().clear()
+    yield
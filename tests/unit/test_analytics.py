@@ -0,0 +1,69 @@
+import datetime
+import pytest
+from app.models.models import (
+    Category, CategorySalesDaily, Order, OrderItem, Product, ProductVariant, VariantSalesDaily
+)
+from app.services.analytics import AnalyticsService
+
+DAY_ONE = datetime.datetime(2026, 1, 1, 12)
+DAY_TWO = datetime.datetime(2026, 1, 2, 12)
+
+
+@pytest.fixture
+def variant(db):
+    category = Category(name="Laptops")
+    db.add(category)
+    db.flush()
+    product = Product(name="MacBook Pro", base_price=2000.0, category_id=category.id)
+    db.add(product)
+    db.flush()
+    variant = ProductVariant(product_id=product.id, sku="MBP", sku_name="M3", stock_quantity=10)
+    db.add(variant)
+    db.commit()
+    return variant
+
+
+def _order(db, variant, created_at, quantity, unit_price, order_id=None, item_id=None):
+    order = Order(id=order_id, cart_id="cart", total_amount=quantity * unit_price, created_at=created_at)
+    db.add(order)
+    db.flush()
+    db.add(OrderItem(id=item_id, order_id=order.id, variant_id=variant.id, quantity=quantity, unit_price=unit_price))
+    db.commit()
+
+
+def _rollups(db):
+    return (
+        sorted((r.day, r.quantity_sold, r.revenue) for r in db.query(VariantSalesDaily)),
+        sorted((r.day, r.quantity_sold, r.revenue) for r in db.query(CategorySalesDaily)),
+    )
+
+
+def test_refresh_is_incremental_and_matches_rebuild(db, variant):
+    _order(db, variant, DAY_ONE, 1, 100.0)
+    _order(db, variant, DAY_ONE, 2, 100.0)
+    assert AnalyticsService.refresh_rollups(db, batch_size=1) == 2
+
+    _order(db, variant, DAY_TWO, 3, 50.0)
+    assert AnalyticsService.refresh_rollups(db) == 1
+    assert AnalyticsService.refresh_rollups(db) == 0
+
+    incremental = _rollups(db)
+    assert incremental[0] == [(DAY_ONE.date(), 3, 300.0), (DAY_TWO.date(), 3, 150.0)]
+    assert incremental[1] == incremental[0]
+
+    assert AnalyticsService.rebuild_rollups(db) == 3
+    assert _rollups(db) == incremental
+
+
+def test_refresh_counts_a_checkout_that_commits_late(db, variant):
+    _order(db, variant, DAY_TWO, 1, 100.0, order_id=10, item_id=10)
+    assert AnalyticsService.refresh_rollups(db) == 1
+
+    # A stalled checkout commits long after its rows were created, with ids
+    # below everything already rolled up
+    _order(db, variant, DAY_ONE, 2, 100.0, order_id=5, item_id=5)
+    assert AnalyticsService.refresh_rollups(db) == 1
+    assert AnalyticsService.refresh_rollups(db) == 0
+
+    assert _rollups(db)[0] == [(DAY_ONE.date(), 2, 200.0), (DAY_TWO.date(), 1, 100.0)]
+    assert db.query(Order).filter(Order.rolled_up.is_(False)).count() == 0
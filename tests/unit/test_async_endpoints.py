@@ -0,0 +1,128 @@
+import datetime
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.main import app
+from app.db.database import get_async_db, get_async_read_db
+from app.services.analytics import AnalyticsService
+from app.models.models import (
+    Base, Category, Order, OrderItem, PricingRule, PricingRuleType, Product, ProductVariant, Promotion
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as db:
+        laptops = Category(name="Laptops")
+        db.add(laptops)
+        await db.flush()
+        product = Product(name="MacBook Pro", description="High-end laptop", base_price=2000.0, category_id=laptops.id)
+        db.add(product)
+        db.add_all([Product(name=f"Accessory {i}", base_price=10.0 + i, category_id=laptops.id) for i in range(4)])
+        await db.flush()
+        variant = ProductVariant(product_id=product.id, sku="MBP", sku_name="M3", price_adjustment=500.0, stock_quantity=3)
+        order = Order(cart_id="cart-1", total_amount=2500.0)
+        db.add_all([variant, order])
+        await db.flush()
+        db.add_all([
+            OrderItem(order_id=order.id, variant_id=variant.id, quantity=1, unit_price=2500.0),
+            PricingRule(name="Bulk", type=PricingRuleType.BULK, priority=1,
+                        parameters={"min_quantity": 5, "discount_percentage": 0.1}),
+            Promotion(name="Launch", start_date=datetime.datetime(2020, 1, 1),
+                      end_date=datetime.datetime(2020, 2, 1), discount_percentage=0.2),
+        ])
+        await db.commit()
+        await db.run_sync(lambda session: AnalyticsService.rebuild_rollups(session))
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override
+    app.dependency_overrides[get_async_read_db] = override
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.pop(get_async_db, None)
+    app.dependency_overrides.pop(get_async_read_db, None)
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_read_endpoints_run_on_async_session(client: AsyncClient):
+    products = (await client.get("/api/v1/products/", params={"q": "mac"})).json()
+    assert products[0]["variants"][0]["sku"] == "MBP"
+
+    price = (await client.get("/api/v1/products/1/price", params={"quantity": 5})).json()
+    assert price["final_price"] == 1800.0
+
+    assert [c["name"] for c in (await client.get("/api/v1/categories/")).json()] == ["Laptops"]
+    assert (await client.get("/api/v1/categories/tree")).json() == [
+        {"id": 1, "name": "Laptops", "parent_id": None, "children": []}
+    ]
+    assert (await client.get("/api/v1/promotions/")).json()[0]["name"] == "Launch"
+    assert (await client.get("/api/v1/orders/")).json()[0]["items"][0]["unit_price"] == 2500.0
+    assert (await client.get("/api/v1/inventory/low-stock")).json()[0]["sku"] == "MBP"
+    assert (await client.get("/api/v1/inventory/top-selling")).json() == [{"sku": "MBP", "name": "M3", "total_sold": 1}]
+    assert (await client.get("/api/v1/inventory/revenue-by-category")).json() == [
+        {"category": "Laptops", "total_revenue": 2500.0}
+    ]
+
+    tomorrow = (datetime.date.today() + datetime.timedelta(days=1)).isoformat()
+    assert (await client.get("/api/v1/inventory/top-selling", params={"start_date": tomorrow})).json() == []
+    assert (await client.get("/api/v1/inventory/revenue-by-category", params={"end_date": tomorrow})).json()[0]["total_revenue"] == 2500.0
+
+
+@pytest.mark.anyio
+async def test_products_keyset_pagination_and_projection(client: AsyncClient):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "name"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/products/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert all(set(row) == {"id", "name"} for row in page)
+        seen.extend(row["id"] for row in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [1, 2, 3, 4, 5]
+    assert (await client.get("/api/v1/products/", params={"fields": "variants"})).status_code == 400
+    assert (await client.get("/api/v1/products/", params={"cursor": "not-a-cursor"})).status_code == 400
+    for path in ("/api/v1/products/", "/api/v1/promotions/", "/api/v1/orders/"):
+        for params in ({"limit": 0}, {"limit": -1}, {"limit": 100000}, {"skip": -1}):
+            assert (await client.get(path, params=params)).status_code == 422
+
+
+@pytest.mark.anyio
+async def test_product_search_ranks_and_prefix_matches(client: AsyncClient):
+    hits = (await client.get("/api/v1/products/search", params={"q": "lap"})).json()
+    assert [p["name"] for p in hits] == ["MacBook Pro"]
+
+    hits = (await client.get("/api/v1/products/search", params={"q": "acc 2"})).json()
+    assert [p["name"] for p in hits] == ["Accessory 2"]
+
+    listed = (await client.get("/api/v1/products/", params={"q": "accessory", "limit": 2})).json()
+    assert [p["name"] for p in listed] == ["Accessory 0", "Accessory 1"]
+
+
+@pytest.mark.anyio
+async def test_raw_row_listing_matches_the_response_model(client: AsyncClient):
+    # /search still serializes ORM objects through schemas.Product
+    listed = (await client.get("/api/v1/products/", params={"q": "mac"})).json()
+    searched = (await client.get("/api/v1/products/search", params={"q": "mac"})).json()
+    assert listed == searched
+    assert listed[0]["base_price"] == 2000.0 and listed[0]["variants"][0]["price_adjustment"] == 500.0
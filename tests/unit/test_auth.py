@@ -0,0 +1,141 @@
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from httpx import AsyncClient
+from passlib.context import CryptContext
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from app.core.config import settings
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy, shutdown_password_hasher
+from app.core.security import create_access_token, decode_access_token, verify_password
+from app.db.database import get_async_db, get_db
+from app.main import app
+from app.models.models import Base, User, UserRole
+from app.services.user_cache import AuthUser, UserCache
+
+
+def make_user(db, role=UserRole.ADMIN):
+    user = User(email="ops@example.com", hashed_password="x", full_name="Ops", role=role)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_warm_requests_skip_the_user_query_until_the_user_changes(db, engine):
+    user = make_user(db)
+    token = create_access_token(user.email, claims={"uid": user.id, "role": "ADMIN", "active": True})
+    assert decode_access_token(token)["role"] == "ADMIN"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        assert client.get("/api/v1/auth/me", headers=headers).json()["email"] == user.email
+        statements = count_queries(engine)
+        assert client.get("/api/v1/diagnostics/pool", headers=headers).status_code == 200
+        assert statements == []
+
+        user.is_active = False
+        db.commit()
+        assert client.get("/api/v1/auth/me", headers=headers).json() == {"detail": "Inactive user"}
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_trusted_claims_authorize_without_a_lookup(db, engine, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    token = create_access_token("ghost@example.com", claims={"uid": 7, "role": "USER", "active": True})
+    statements = count_queries(engine)
+
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        response = client.get("/api/v1/diagnostics/pool", headers={"Authorization": f"Bearer {token}"})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    assert response.status_code == 403
+    assert statements == []
+
+
+def test_redis_tier_is_shared_and_invalidated():
+    client = fakeredis.FakeRedis()
+    first, second = UserCache(10, 30, client), UserCache(10, 30, client)
+    user = AuthUser(id=1, email="a@example.com", full_name=None, is_active=True, role=UserRole.USER)
+
+    first.put(user)
+    assert second.get("a@example.com") == user
+    first.invalidate("a@example.com")
+    second.clear()
+    assert second.get("a@example.com") is None
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def async_session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override
+    yield session_factory
+    app.dependency_overrides.pop(get_async_db, None)
+    await engine.dispose()
+    shutdown_password_hasher()
+
+
+@pytest.mark.anyio
+async def test_login_rehashes_passwords_made_with_an_old_cost(async_session_factory):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret")
+    async with async_session_factory() as db:
+        db.add(User(email="old@example.com", hashed_password=old_hash, role=UserRole.USER))
+        await db.commit()
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/auth/login", data={"username": "old@example.com", "password": "s3cret"})
+        assert response.status_code == 200
+        wrong = await client.post("/api/v1/auth/login", data={"username": "old@example.com", "password": "nope"})
+        assert wrong.status_code == 400
+
+    async with async_session_factory() as db:
+        user = (await db.execute(select(User))).scalar_one()
+    assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert verify_password("s3cret", user.hashed_password)
+
+
+@pytest.mark.anyio
+async def test_saturated_hasher_answers_429(async_session_factory, monkeypatch):
+    hasher = PasswordHasher(workers=1, queue_depth=0)
+    monkeypatch.setattr("app.services.user.get_password_hasher", lambda: hasher)
+    try:
+        running = hasher.submit("hash", "first")
+        with pytest.raises(PasswordHasherBusy):
+            hasher.submit("hash", "second")
+
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/api/v1/auth/register", json={"email": "new@example.com", "password": "pw"})
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+        running.result()
+        async with AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.post("/api/v1/auth/register", json={"email": "new@example.com", "password": "pw"})
+        assert response.status_code == 200
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,113 @@
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.config import settings
+from app.db.database import get_db
+from app.main import app
+from app.models.models import Category, PricingRule, PricingRuleType, Product, ProductVariant
+from app.services.cart import CartService
+from app.services.cart_cache import CartAggregate, CartCache, CartHold
+from app.services.inventory import InventoryService
+from app.services.pricing import pricing_plan_cache
+
+
+@pytest.fixture(autouse=True)
+def cart_cache_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "CART_CACHE_ENABLED", True)
+
+
+@pytest.fixture
+def variants(db):
+    category = Category(name="Laptops")
+    db.add(category)
+    db.flush()
+    product = Product(name="MacBook Pro", base_price=2000.0, category_id=category.id)
+    db.add(product)
+    db.flush()
+    variants = [
+        ProductVariant(product_id=product.id, sku="MBP-M3", sku_name="M3", price_adjustment=500.0, stock_quantity=10),
+        ProductVariant(product_id=product.id, sku="MBP-M2", sku_name="M2", stock_quantity=10),
+    ]
+    db.add_all(variants)
+    db.add(PricingRule(name="Bulk", type=PricingRuleType.BULK, priority=1,
+                       parameters={"min_quantity": 5, "discount_percentage": 0.1}))
+    db.commit()
+    return variants
+
+
+def test_cart_read_model_follows_cart_writes(db, engine, variants):
+    m3, m2 = variants
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        client.post("/api/v1/cart/add", json={"cart_id": "c1", "variant_id": m3.id, "quantity": 2})
+        client.post("/api/v1/cart/add", json={"cart_id": "c1", "variant_id": m2.id, "quantity": 1})
+        cart = client.get("/api/v1/cart/c1").json()
+        assert [(line["sku"], line["quantity"], line["total"]) for line in cart["lines"]] == [
+            ("MBP-M3", 2, 5000.0), ("MBP-M2", 1, 2000.0)
+        ]
+        assert cart["lines"][0]["available"] == 8
+        assert (cart["item_count"], cart["total"], cart["discount"]) == (3, 7000.0, 0.0)
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        client.put("/api/v1/cart/update", json={"cart_id": "c1", "variant_id": m3.id, "quantity": 5})
+        statements.clear()
+        cart = client.get("/api/v1/cart/c1").json()
+        assert not any("inventory_reservations" in statement for statement in statements)
+        assert cart["lines"][0]["quantity"] == 5
+        assert cart["lines"][0]["total"] == 11250.0
+        assert cart["discount"] == 1250.0
+
+        client.delete("/api/v1/cart/remove", params={"cart_id": "c1", "variant_id": m2.id})
+        assert [line["sku"] for line in client.get("/api/v1/cart/c1").json()["lines"]] == ["MBP-M3"]
+
+        client.post("/api/v1/cart/checkout", json={"cart_id": "c1"})
+        assert client.get("/api/v1/cart/c1").json()["lines"] == []
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_expired_holds_and_plan_changes_apply_on_read(db, variants):
+    m3, _ = variants
+    assert CartService.get_cart(db, "c2")["lines"] == []
+    InventoryService.reserve_inventory(db, m3.id, "c2", 5, duration_minutes=0)
+    InventoryService.reserve_inventory(db, m3.id, "c2", 1)
+
+    cart = CartService.get_cart(db, "c2")
+    assert cart["lines"][0]["quantity"] == 1 and cart["total"] == 2500.0
+
+    db.query(PricingRule).update({"parameters": {"min_quantity": 1, "discount_percentage": 0.2}})
+    db.commit()
+    pricing_plan_cache.invalidate()
+    assert CartService.get_cart(db, "c2")["total"] == 2000.0
+
+
+def test_redis_tier_refuses_stale_rebuilds():
+    client = fakeredis.FakeRedis()
+    first, second = CartCache(10, 60, client), CartCache(10, 60, client)
+
+    aggregate, generation = first.get("c3")
+    assert aggregate is None
+    second.update("c3", lambda cart: cart.add_hold(1, CartHold("t1", 1, 2e9)))
+    assert not first.put(CartAggregate("c3"), generation)
+
+    aggregate, generation = first.get("c3")
+    assert first.put(CartAggregate("c3", {}), generation)
+    second.update("c3", lambda cart: cart.add_hold(1, CartHold("t1", 2, 2e9)))
+    assert first.get("c3")[0].lines[1].quantity == 2
+
+
+def test_rebuild_between_commit_and_cart_update_does_not_double_the_hold(db, variants, monkeypatch):
+    m3, _ = variants
+    deferred = []
+    record_hold = InventoryService._record_hold
+    monkeypatch.setattr(InventoryService, "_record_hold", staticmethod(lambda *args: deferred.append(args)))
+
+    InventoryService.reserve_inventory(db, m3.id, "c4", 2)
+    # A read lands after the commit but before the aggregate is patched
+    assert CartService.get_cart(db, "c4")["lines"][0]["quantity"] == 2
+    record_hold(*deferred[0])
+
+    assert CartService.get_cart(db, "c4")["lines"][0]["quantity"] == 2
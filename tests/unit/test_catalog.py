@@ -0,0 +1,117 @@
+import io
+import json
+import sqlite3
+from fastapi.testclient import TestClient
+from app.api import deps
+from app.db.database import get_db
+from app.main import app
+from app.models.models import Category, Product, ProductVariant, StockMovement
+from app.services.catalog import CatalogService
+
+
+def row(**overrides):
+    data = {
+        "product_handle": "tee", "name": "T-Shirt", "description": "Cotton", "base_price": 20,
+        "category_id": 1, "sku": "TEE-S", "sku_name": "Small", "stock_quantity": 5
+    }
+    data.update(overrides)
+    return json.dumps(data)
+
+
+def test_ndjson_import_upserts_in_chunks_and_reports_bad_rows(db):
+    db.add(Category(name="Apparel"))
+    db.commit()
+    feed = "\n".join([
+        row(),
+        row(sku="TEE-M", sku_name="Medium", price_adjustment="1.50"),
+        "{not json",
+        row(sku="BAD", base_price=None),
+        row(product_handle="mug", name="Mug", sku="MUG-1", sku_name="White", category_id=99),
+        "",
+        row(product_handle="cap", name="Cap", sku="CAP-1", sku_name="One size", base_price="12.99"),
+    ])
+
+    report = CatalogService.import_stream(db, io.StringIO(feed), "ndjson", chunk_size=2)
+
+    assert (report.rows, report.created, report.updated, report.error_count) == (6, 3, 0, 3)
+    assert [error["line"] for error in report.errors] == [3, 4, 5]
+    assert report.errors[1]["sku"] == "BAD" and report.errors[1]["errors"][0].startswith("base_price")
+    assert "does not exist" in report.errors[2]["errors"][0]
+
+    tee = db.query(Product).filter(Product.handle == "tee").one()
+    assert sorted(v.sku for v in tee.variants) == ["TEE-M", "TEE-S"]
+    assert str(db.query(ProductVariant).filter(ProductVariant.sku == "TEE-M").one().price_adjustment) == "1.50"
+
+    # Re-importing updates in place; the later row for a SKU wins
+    report = CatalogService.import_stream(db, io.StringIO("\n".join([
+        row(stock_quantity=1), row(stock_quantity=7, name="Tee")
+    ])), "ndjson")
+    db.expire_all()
+    assert (report.created, report.updated) == (0, 1)
+    assert db.query(Product).count() == 2
+    variant = db.query(ProductVariant).filter(ProductVariant.sku == "TEE-S").one()
+    assert variant.stock_quantity == 7 and variant.product.name == "Tee"
+
+    # Stock set by the feed is on the ledger; unchanged stock adds no movement
+    CatalogService.import_stream(db, io.StringIO(row(stock_quantity=7)), "ndjson")
+    movements = db.query(StockMovement).filter(StockMovement.variant_id == variant.id).order_by(StockMovement.id).all()
+    assert [(m.quantity_change, m.stock_after, m.reason) for m in movements] == [
+        (5, 5, "catalog_import"), (2, 7, "catalog_import")
+    ]
+
+
+def test_csv_export_round_trips_through_the_endpoints(db):
+    category = Category(name="Apparel")
+    db.add(category)
+    db.flush()
+    product = Product(name="Rain Jacket!", base_price=80, category_id=category.id)
+    db.add(product)
+    db.flush()
+    assert product.handle.startswith("rain-jacket-")
+    db.add_all([
+        ProductVariant(product_id=product.id, sku=f"RJ-{i}", sku_name=f"Size {i}", stock_quantity=i)
+        for i in range(3)
+    ])
+    db.commit()
+
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[deps.get_current_active_admin] = lambda: None
+    try:
+        client = TestClient(app)
+        exported = client.get("/api/v1/products/export", params={"format": "csv"})
+        imported = client.post("/api/v1/products/import", content=exported.content, headers={"Content-Type": "text/csv"})
+        ndjson = client.get("/api/v1/products/export")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(deps.get_current_active_admin, None)
+
+    assert exported.status_code == 200
+    lines = exported.text.splitlines()
+    assert lines[0].startswith("product_handle,name,description,base_price") and len(lines) == 4
+    assert imported.json() == {"rows": 3, "created": 0, "updated": 3, "error_count": 0, "errors": []}
+    records = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [r["sku"] for r in records] == ["RJ-0", "RJ-1", "RJ-2"]
+    assert records[0]["base_price"] == 80.0 and records[0]["description"] is None
+
+
+def test_a_chunk_rejected_by_the_driver_is_reported_and_later_chunks_import(db, monkeypatch):
+    db.add(Category(name="Apparel"))
+    db.commit()
+    upsert = CatalogService._upsert_generic
+    calls = []
+
+    def fail_first(db, products, variants):
+        calls.append(list(variants))
+        if len(calls) == 1:
+            # What a failed COPY raises: a bare DBAPI error, not a SQLAlchemy one
+            raise sqlite3.OperationalError("COPY rejected")
+        upsert(db, products, variants)
+    monkeypatch.setattr(CatalogService, "_upsert_generic", staticmethod(fail_first))
+
+    report = CatalogService.import_stream(db, io.StringIO("\n".join([
+        row(), row(sku="TEE-M", sku_name="Medium")
+    ])), "ndjson", chunk_size=1)
+
+    assert (report.created, report.error_count) == (1, 1)
+    assert report.errors == [{"line": 1, "sku": "TEE-S", "errors": ["Chunk rejected by the database: OperationalError"]}]
+    assert [v.sku for v in db.query(ProductVariant)] == ["TEE-M"]
@@ -0,0 +1,73 @@
+import datetime
+from app.models.models import Category, Promotion
+from app.services import categories
+from app.services.categories import CategoryTreeCache, category_tree_cache, load_category_tree
+from app.services.pricing import PricingEngine
+from app.services.products import CategoryService
+
+
+def _seed(db):
+    electronics = Category(name="Electronics")
+    db.add(electronics)
+    db.flush()
+    computers = Category(name="Computers", parent_id=electronics.id)
+    phones = Category(name="Phones", parent_id=electronics.id)
+    db.add_all([computers, phones])
+    db.flush()
+    laptops = Category(name="Laptops", parent_id=computers.id)
+    db.add(laptops)
+    db.commit()
+    return electronics, computers, phones, laptops
+
+
+def test_tree_ancestors_and_descendants(db):
+    electronics, computers, phones, laptops = _seed(db)
+    tree = load_category_tree(db)
+
+    assert tree.ancestors(laptops.id) == [laptops.id, computers.id, electronics.id]
+    assert tree.descendants(computers.id) == [computers.id, laptops.id]
+    assert set(tree.descendants(electronics.id)) == {electronics.id, computers.id, phones.id, laptops.id}
+    assert tree.is_within(laptops.id, electronics.id) and not tree.is_within(laptops.id, phones.id)
+    assert [node["name"] for node in tree.as_nested()[0]["children"]] == ["Computers", "Phones"]
+
+
+def test_category_writes_invalidate_cached_tree(db):
+    electronics, *_ = _seed(db)
+    assert [n["name"] for n in CategoryService.get_category_tree(db)] == ["Electronics"]
+
+    CategoryService.create_category(db, {"name": "Books", "parent_id": None})
+    assert [n["name"] for n in CategoryService.get_category_tree(db)] == ["Electronics", "Books"]
+    assert category_tree_cache.get(db) is category_tree_cache.get(db)
+
+
+def test_cached_tree_expires_after_its_ttl(db, monkeypatch):
+    _seed(db)
+    cache = CategoryTreeCache(ttl_seconds=60)
+    tree = cache.get(db)
+
+    # Another worker's write: nothing invalidates this process's copy
+    db.add(Category(name="Books"))
+    db.commit()
+    assert cache.get(db) is tree
+
+    now = categories.time.monotonic()
+    monkeypatch.setattr(categories.time, "monotonic", lambda: now + 61)
+    assert "Books" in cache.get(db).names.values()
+
+
+def test_promotions_apply_across_subtrees(db):
+    electronics, computers, phones, laptops = _seed(db)
+    now = datetime.datetime.utcnow()
+    db.add(Promotion(name="Tech Week", start_date=now - datetime.timedelta(days=1),
+                     end_date=now + datetime.timedelta(days=1), discount_percentage=0.1,
+                     target_category_id=computers.id))
+    db.commit()
+    engine = PricingEngine()
+    plan = engine.load_plan(db)
+
+    assert [p.name for p in plan.promotions_for(laptops.id)] == ["Tech Week"]
+    assert plan.promotions_for(phones.id) == []
+    assert plan.promotions_for(electronics.id) == []
+
+    batch = engine.calculate_prices_batch([10000] * 3, [1] * 3, plan, category_ids=[laptops.id, phones.id, computers.id])
+    assert batch.final_cents.tolist() == [9000, 10000, 9000]
@@ -0,0 +1,178 @@
+import datetime
+import pytest
+from app.models.models import (
+    Category, Product, ProductVariant, InventoryReservation, ReservationStatus, StockMovement
+)
+from app.services.idempotency import IdempotencyKeyReused
+from app.services.inventory import InventoryService
+
+
+@pytest.fixture
+def variant(db):
+    category = Category(name="Laptops")
+    db.add(category)
+    db.flush()
+    product = Product(name="MacBook Pro", base_price=2000.0, category_id=category.id)
+    db.add(product)
+    db.flush()
+    variant = ProductVariant(product_id=product.id, sku="MBP", sku_name="M3", stock_quantity=10)
+    db.add(variant)
+    db.commit()
+    return variant
+
+
+def test_reserve_and_release_maintain_counter(db, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 4)
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 3)
+    assert InventoryService.get_available_quantity(db, variant.id) == 3
+
+    with pytest.raises(Exception, match="Not enough"):
+        InventoryService.reserve_inventory(db, variant.id, "cart-3", 4)
+
+    assert InventoryService.release_reservations(db, "cart-1", variant.id) == 4
+    assert InventoryService.get_available_quantity(db, variant.id) == 7
+
+
+def test_expired_holds_are_released_on_shortage(db, variant):
+    reservation = InventoryService.reserve_inventory(db, variant.id, "cart-1", 8)
+    reservation.expires_at = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+    db.commit()
+
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 5)
+
+    db.refresh(reservation)
+    assert reservation.status == ReservationStatus.RELEASED
+    assert InventoryService.get_available_quantity(db, variant.id) == 5
+
+
+def test_checkout_and_cleanup_keep_counter_in_sync(db, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 2)
+    expired = InventoryService.reserve_inventory(db, variant.id, "cart-2", 3)
+    expired.expires_at = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+    db.commit()
+
+    InventoryService.complete_checkout(db, "cart-1")
+    InventoryService.cleanup_expired_reservations(db)
+
+    db.refresh(variant)
+    assert variant.stock_quantity == 8
+    assert variant.reserved_quantity == 0
+    assert InventoryService.reconcile_reserved_quantities(db) == []
+
+
+def test_reconcile_repairs_drift(db, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 2)
+    db.add(InventoryReservation(variant_id=variant.id, cart_id="cart-2", quantity=5,
+                                expires_at=datetime.datetime.utcnow() + datetime.timedelta(minutes=15),
+                                status=ReservationStatus.PENDING))
+    db.commit()
+
+    assert InventoryService.reconcile_reserved_quantities(db) == [
+        {"variant_id": variant.id, "recorded": 2, "actual": 7}
+    ]
+    assert InventoryService.get_available_quantity(db, variant.id) == 3
+
+
+def test_cleanup_releases_in_chunks(db, engine, variant):
+    from sqlalchemy import event
+    past = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+    for i in range(5):
+        reservation = InventoryService.reserve_inventory(db, variant.id, f"cart-{i}", 1)
+        reservation.expires_at = past
+    InventoryService.reserve_inventory(db, variant.id, "cart-live", 2)
+    db.commit()
+
+    result = InventoryService.cleanup_expired_reservations(db, chunk_size=2)
+
+    assert result.released == 5
+    assert result.batches == 3
+    assert result.variant_ids == [variant.id]
+    assert InventoryService.get_available_quantity(db, variant.id) == 8
+
+    def cleanup_statements(variants):
+        for i, v in enumerate(variants):
+            reservation = InventoryService.reserve_inventory(db, v.id, f"expired-{v.id}-{i}", 1)
+            reservation.expires_at = past
+        db.commit()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert InventoryService.cleanup_expired_reservations(db, chunk_size=10).released == len(variants)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return len(statements)
+
+    # Statements per chunk do not grow with the number of variants released
+    others = [ProductVariant(product_id=variant.product_id, sku=f"SKU-{i}", sku_name=str(i), stock_quantity=5) for i in range(5)]
+    db.add_all(others)
+    db.commit()
+    assert cleanup_statements([others[0], others[1]]) == cleanup_statements(others)
+    for v in others:
+        db.refresh(v)
+        assert v.reserved_quantity == 0
+
+
+def test_checkout_round_trips_do_not_grow_with_cart_size(db, engine, variant):
+    from sqlalchemy import event
+    product_id = variant.product_id
+    variants = [ProductVariant(product_id=product_id, sku=f"SKU-{i}", sku_name=str(i), stock_quantity=5) for i in range(20)]
+    db.add_all(variants)
+    db.commit()
+
+    def checkout_statements(cart_id, lines):
+        for v in lines:
+            InventoryService.reserve_inventory(db, v.id, cart_id, 1)
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            InventoryService.complete_checkout(db, cart_id)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        return len(statements)
+
+    # Warm the pricing plan so it isn't counted against the first cart
+    InventoryService.reserve_inventory(db, variant.id, "warm-up", 1)
+    InventoryService.complete_checkout(db, "warm-up")
+
+    small = checkout_statements("small", variants[:2])
+    large = checkout_statements("large", variants[2:])
+    assert small == large
+
+    for v in variants:
+        db.refresh(v)
+        assert (v.stock_quantity, v.reserved_quantity) == (4, 0)
+
+
+def test_bulk_stock_adjustments_fold_log_and_replay(db, variant):
+    db.add(ProductVariant(product_id=variant.product_id, sku="MBP-2", sku_name="M3 Max", stock_quantity=2))
+    db.commit()
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 4)
+
+    adjustments = [
+        ("MBP", "delta", -3), ("MBP", "delta", 5),   # folds to +2 on 10
+        ("MBP-2", "absolute", 20), ("MBP-2", "delta", -1),
+        ("NOPE", "delta", 1),
+    ]
+    result = InventoryService.apply_stock_adjustments(db, adjustments, reason="cycle count", idempotency_key="k1")
+
+    assert result["replayed"] is False
+    assert [(r["sku"], r["stock_quantity"], r["available_quantity"]) for r in result["applied"]] == [
+        ("MBP", 12, 8), ("MBP-2", 19, 19)
+    ]
+    assert result["errors"] == [{"sku": "NOPE", "error": "Unknown SKU"}]
+    db.expire_all()
+    assert InventoryService.get_available_quantity(db, variant.id) == 8
+    movements = db.query(StockMovement).order_by(StockMovement.variant_id).all()
+    assert [(m.quantity_change, m.stock_after, m.reason) for m in movements] == [(2, 12, "cycle count"), (17, 19, "cycle count")]
+
+    # A retry replays the stored result without applying anything again
+    replay = InventoryService.apply_stock_adjustments(db, adjustments, reason="cycle count", idempotency_key="k1")
+    assert replay["replayed"] is True and replay["applied"] == result["applied"]
+    assert db.query(StockMovement).count() == 2
+    with pytest.raises(IdempotencyKeyReused):
+        InventoryService.apply_stock_adjustments(db, adjustments[:1], idempotency_key="k1")
+
+    result = InventoryService.apply_stock_adjustments(db, [("MBP", "absolute", -1), ("MBP-2", "delta", -20)])
+    assert result["applied"] == [] and len(result["errors"]) == 2
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.metrics import RequestProfile, _profile
+from app.db.database import get_db
+from app.main import app
+from app.models.models import Product, ProductVariant
+
+
+def test_query_hooks_count_statements_for_current_profile(db):
+    db.add(Product(name="Widget", base_price=10))
+    db.commit()
+
+    profile = RequestProfile()
+    token = _profile.set(profile)
+    try:
+        db.query(Product).all()
+        db.query(Product).filter(Product.id == 1).with_for_update().all()
+    finally:
+        _profile.reset(token)
+
+    assert profile.queries == 2
+    assert profile.db_seconds > 0
+    # SQLite ignores FOR UPDATE, so nothing counts as lock wait here
+    assert profile.lock_wait_seconds == 0
+
+
+def test_debug_profile_header_and_metrics_endpoint(db, monkeypatch):
+    product = Product(name="Widget", base_price=10)
+    db.add(product)
+    db.flush()
+    db.add(ProductVariant(product_id=product.id, sku="W-1", sku_name="Default", stock_quantity=5))
+    db.commit()
+
+    app.dependency_overrides[get_db] = lambda: db
+    monkeypatch.setattr(settings, "DEBUG_PROFILE_ENABLED", True)
+    try:
+        client = TestClient(app)
+        body = {"variant_id": 1, "quantity": 1, "cart_id": "c1"}
+        plain = client.post("/api/v1/cart/add", json=body)
+        profiled = client.post("/api/v1/cart/add", json=body, headers={"X-Debug-Profile": "1"})
+        metrics = client.get("/metrics")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    assert plain.status_code == 200 and "server-timing" not in plain.headers
+    timing = profiled.headers["server-timing"]
+    assert timing.startswith("db;dur=") and "reserve_inventory;dur=" in timing
+    assert int(timing.split('desc="')[1].split(" ")[0]) > 0
+
+    assert metrics.status_code == 200
+    assert 'http_request_db_queries_count{route="/api/v1/cart/add"}' in metrics.text
+    assert 'hot_path_duration_seconds_count{operation="reserve_inventory"}' in metrics.text
@@ -0,0 +1,220 @@
+import datetime
+from decimal import Decimal
+import pytest
+from app.models.models import Category, PricingRule, PricingRuleType, Promotion
+from app.services import pricing
+from app.services.money import from_cents, to_cents
+from app.services.pricing import (
+    BulkDiscountRule, PricingEngine, PricingPlanCache, PricingRuleParameterError, compile_rule_params
+)
+
+
+def _seed(db):
+    electronics = Category(name="Electronics")
+    db.add(electronics)
+    db.flush()
+    now = datetime.datetime.utcnow()
+    db.add_all([
+        PricingRule(name="Bulk", type=PricingRuleType.BULK, priority=1,
+                    parameters={"min_quantity": 5, "discount_percentage": 0.1}),
+        PricingRule(name="Seasonal", type=PricingRuleType.SEASONAL, priority=2,
+                    parameters={"discount_percentage": 0.05}),
+        PricingRule(name="Disabled", type=PricingRuleType.SEASONAL, priority=3,
+                    parameters={"discount_percentage": 0.5}, is_active=False),
+        Promotion(name="Launch", start_date=now - datetime.timedelta(days=1),
+                  end_date=now + datetime.timedelta(days=1), discount_percentage=0.2,
+                  target_category_id=electronics.id),
+        Promotion(name="Upcoming", start_date=now + datetime.timedelta(hours=1),
+                  end_date=now + datetime.timedelta(days=2), discount_percentage=0.3),
+    ])
+    db.commit()
+    return electronics
+
+
+def test_plan_orders_rules_and_indexes_promotions(db):
+    electronics = _seed(db)
+    plan = PricingEngine().load_plan(db)
+
+    assert [rule.name for rule in plan.rules] == ["Seasonal", "Bulk"]
+    assert [p.name for p in plan.promotions_for(electronics.id)] == ["Launch"]
+    assert plan.promotions_for(electronics.id + 1) == []
+    # The upcoming promotion bounds how long the plan stays valid
+    assert plan.valid_until <= plan.compiled_at + datetime.timedelta(hours=1)
+
+
+def test_calculate_price_with_plan(db):
+    electronics = _seed(db)
+    engine = PricingEngine()
+    plan = engine.load_plan(db)
+
+    result = engine.calculate_price(100.0, {"quantity": 5}, plan, product_category_id=electronics.id)
+
+    assert [r.rule_name for r in result.applied_rules] == ["Promotion: Launch", "Seasonal Sale", "Bulk Discount"]
+    # 100.00 -> 80.00 -> 76.00 -> 68.40, rounded to the cent at every step
+    assert [r.discount_amount for r in result.applied_rules] == [Decimal("20.00"), Decimal("4.00"), Decimal("7.60")]
+    assert result.final_price == Decimal("68.40")
+
+
+def test_cache_reuses_plan_until_invalidated(db):
+    _seed(db)
+    cache = PricingPlanCache()
+    plan = cache.get(db)
+    assert cache.get(db) is plan
+
+    cache.invalidate()
+    assert cache.get(db) is not plan
+
+
+def test_batch_matches_scalar_pricing(db):
+    electronics = _seed(db)
+    db.add(PricingRule(name="Gold", type=PricingRuleType.USER_TIER, priority=0,
+                       parameters={"user_tier": "GOLD", "discount_percentage": 0.15}))
+    db.add(PricingRule(name="BOGO", type=PricingRuleType.BOGO, priority=-1, parameters={}))
+    db.commit()
+    engine = PricingEngine()
+    plan = engine.load_plan(db)
+
+    rows = [
+        (100.0, 1, electronics.id, None),
+        (100.0, 5, electronics.id, "GOLD"),
+        (42.5, 2, -1, "SILVER"),
+        (10.0, 7, None, "GOLD"),
+    ]
+    result = engine.calculate_prices_batch(
+        [to_cents(r[0]) for r in rows],
+        [r[1] for r in rows],
+        plan,
+        category_ids=[-1 if r[2] is None else r[2] for r in rows],
+        user_tiers=[r[3] for r in rows],
+        include_breakdown=True,
+    )
+
+    for i, (price, qty, category_id, tier) in enumerate(rows):
+        category_id = None if category_id in (None, -1) else category_id
+        expected = engine.calculate_price(price, {"quantity": qty, "user_tier": tier}, plan, product_category_id=category_id)
+        assert from_cents(result.final_cents[i]) == expected.final_price
+        assert result.applied_rules[i] == expected.applied_rules
+
+
+def test_new_rule_types_match_between_scalar_fast_and_batch(db):
+    electronics = _seed(db)
+    db.add_all([
+        PricingRule(name="Tiers", type=PricingRuleType.TIERED_BULK, priority=0,
+                    parameters={"tiers": [{"min_quantity": 10, "discount_percentage": 0.2},
+                                          {"min_quantity": 3, "discount_percentage": 0.1}]}),
+        PricingRule(name="3 for 2", type=PricingRuleType.BUY_X_GET_Y, priority=-1, parameters={"buy": 2, "get": 1}),
+    ])
+    db.commit()
+    engine = PricingEngine()
+    plan = engine.load_plan(db)
+
+    quantities = [1, 3, 6, 10]
+    batch = engine.calculate_prices_batch([9000] * 4, quantities, plan, category_ids=[electronics.id] * 4)
+    for i, qty in enumerate(quantities):
+        expected = engine.calculate_price(90.0, {"quantity": qty}, plan, product_category_id=electronics.id)
+        assert from_cents(batch.final_cents[i]) == expected.final_price
+        assert engine.calculate_final_price(90.0, qty, plan, product_category_id=electronics.id) == expected.final_price
+
+    breakdown = engine.calculate_price(90.0, {"quantity": 6}, plan).applied_rules
+    assert [(b.rule_name, b.description) for b in breakdown][-2:] == [
+        ("Tiered Bulk Discount", "Applied 10.0% discount for 3+ units"),
+        ("Buy 2 Get 1", "Buy 2 get 1 free applied"),
+    ]
+
+
+def test_date_bounded_seasonal_rule_bounds_plan(db):
+    now = datetime.datetime.utcnow()
+    starts = now + datetime.timedelta(minutes=1)
+    db.add(PricingRule(name="Winter", type=PricingRuleType.SEASONAL, priority=1,
+                       parameters={"discount_percentage": 0.1, "start_date": starts.isoformat()}))
+    db.commit()
+
+    plan = PricingEngine().load_plan(db, now=now)
+    assert plan.rules == []
+    assert plan.valid_until == starts
+    assert [r.name for r in PricingEngine().load_plan(db, now=starts).rules] == ["Winter"]
+
+
+def test_rule_parameters_are_validated():
+    rule = compile_rule_params("BULK", "Bulk", {"min_quantity": 5, "discount_percentage": 0.1})
+    assert isinstance(rule, BulkDiscountRule) and not hasattr(rule, "__dict__")
+    assert rule.description == "Applied 10.0% discount for 5+ units"
+
+    for type_name, params in [
+        ("BULK", {"discount_percentage": 1.5}),
+        ("USER_TIER", {"discount_percentage": 0.1}),
+        ("TIERED_BULK", {"tiers": []}),
+        ("BUY_X_GET_Y", {"buy": 0, "get": 1}),
+        ("SEASONAL", {"start_date": "soon"}),
+        ("NOPE", {}),
+    ]:
+        with pytest.raises(PricingRuleParameterError):
+            compile_rule_params(type_name, "bad", params)
+
+
+def test_rule_plugins_register_from_entry_points(monkeypatch):
+    class FlatOffRule(pricing.CompiledRule):
+        __slots__ = ("amount",)
+        type_name = "FLAT_OFF"
+
+        def __init__(self, name, amount):
+            super().__init__(name, "Flat Off", f"{amount} off")
+            self.amount = amount
+
+        @classmethod
+        def from_params(cls, name, params):
+            return cls(name, params["amount"])
+
+        def discount(self, current_price, quantity, user_tier):
+            return to_cents(self.amount)
+
+    class HalfDoneRule(pricing.CompiledRule):
+        type_name = "HALF_DONE"
+
+        @classmethod
+        def from_params(cls, name, params):
+            return cls(name, "Half Done", "")
+
+    class EntryPoint:
+        def __init__(self, name, rule_type):
+            self.name = name
+            self.rule_type = rule_type
+
+        def load(self):
+            return self.rule_type
+
+    monkeypatch.setattr(pricing, "RULE_TYPES", dict(pricing.RULE_TYPES))
+    monkeypatch.setattr(pricing, "entry_points", lambda group: [
+        EntryPoint("flat_off", FlatOffRule), EntryPoint("half_done", HalfDoneRule)
+    ])
+    pricing.load_rule_plugins()
+
+    assert compile_rule_params("FLAT_OFF", "Five", {"amount": 5.0}).apply(2000, {}).discount_amount == Decimal("5.00")
+    # A rule type missing `discount` is rejected when it loads, not when it prices
+    assert "HALF_DONE" not in pricing.RULE_TYPES
+    with pytest.raises(TypeError):
+        HalfDoneRule.from_params("Half", {})
+
+
+def test_money_rounding_is_exact_and_matches_in_batch(db):
+    now = datetime.datetime.utcnow()
+    db.add_all([
+        PricingRule(name="Odd", type=PricingRuleType.BULK, priority=1,
+                    parameters={"min_quantity": 1, "discount_percentage": 0.0333}),
+        PricingRule(name="3 for 2", type=PricingRuleType.BUY_X_GET_Y, priority=0, parameters={"buy": 2, "get": 1}),
+        Promotion(name="Third off", start_date=now - datetime.timedelta(days=1),
+                  end_date=now + datetime.timedelta(days=1), discount_percentage=0.3333),
+    ])
+    db.add(Category(name="Any"))
+    db.commit()
+    engine = PricingEngine()
+    plan = engine.load_plan(db)
+
+    prices = [Decimal("0.01"), Decimal("19.99"), Decimal("0.10"), Decimal("1234.57"), Decimal("3.33")]
+    quantities = [1, 3, 7, 4, 2]
+    batch = engine.calculate_prices_batch([to_cents(p) for p in prices], quantities, plan, category_ids=[1] * 5)
+    for i, (price, qty) in enumerate(zip(prices, quantities)):
+        result = engine.calculate_price(price, {"quantity": qty}, plan, product_category_id=1)
+        assert result.final_price == result.base_price - sum(r.discount_amount for r in result.applied_rules)
+        assert result.final_price.as_tuple().exponent == -2
+        assert from_cents(batch.final_cents[i]) == result.final_price
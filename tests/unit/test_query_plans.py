@@ -0,0 +1,70 @@
+"""
+Guards the indexes behind the reservation, order and promotion hot queries.
+Runs against SQLite by default; set TEST_POSTGRES_URL to also check Postgres
+(with seq scans disabled, so any fallback shows up in the plan).
+"""
+import datetime
+import os
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from app.models.models import Base, InventoryReservation, OrderItem, ProductVariant, Promotion, ReservationStatus
+
+NOW = datetime.datetime(2026, 1, 1)
+
+HOT_QUERIES = {
+    "variant_pending_holds": select(InventoryReservation.id).where(
+        InventoryReservation.variant_id == 1,
+        InventoryReservation.status == ReservationStatus.PENDING,
+        InventoryReservation.expires_at <= NOW,
+    ),
+    "cleanup_expired": select(InventoryReservation.id).where(
+        InventoryReservation.status == ReservationStatus.PENDING,
+        InventoryReservation.expires_at <= NOW,
+    ).limit(1000),
+    "checkout_cart": select(InventoryReservation.id).where(
+        InventoryReservation.cart_id == "cart-1",
+        InventoryReservation.status == ReservationStatus.PENDING,
+        InventoryReservation.expires_at > NOW,
+    ),
+    "active_promotions": select(Promotion.id).where(
+        Promotion.is_active == True,
+        Promotion.end_date >= NOW,
+    ),
+    "order_items_by_variant": select(func.sum(OrderItem.quantity)).where(OrderItem.variant_id == 1),
+    "low_stock": select(ProductVariant.id).where(
+        ProductVariant.stock_quantity - ProductVariant.reserved_quantity < 5,
+    ),
+}
+
+
+def _sqlite_plan(engine, stmt):
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_sqlite_hot_queries_use_indexes(engine, name):
+    plan = _sqlite_plan(engine, HOT_QUERIES[name])
+    assert "USING" in plan and "INDEX" in plan, plan
+    assert not any(step.startswith("SCAN") and "INDEX" not in step for step in plan.split(" | ")), plan
+
+
+@pytest.fixture(scope="module")
+def pg_engine():
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL not set")
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_postgres_hot_queries_avoid_seq_scans(pg_engine, name):
+    sql = str(HOT_QUERIES[name].compile(pg_engine, compile_kwargs={"literal_binds": True}))
+    with pg_engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        plan = "\n".join(row[0] for row in conn.exec_driver_sql(f"EXPLAIN {sql}"))
+    assert "Seq Scan" not in plan, plan
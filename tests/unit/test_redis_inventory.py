@@ -0,0 +1,117 @@
+import threading
+import pytest
+from app.core.config import settings
+from app.models.models import Category, Product, ProductVariant, InventoryReservation
+from app.services import redis_inventory
+from app.services.inventory import InventoryService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = redis_inventory.RedisReservationBackend(fakeredis.FakeRedis())
+    monkeypatch.setattr(settings, "RESERVATION_BACKEND", "redis")
+    monkeypatch.setattr(redis_inventory, "_backend", backend)
+    return backend
+
+
+@pytest.fixture
+def variant(db):
+    category = Category(name="Sneakers")
+    db.add(category)
+    db.flush()
+    product = Product(name="Runner", base_price=100.0, category_id=category.id)
+    db.add(product)
+    db.flush()
+    variant = ProductVariant(product_id=product.id, sku="RUN-42", sku_name="42", stock_quantity=10)
+    db.add(variant)
+    db.commit()
+    return variant
+
+
+def test_reserve_is_admitted_in_redis_and_written_behind(db, backend, variant):
+    hold = InventoryService.reserve_inventory(db, variant.id, "cart-1", 6)
+    assert hold.variant.id == variant.id
+    assert db.query(InventoryReservation).count() == 0
+    assert InventoryService.get_available_quantity(db, variant.id) == 4
+
+    with pytest.raises(Exception, match="Not enough"):
+        InventoryService.reserve_inventory(db, variant.id, "cart-2", 6)
+
+    assert backend.flush_write_behind(db) == 1
+    db.refresh(variant)
+    assert variant.reserved_quantity == 6
+    assert db.query(InventoryReservation).one().hold_token == hold.hold_token
+
+
+def test_release_and_checkout_update_redis(db, backend, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 3)
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 4)
+
+    assert InventoryService.release_reservations(db, "cart-1", variant.id) == 3
+    assert InventoryService.get_available_quantity(db, variant.id) == 6
+
+    InventoryService.complete_checkout(db, "cart-2")
+    db.refresh(variant)
+    assert variant.stock_quantity == 6
+    assert variant.reserved_quantity == 0
+    assert InventoryService.get_available_quantity(db, variant.id) == 6
+
+
+def test_expired_holds_return_to_stock(db, backend, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 10, duration_minutes=-1)
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 10)
+    assert InventoryService.get_available_quantity(db, variant.id) == 0
+
+
+def test_reconcile_restores_state_after_redis_loss(db, backend, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 4)
+    backend.flush_write_behind(db)
+    variant.stock_quantity = 12
+    db.commit()
+
+    backend.client.flushall()
+    backend.reconcile(db)
+
+    assert InventoryService.get_available_quantity(db, variant.id) == 8
+
+
+def test_flusher_that_lost_its_lock_stops_and_leaves_the_new_lock(db, backend, variant, monkeypatch):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 1)
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 1)
+    adjust_reserved = InventoryService._adjust_reserved
+
+    def stall_past_the_lock_ttl(db, deltas):
+        # The lock expires mid-batch and a second flusher takes it
+        backend.client.set(redis_inventory.FLUSH_LOCK_KEY, "other-flusher")
+        adjust_reserved(db, deltas)
+    monkeypatch.setattr(InventoryService, "_adjust_reserved", staticmethod(stall_past_the_lock_ttl))
+
+    assert backend.flush_write_behind(db, batch_size=1) == 1
+    assert backend.client.get(redis_inventory.FLUSH_LOCK_KEY) == b"other-flusher"
+    assert backend.client.llen(redis_inventory.WRITE_BEHIND_KEY) == 1
+
+
+def test_release_and_checkout_wait_for_a_flush_in_progress(db, backend, variant, monkeypatch):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 3)
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 4)
+
+    def flush_elsewhere():
+        # Another worker holds the lock without having picked up our holds
+        backend.client.set(redis_inventory.FLUSH_LOCK_KEY, "other-flusher")
+        threading.Timer(0.2, backend.client.delete, [redis_inventory.FLUSH_LOCK_KEY]).start()
+
+    flush_elsewhere()
+    assert InventoryService.release_reservations(db, "cart-1", variant.id) == 3
+
+    flush_elsewhere()
+    order = InventoryService.complete_checkout(db, "cart-2")
+    assert [item.quantity for item in order.items] == [4]
+    db.refresh(variant)
+    assert (variant.stock_quantity, variant.reserved_quantity) == (6, 0)
+
+    monkeypatch.setattr(settings, "RESERVATION_FLUSH_WAIT_SECONDS", 0)
+    backend.client.set(redis_inventory.FLUSH_LOCK_KEY, "stuck-flusher")
+    with pytest.raises(Exception, match="busy"):
+        InventoryService.release_reservations(db, "cart-2", variant.id)
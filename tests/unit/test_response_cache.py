@@ -0,0 +1,56 @@
+import fakeredis
+import fakeredis.aioredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.db.database import get_db
+from app.main import app
+from app.services.response_cache import CachedResponse, ResponseCache
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_rules_are_served_from_cache_until_a_write(db, engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        client = TestClient(app)
+        first = client.get("/api/v1/rules/")
+        assert first.status_code == 200 and first.json() == []
+        etag = first.headers["etag"]
+
+        statements.clear()
+        assert client.get("/api/v1/rules/").headers["etag"] == etag
+        revalidated = client.get("/api/v1/rules/", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304 and revalidated.content == b""
+        assert statements == []
+
+        client.post("/api/v1/rules/", json={
+            "name": "Bulk", "type": "BULK", "parameters": {"min_quantity": 5, "discount_percentage": 0.1}
+        })
+        refreshed = client.get("/api/v1/rules/", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert [rule["name"] for rule in refreshed.json()] == ["Bulk"]
+        assert refreshed.headers["etag"] != etag
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.mark.anyio
+async def test_redis_tier_shares_entries_and_versions():
+    server = fakeredis.FakeServer()
+
+    def worker():
+        return ResponseCache(10, 30, fakeredis.FakeRedis(server=server), fakeredis.aioredis.FakeRedis(server=server))
+
+    first, second = worker(), worker()
+    key = f"rules:{await first.version('rules')}:/api/v1/rules/?"
+    await first.put(key, CachedResponse('"abc"', [(b"content-type", b"application/json")], b"[]"))
+    assert (await second.get(key)).body == b"[]"
+
+    second.bump("rules")
+    assert await first.version("rules") == 1
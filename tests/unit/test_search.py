@@ -0,0 +1,19 @@
+from app.services.products import ProductService
+from app.services.search import in_memory_search, tokenize
+
+
+def _matches(q):
+    return set(in_memory_search._scores(tokenize(q)))
+
+
+def test_in_memory_index_tracks_product_writes(db):
+    in_memory_search.build(db)
+    phone = ProductService.create_product(db, {"name": "Pixel Phone", "description": "Android", "base_price": 500.0})
+    assert _matches("pix") == {phone.id}
+
+    ProductService.update_product(db, phone.id, {"name": "Galaxy Phone", "description": "Android", "base_price": 500.0})
+    assert _matches("pix") == set()
+    assert _matches("gal andr") == {phone.id}
+
+    ProductService.delete_product(db, phone.id)
+    assert _matches("phone") == set()
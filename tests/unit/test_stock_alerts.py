@@ -0,0 +1,73 @@
+import json
+import pytest
+from app.core.config import settings
+from app.models.models import Category, Product, ProductVariant
+from app.services import stock_alerts
+from app.services.inventory import InventoryService
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def publisher(monkeypatch, server):
+    publisher = stock_alerts.StockAlertPublisher(
+        fakeredis.FakeRedis(server=server), settings.LOW_STOCK_STREAM_KEY, threshold=5, maxlen=100
+    )
+    monkeypatch.setattr(settings, "LOW_STOCK_EVENTS_ENABLED", True)
+    monkeypatch.setattr(stock_alerts, "_publisher", publisher)
+    return publisher
+
+
+@pytest.fixture
+def variant(db):
+    category = Category(name="Laptops")
+    db.add(category)
+    db.flush()
+    product = Product(name="MacBook Pro", base_price=2000.0, category_id=category.id)
+    db.add(product)
+    db.flush()
+    variant = ProductVariant(product_id=product.id, sku="MBP", sku_name="M3", stock_quantity=8)
+    db.add(variant)
+    db.commit()
+    return variant
+
+
+def _events(publisher):
+    return [
+        json.loads(fields[b"data"])["event"]
+        for _, fields in publisher.client.xrange(settings.LOW_STOCK_STREAM_KEY)
+    ]
+
+
+def test_reservations_publish_threshold_crossings(db, publisher, variant):
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 2)
+    assert _events(publisher) == []
+
+    InventoryService.reserve_inventory(db, variant.id, "cart-1", 2)
+    assert _events(publisher) == ["low_stock"]
+
+    InventoryService.reserve_inventory(db, variant.id, "cart-2", 1)
+    assert InventoryService.release_reservations(db, "cart-1", variant.id) == 4
+    assert _events(publisher) == ["low_stock", "restocked"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_stream_events_formats_server_sent_events(publisher, server, anyio_backend):
+    publisher.publish({1: (5, 4)})
+    from fakeredis import aioredis
+    client = aioredis.FakeRedis(server=server, decode_responses=True)
+    connected = iter([False, True])
+
+    async def is_disconnected():
+        return next(connected)
+
+    messages = [m async for m in stock_alerts.stream_events(client, "0", is_disconnected, block_ms=None)]
+    assert len(messages) == 1
+    assert "event: low_stock\n" in messages[0]
+    assert json.loads(messages[0].split("data: ")[1])["available_quantity"] == 4